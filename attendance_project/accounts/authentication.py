@@ -0,0 +1,67 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import router, transaction
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+
+def user_cache_key(user_id):
+    return f"accounts:user:{user_id}"
+
+
+def invalidate_user(user_id):
+    """Drop the cached user now and again after the current transaction
+    commits, so a request that read the old row meanwhile cannot leave it
+    cached."""
+    key = user_cache_key(user_id)
+    cache.delete(key)
+    transaction.on_commit(lambda: cache.delete(key))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """``JWTAuthentication`` that keeps the resolved user in the cache for
+    ``AUTH_USER_CACHE_SECONDS``, saving the user query on most requests.
+
+    Only the user's field values are cached, without the password hash:
+    a cached user comes back with ``password`` deferred, so it is loaded
+    from the database on first access and a plain ``save()`` leaves it
+    alone. The revoked-token check uses a digest of the hash instead.
+
+    Entries are dropped whenever the user is saved or deleted (password
+    changes and deactivation included, see ``accounts.signals``); the
+    active and revoked-token checks run on cached users too.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            return super().get_user(validated_token)
+
+        key = user_cache_key(user_id)
+        entry = cache.get(key)
+        if entry is None:
+            user = super().get_user(validated_token)
+            cache.set(key, self.cache_entry(user), settings.AUTH_USER_CACHE_SECONDS)
+            return user
+
+        values, password_digest = entry
+        user = self.user_model.from_db(router.db_for_read(self.user_model), list(values), list(values.values()))
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN and validated_token.get(
+            api_settings.REVOKE_TOKEN_CLAIM
+        ) != password_digest:
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
+
+    @staticmethod
+    def cache_entry(user):
+        values = {
+            field.attname: getattr(user, field.attname)
+            for field in user._meta.concrete_fields
+            if field.attname != "password"
+        }
+        return values, get_md5_hash_password(user.password)
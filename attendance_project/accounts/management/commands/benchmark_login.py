@@ -0,0 +1,88 @@
+import json
+import statistics
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import User
+
+PASSWORD = "benchmark-login-pass"
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark login against the current database: identifier lookups "
+        "per second (username, email and misses, in mixed case) and full "
+        "logins per second including the password hash. Prints JSON; the "
+        "temporary login user is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--lookups", type=int, default=500,
+            help="Identifier lookups to time (default: 500).",
+        )
+        parser.add_argument(
+            "--logins", type=int, default=20,
+            help="Full login requests to time (default: 20).",
+        )
+
+    def handle(self, *args, **options):
+        if options["lookups"] < 1 or options["logins"] < 1:
+            raise CommandError("--lookups and --logins must be positive.")
+
+        known = list(User.objects.values_list("username", "email")[:options["lookups"]])
+        if not known:
+            raise CommandError("No users found; run generate_dataset first.")
+        identifiers = []
+        for i in range(options["lookups"]):
+            username, email = known[i % len(known)]
+            identifiers.append([username.upper(), email.upper(), f"missing-{i}@example.com"][i % 3])
+
+        with CaptureQueriesContext(connection) as ctx:
+            start = time.perf_counter()
+            for identifier in identifiers:
+                User.objects.get_by_identifier(identifier)
+            lookup_seconds = time.perf_counter() - start
+
+        report = {
+            "lookups": {
+                "per_second": round(len(identifiers) / lookup_seconds, 1),
+                "queries_per_lookup": len(ctx.captured_queries) / len(identifiers),
+            },
+            "logins": self.measure_logins(options["logins"]),
+        }
+        self.stdout.write(json.dumps(report, indent=2))
+
+    def measure_logins(self, count):
+        client = APIClient()
+        url = reverse("token_obtain_pair")
+        timings = []
+        # One identifier logs in repeatedly, so lift the login throttles.
+        unthrottled = {scope: (10 ** 9, 1) for scope in settings.LOGIN_THROTTLE_RATES}
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=["testserver"], LOGIN_THROTTLE_RATES=unthrottled
+        ):
+            user = User.objects.create_user(
+                email="benchmark.login@example.com", password=PASSWORD, first_name="Benchmark"
+            )
+            for i in range(count):
+                identifier = user.email if i % 2 else user.username.upper()
+                start = time.perf_counter()
+                response = client.post(url, {"identifier": identifier, "password": PASSWORD}, format="json")
+                timings.append((time.perf_counter() - start) * 1000)
+                if response.status_code != 200:
+                    raise CommandError(f"Login failed with {response.status_code}: {response.content!r}")
+            transaction.set_rollback(True)
+
+        timings.sort()
+        return {
+            "per_second": round(1000 / statistics.fmean(timings), 2),
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(timings[max(0, round(0.95 * len(timings)) - 1)], 2),
+        }
@@ -0,0 +1,21 @@
+# Generated by Django 6.0 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_remove_user_user_id_alter_user_first_name_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UsernameSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('base', models.CharField(max_length=150, unique=True)),
+                ('last_value', models.PositiveBigIntegerField(default=10000)),
+            ],
+        ),
+    ]
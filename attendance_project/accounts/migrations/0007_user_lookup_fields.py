@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 15:10
+
+from django.db import migrations, models
+from django.db.models.functions import Lower
+
+
+def fill_lookup_fields(apps, schema_editor):
+    User = apps.get_model("accounts", "User")
+    User.objects.update(username_lower=Lower("username"), email_lower=Lower("email"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0006_usernamesequence'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='email_lower',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=254),
+        ),
+        migrations.AddField(
+            model_name='user',
+            name='username_lower',
+            field=models.CharField(db_index=True, default='', editable=False, max_length=150),
+        ),
+        migrations.RunPython(fill_lookup_fields, migrations.RunPython.noop),
+    ]
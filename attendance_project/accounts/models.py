@@ -1,23 +1,77 @@
-import random
 from django.contrib.auth.models import AbstractUser, BaseUserManager
 from django.db import models
-from django.db import IntegrityError
-from time import sleep
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
+
+
+class UsernameSequence(models.Model):
+    """Last numeric suffix handed out for one username base such as
+    ``mohammed_STU``."""
+
+    # Suffixes of new bases start above this, keeping the 5-digit look of
+    # the randomly picked usernames that came before.
+    START = 10000
+
+    base = models.CharField(max_length=150, unique=True)
+    last_value = models.PositiveBigIntegerField(default=START)
+
+    def __str__(self):
+        return f"{self.base}{self.last_value}"
+
 
 class CustomUserManager(BaseUserManager):
+    @staticmethod
+    def username_base(first_name, role):
+        base = "".join(ch for ch in first_name.lower() if ch.isalnum()) or "user"
+        return f"{base}_{role}"
+
+    def reserve_usernames(self, first_name, role, count=1):
+        """Reserve ``count`` unique usernames for ``first_name``/``role`` and
+        return them.
+
+        Every base has a ``UsernameSequence`` row; reserving bumps it by
+        ``count`` in one locked UPDATE, so concurrent registrations never
+        get the same suffix and the cost does not depend on how crowded a
+        name is. A base's first use seeds its sequence from the largest
+        suffix already taken.
+        """
+        base = self.username_base(first_name, role)
+        sequences = UsernameSequence.objects.filter(base=base)
+        with transaction.atomic():
+            if not sequences.update(last_value=F("last_value") + count):
+                try:
+                    with transaction.atomic():
+                        UsernameSequence.objects.create(
+                            base=base, last_value=self.largest_suffix(base) + count
+                        )
+                except IntegrityError:
+                    # A concurrent registration seeded it first.
+                    sequences.update(last_value=F("last_value") + count)
+            last = sequences.select_for_update().values_list("last_value", flat=True).get()
+        return [f"{base}{number}" for number in range(last - count + 1, last + 1)]
+
+    def largest_suffix(self, base):
+        suffixes = [
+            username[len(base):]
+            for username in self.model.objects.filter(username__startswith=base).values_list("username", flat=True)
+        ]
+        return max([int(s) for s in suffixes if s.isdigit()] + [UsernameSequence.START])
+
     def generate_unique_username(self, first_name, role):
-        base = first_name.lower()
-        base = "".join(ch for ch in base if ch.isalnum())
-        if not base:
-            base = "user"
-
-        for _ in range(100):
-            number = random.randint(10000, 99999)
-            username_candidate = f"{base}_{role}{number}"
-            if not self.model.objects.filter(username=username_candidate).exists():
-                return username_candidate
-            sleep(0.01)
-        raise IntegrityError("Could not generate a unique username after 100 attempts.")
+        return self.reserve_usernames(first_name, role)[0]
+
+    def bulk_create(self, objs, *args, **kwargs):
+        # bulk_create() skips save(), so fill the lookup columns here.
+        for user in objs:
+            user.sync_lookup_fields()
+        return super().bulk_create(objs, *args, **kwargs)
+
+    def get_by_identifier(self, identifier):
+        """The user whose username or email matches ``identifier`` case
+        insensitively, in one indexed query; a username match wins."""
+        identifier = identifier.strip().lower()
+        users = list(self.filter(Q(username_lower=identifier) | Q(email_lower=identifier))[:2])
+        return next((u for u in users if u.username_lower == identifier), users[0] if users else None)
 
     def create_user(self, email, password=None, first_name="", last_name="", role="STU", **extra_fields):
         if not email:
@@ -45,6 +99,11 @@ class User(AbstractUser):
     username = models.CharField(max_length=150, unique=True)
     first_name = models.CharField(max_length=30)
     last_name = models.CharField(max_length=30)
+    # Lowercased copies of username and email for case-insensitive login
+    # lookups that can use a plain index; maintained by save() and
+    # CustomUserManager.bulk_create().
+    username_lower = models.CharField(max_length=150, db_index=True, editable=False, default="")
+    email_lower = models.CharField(max_length=254, db_index=True, editable=False, default="")
 
     USERNAME_FIELD = "email"
     REQUIRED_FIELDS = ["first_name", "last_name", "role"]
@@ -53,3 +112,14 @@ class User(AbstractUser):
 
     def __str__(self):
         return self.username
+
+    def sync_lookup_fields(self):
+        self.username_lower = (self.username or "").lower()
+        self.email_lower = (self.email or "").lower()
+
+    def save(self, *args, **kwargs):
+        self.sync_lookup_fields()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"username", "email"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, "username_lower", "email_lower"}
+        super().save(*args, **kwargs)
@@ -1,7 +1,8 @@
 from rest_framework import serializers
 from django.contrib.auth import authenticate, get_user_model
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.tokens import RefreshToken
+from .throttling import increment, password_hash_slot
+from .tokens import ClaimsRefreshToken
 
 User = get_user_model()
 
@@ -19,13 +20,16 @@ class CustomTokenObtainPairSerializer(serializers.Serializer):
         if not identifier or not password:
             raise serializers.ValidationError("Identifier and password are required")
 
-        user = User.objects.filter(username__iexact=identifier).first() \
-               or User.objects.filter(email__iexact=identifier).first()
+        user = User.objects.get_by_identifier(identifier)
 
-        if not user or not user.check_password(password):
+        with password_hash_slot():
+            valid = user is not None and user.check_password(password)
+        if not valid:
+            increment("failed_logins")
             raise serializers.ValidationError("No account found with that email/username or incorrect password.")
+        increment("logins")
 
-        refresh = RefreshToken.for_user(user)
+        refresh = ClaimsRefreshToken.for_user(user)
 
         return {
             "refresh": str(refresh),
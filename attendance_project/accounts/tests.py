@@ -1,7 +1,14 @@
-from django.test import TestCase, Client
+from threading import BoundedSemaphore
+from unittest.mock import patch
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, Client, override_settings
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from rest_framework import status
+from rest_framework_simplejwt.tokens import AccessToken
+from .authentication import user_cache_key
 from .serializers import CustomTokenObtainPairSerializer, ChangePasswordSerializer
 
 User = get_user_model()
@@ -10,6 +17,7 @@ User = get_user_model()
 class AuthTests(TestCase):
 
     def setUp(self):
+        cache.clear()
         self.client = Client()
         self.user = User.objects.create_user(
             email="student@example.com",
@@ -57,6 +65,51 @@ class AuthTests(TestCase):
         self.assertIn("access", response.json())
         self.assertIn("refresh", response.json())
 
+    def test_login_identifier_is_case_insensitive(self):
+        for identifier in (self.user.username.upper(), "STUDENT@Example.com"):
+            response = self.client.post(
+                self.login_url,
+                {"identifier": identifier, "password": "TestPass123!"},
+                content_type="application/json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK, identifier)
+
+    def test_identifier_lookup_is_one_query(self):
+        with self.assertNumQueries(1):
+            self.assertIsNone(User.objects.get_by_identifier("nobody@example.com"))
+        with self.assertNumQueries(1):
+            self.assertEqual(User.objects.get_by_identifier(" Student@Example.COM "), self.user)
+
+        # a username that equals someone else's email wins
+        other = User.objects.create(username="student@example.com", email="other@example.com")
+        self.assertEqual(User.objects.get_by_identifier("student@example.com"), other)
+
+    def test_lookup_fields_follow_changes(self):
+        self.user.email = "Renamed@Example.com"
+        self.user.save(update_fields=["email"])
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.email_lower, "renamed@example.com")
+
+        User.objects.bulk_create([User(username="Bulk_STU1", email="Bulk@Example.com")])
+        self.assertEqual(User.objects.get_by_identifier("bulk_stu1").email, "Bulk@Example.com")
+
+    def test_tokens_carry_user_claims(self):
+        response = self.client.post(
+            self.login_url,
+            {"identifier": self.user.username, "password": "TestPass123!"},
+            content_type="application/json"
+        )
+        access = AccessToken(response.json()["access"])
+        self.assertEqual(access["username"], self.user.username)
+        self.assertEqual(access["role"], "STU")
+
+        refreshed = self.client.post(
+            reverse("token_refresh"),
+            {"refresh": response.json()["refresh"]},
+            content_type="application/json"
+        )
+        self.assertEqual(AccessToken(refreshed.json()["access"])["role"], "STU")
+
     def test_change_password_success(self):
         login_response = self.client.post(
             self.login_url,
@@ -92,3 +145,153 @@ class AuthTests(TestCase):
         )
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.json()["detail"], "Old password is incorrect.")
+
+
+class UsernameAllocatorTests(TestCase):
+    def test_usernames_come_from_a_sequence(self):
+        first = User.objects.create_user(email="m1@example.com", password="x", first_name="Mohammed")
+        second = User.objects.create_user(email="m2@example.com", password="x", first_name="Mohammed")
+        self.assertEqual(first.username, "mohammed_STU10001")
+        self.assertEqual(second.username, "mohammed_STU10002")
+
+    def test_sequence_is_seeded_from_existing_usernames(self):
+        User.objects.create(username="ali_STU55555", email="a1@example.com")
+        User.objects.create(username="ali_STUx", email="a2@example.com")
+        self.assertEqual(User.objects.reserve_usernames("Ali", "STU"), ["ali_STU55556"])
+
+    def test_reserve_many_in_constant_queries(self):
+        User.objects.reserve_usernames("Sara", "TCR")
+        # savepoint, update, locked read, release
+        with self.assertNumQueries(4):
+            names = User.objects.reserve_usernames("Sara", "TCR", count=2000)
+        self.assertEqual(len(set(names)), 2000)
+        self.assertEqual((names[0], names[-1]), ("sara_TCR10002", "sara_TCR12001"))
+        self.assertEqual(User.objects.generate_unique_username("Sara", "TCR"), "sara_TCR12002")
+
+
+@override_settings(LOGIN_THROTTLE_RATES={
+    "login_ip": (3, 60),
+    "login_identifier": (2, 60),
+    "refresh_ip": (3, 60),
+    "refresh_user": (2, 60),
+})
+class LoginThrottleTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="student@example.com", password="TestPass123!", first_name="S")
+        self.login_url = reverse("token_obtain_pair")
+
+    def login(self, identifier, password="TestPass123!", ip="10.0.0.1"):
+        return self.client.post(
+            self.login_url, {"identifier": identifier, "password": password},
+            content_type="application/json", REMOTE_ADDR=ip,
+        )
+
+    def test_identifier_and_ip_buckets(self):
+        self.assertEqual(self.login("student@example.com", "wrong").status_code, 400)
+        self.assertEqual(self.login("STUDENT@example.com", "wrong").status_code, 400)
+        # the identifier bucket is empty, whatever the address
+        with patch("accounts.models.User.check_password") as check:
+            response = self.login("student@example.com", ip="10.0.0.2")
+        self.assertEqual(response.status_code, 429)
+        self.assertIn("Retry-After", response)
+        check.assert_not_called()
+
+        self.assertEqual(self.login("other@example.com").status_code, 400)
+        # the first address has spent its three tokens
+        self.assertEqual(self.login("third@example.com").status_code, 429)
+
+        admin = User.objects.create_superuser(email="admin@example.com", password="pass")
+        access = str(AccessToken.for_user(admin))
+        metrics = self.client.get(reverse("login-metrics"), HTTP_AUTHORIZATION=f"Bearer {access}").json()
+        self.assertEqual(metrics["failed_logins"], 3)
+        self.assertEqual(metrics["throttled_login_identifier"], 1)
+        self.assertEqual(metrics["throttled_login_ip"], 1)
+
+    def test_ip_bucket_ignores_spoofed_forwarded_for(self):
+        statuses = [
+            self.client.post(
+                self.login_url, {"identifier": f"user{i}@example.com", "password": "x"},
+                content_type="application/json", REMOTE_ADDR="10.0.0.9", HTTP_X_FORWARDED_FOR=f"203.0.113.{i}",
+            ).status_code
+            for i in range(4)
+        ]
+        self.assertEqual(statuses, [400, 400, 400, 429])
+
+    def test_ip_bucket_uses_forwarded_for_behind_proxies(self):
+        with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, "NUM_PROXIES": 1}):
+            statuses = [
+                self.client.post(
+                    self.login_url, {"identifier": f"user{i}@example.com", "password": "x"},
+                    content_type="application/json", REMOTE_ADDR="10.0.0.9", HTTP_X_FORWARDED_FOR=f"203.0.113.{i}",
+                ).status_code
+                for i in range(4)
+            ]
+        self.assertEqual(statuses, [400] * 4)
+
+    def test_refresh_is_throttled_per_user(self):
+        refresh = self.login(self.user.username).json()["refresh"]
+        url = reverse("token_refresh")
+        statuses = [
+            self.client.post(url, {"refresh": refresh}, content_type="application/json", REMOTE_ADDR=f"10.0.1.{i}").status_code
+            for i in range(3)
+        ]
+        self.assertEqual(statuses, [200, 200, 429])
+
+    def test_hash_gate_rejects_when_busy(self):
+        busy = BoundedSemaphore(1)
+        busy.acquire()
+        with patch("accounts.throttling._hash_slots", busy), \
+                override_settings(LOGIN_HASH_WAIT_SECONDS=0.01):
+            response = self.login(self.user.username)
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.login(self.user.username).status_code, 200)
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(email="student@example.com", password="TestPass123!", first_name="S")
+        self.url = reverse("test")
+        self.auth = {"HTTP_AUTHORIZATION": f"Bearer {AccessToken.for_user(self.user)}"}
+
+    def test_user_is_resolved_from_cache(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(self.url, **self.auth).status_code, 200)
+        with self.assertNumQueries(0):
+            self.assertEqual(self.client.get(self.url, **self.auth).status_code, 200)
+
+    def test_password_change_invalidates_cache(self):
+        self.client.get(self.url, **self.auth)
+        response = self.client.post(
+            reverse("change-password"),
+            {"old_password": "TestPass123!", "new_password": "AnotherPass456!"},
+            content_type="application/json", **self.auth,
+        )
+        self.assertEqual(response.status_code, 200)
+        with self.assertNumQueries(1):
+            self.client.get(self.url, **self.auth)
+
+    def test_cache_holds_no_password_hash(self):
+        self.client.get(self.url, **self.auth)
+        values, _ = cache.get(user_cache_key(self.user.pk))
+        self.assertNotIn("password", values)
+        self.assertNotIn(self.user.password, repr(cache.get(user_cache_key(self.user.pk))))
+
+        # the cached user still changes its password correctly
+        response = self.client.post(
+            reverse("change-password"),
+            {"old_password": "TestPass123!", "new_password": "AnotherPass456!"},
+            content_type="application/json", **self.auth,
+        )
+        self.assertEqual(response.status_code, 200)
+        self.user.refresh_from_db()
+        self.assertTrue(self.user.check_password("AnotherPass456!"))
+
+    def test_deactivated_user_is_rejected(self):
+        self.client.get(self.url, **self.auth)
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+        self.assertEqual(self.client.get(self.url, **self.auth).status_code, 401)
+        # inactive users are never cached
+        self.assertEqual(self.client.get(self.url, **self.auth).status_code, 401)
@@ -0,0 +1,131 @@
+import threading
+import time
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.exceptions import Throttled
+from rest_framework.settings import api_settings
+from rest_framework.throttling import BaseThrottle
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import RefreshToken
+
+COUNTERS = ("logins", "failed_logins", "hash_gate_rejected")
+
+
+def _counter_key(name):
+    return f"accounts:login:{name}"
+
+
+def increment(name):
+    key = _counter_key(name)
+    try:
+        cache.incr(key)
+    except ValueError:
+        if not cache.add(key, 1, timeout=None):
+            cache.incr(key)
+
+
+def login_metrics():
+    """Login counters since the cache was last cleared, including the
+    requests each throttle turned away."""
+    names = [*COUNTERS, *(f"throttled_{scope}" for scope in settings.LOGIN_THROTTLE_RATES)]
+    values = cache.get_many([_counter_key(name) for name in names])
+    return {name: values.get(_counter_key(name), 0) for name in names}
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """Cache-backed token bucket.
+
+    Each key holds up to ``capacity`` tokens and regains them at
+    ``capacity / period`` per second; a request spends one. The rate comes
+    from ``LOGIN_THROTTLE_RATES[scope]`` as ``(capacity, period_seconds)``.
+    Buckets are read and written without a lock, so concurrent requests
+    may overspend a token or two; that is fine for shedding load.
+    """
+
+    scope = None
+
+    def get_key(self, request):
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        key = self.get_key(request)
+        if key is None:
+            return True
+        capacity, period = settings.LOGIN_THROTTLE_RATES[self.scope]
+        rate = capacity / period
+        now = time.time()
+
+        cache_key = f"throttle:{self.scope}:{key}"
+        tokens, updated = cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * rate)
+        if tokens < 1:
+            self.wait_seconds = (1 - tokens) / rate
+            increment(f"throttled_{self.scope}")
+            return False
+
+        cache.set(cache_key, (tokens - 1, now), timeout=period)
+        return True
+
+    def wait(self):
+        return self.wait_seconds
+
+
+class IPThrottle(TokenBucketThrottle):
+    def get_key(self, request):
+        # Without NUM_PROXIES, get_ident() keys on X-Forwarded-For as the
+        # client sent it, so rotating the header would get a fresh bucket
+        # every request. Only trust it behind a configured proxy count.
+        if api_settings.NUM_PROXIES is None:
+            return request.META.get("REMOTE_ADDR")
+        return self.get_ident(request)
+
+
+class LoginIPThrottle(IPThrottle):
+    scope = "login_ip"
+
+
+class LoginIdentifierThrottle(TokenBucketThrottle):
+    scope = "login_identifier"
+
+    def get_key(self, request):
+        identifier = request.data.get("identifier")
+        if not isinstance(identifier, str) or not identifier.strip():
+            return None
+        return identifier.strip().lower()
+
+
+class RefreshIPThrottle(IPThrottle):
+    scope = "refresh_ip"
+
+
+class RefreshUserThrottle(TokenBucketThrottle):
+    scope = "refresh_user"
+
+    def get_key(self, request):
+        try:
+            return str(RefreshToken(request.data.get("refresh"))["user_id"])
+        except (TokenError, KeyError, TypeError):
+            # The view rejects the token itself.
+            return None
+
+
+_hash_slots = threading.BoundedSemaphore(settings.LOGIN_HASH_CONCURRENCY)
+
+
+@contextmanager
+def password_hash_slot():
+    """Bound how many logins hash passwords at once in this process.
+
+    PBKDF2 is CPU bound; past the limit a login waits at most
+    ``LOGIN_HASH_WAIT_SECONDS`` and then gets a 429 instead of stalling
+    every worker.
+    """
+    if not _hash_slots.acquire(timeout=settings.LOGIN_HASH_WAIT_SECONDS):
+        increment("hash_gate_rejected")
+        raise Throttled(wait=1, detail="Too many logins in progress, try again shortly.")
+    try:
+        yield
+    finally:
+        _hash_slots.release()
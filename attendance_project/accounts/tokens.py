@@ -0,0 +1,15 @@
+from rest_framework_simplejwt.tokens import RefreshToken
+
+
+class ClaimsRefreshToken(RefreshToken):
+    """Refresh token that also carries the user's ``username`` and
+    ``role``. Access tokens minted from it (at login and on refresh)
+    inherit the claims, so the notification socket can authorize a
+    connection without loading the user."""
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        token["username"] = user.username
+        token["role"] = user.role
+        return token
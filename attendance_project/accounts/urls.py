@@ -1,11 +1,18 @@
 from django.urls import path
-from .views import CustomTokenObtainPairView, test_view, ChangePasswordView
-from rest_framework_simplejwt.views import TokenRefreshView
+from .views import (
+    CustomTokenObtainPairView,
+    ThrottledTokenRefreshView,
+    LoginMetricsView,
+    test_view,
+    ChangePasswordView,
+)
 
 urlpatterns = [
     path("login/", CustomTokenObtainPairView.as_view(), name="token_obtain_pair"),
     
-    path("token/refresh/", TokenRefreshView.as_view(), name="token_refresh"),
+    path("token/refresh/", ThrottledTokenRefreshView.as_view(), name="token_refresh"),
+    
+    path("login/metrics/", LoginMetricsView.as_view(), name="login-metrics"),
     
     path("change-password/", ChangePasswordView.as_view(), name="change-password"),
     
@@ -1,14 +1,31 @@
 from rest_framework import status
 from rest_framework.response import Response
 from rest_framework.views import APIView
-from rest_framework.permissions import AllowAny, IsAuthenticated
+from rest_framework.permissions import AllowAny, IsAdminUser, IsAuthenticated
 from rest_framework.decorators import api_view
 from .serializers import CustomTokenObtainPairSerializer, ChangePasswordSerializer
-from rest_framework_simplejwt.views import TokenObtainPairView
+from .throttling import (
+    LoginIdentifierThrottle,
+    LoginIPThrottle,
+    RefreshIPThrottle,
+    RefreshUserThrottle,
+    login_metrics,
+)
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     permission_classes = [AllowAny]
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = [LoginIPThrottle, LoginIdentifierThrottle]
+
+class ThrottledTokenRefreshView(TokenRefreshView):
+    throttle_classes = [RefreshIPThrottle, RefreshUserThrottle]
+
+class LoginMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(login_metrics())
 
 class ChangePasswordView(APIView):
     permission_classes = [IsAuthenticated]
@@ -22,7 +39,7 @@ class ChangePasswordView(APIView):
             return Response({"detail": "Old password is incorrect."}, status=400)
 
         user.set_password(serializer.validated_data["new_password"])
-        user.save()
+        user.save(update_fields=["password"])
         return Response({"detail": "Password changed successfully."}, status=200)
 
 @api_view(["GET"])
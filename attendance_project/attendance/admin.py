@@ -1,3 +1,31 @@
 from django.contrib import admin
+from .models import ArchivedAttendanceRecord, AttendanceRecord, AttendanceSummary
 
-# Register your models here.
+@admin.register(AttendanceRecord)
+class AttendanceRecordAdmin(admin.ModelAdmin):
+    list_display = ('student', 'course', 'date', 'status')
+    list_filter = ('status', 'course')
+    date_hierarchy = 'date'
+    list_select_related = ('student__student', 'course')
+    raw_id_fields = ('student',)
+
+@admin.register(ArchivedAttendanceRecord)
+class ArchivedAttendanceRecordAdmin(admin.ModelAdmin):
+    list_display = ('student', 'course', 'date', 'status', 'archived_at')
+    list_filter = ('status', 'course')
+    date_hierarchy = 'date'
+    list_select_related = ('student__student', 'course')
+    readonly_fields = ('student', 'course', 'date', 'time', 'status', 'notes', 'archived_at')
+
+    def has_add_permission(self, request):
+        return False
+
+@admin.register(AttendanceSummary)
+class AttendanceSummaryAdmin(admin.ModelAdmin):
+    list_display = ('student', 'course', 'present_count', 'late_count', 'absent_count', 'attendance_rate', 'updated_at')
+    list_filter = ('course',)
+    list_select_related = ('student__student', 'course')
+    readonly_fields = ('student', 'course', 'present_count', 'late_count', 'absent_count', 'score', 'updated_at')
+
+    def has_add_permission(self, request):
+        return False
@@ -2,4 +2,7 @@ from django.apps import AppConfig
 
 
 class AttendanceConfig(AppConfig):
-    name = 'attendance'
\ No newline at end of file
+    name = 'attendance'
+
+    def ready(self):
+        import attendance.signals
@@ -0,0 +1,81 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+
+HITS_KEY = "attendance:cache:hits"
+MISSES_KEY = "attendance:cache:misses"
+
+
+def _version_key(course_id):
+    return f"attendance:course:{course_id}:version"
+
+
+def _increment(key):
+    try:
+        return cache.incr(key)
+    except ValueError:
+        if cache.add(key, 1, timeout=None):
+            return 1
+        return cache.incr(key)
+
+
+def course_version(course_id):
+    """Current cache version of a course.
+
+    A missing key (first use or eviction) is seeded from the clock rather
+    than 1, so a reset counter can never land on a version that older,
+    now stale entries were stored under.
+    """
+    key = _version_key(course_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_course_version(course_id):
+    key = _version_key(course_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, time.time_ns(), timeout=None)
+
+
+def invalidate_course(course_id):
+    """Invalidate every cached response of a course once the surrounding
+    transaction commits, so no reader can cache pre-commit data under the
+    new version."""
+    transaction.on_commit(lambda: bump_course_version(course_id))
+
+
+def cached_response_data(scope, course_id, request, build):
+    """Return ``build()`` through the cache, keyed by ``scope``, the course
+    version and the request's query string."""
+    params = sorted(request.query_params.lists())
+    digest = hashlib.md5(repr(params).encode()).hexdigest()
+    key = f"attendance:{scope}:{course_id}:v{course_version(course_id)}:{digest}"
+
+    data = cache.get(key)
+    if data is not None:
+        _increment(HITS_KEY)
+        return data
+
+    _increment(MISSES_KEY)
+    data = build()
+    cache.set(key, data, settings.ATTENDANCE_CACHE_TIMEOUT)
+    return data
+
+
+def cache_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / total, 4) if total else 0.0,
+    }
@@ -0,0 +1,78 @@
+import csv
+import json
+import zlib
+
+from django.db.models import Q
+
+from .models import AttendanceRecord
+
+EXPORT_FIELDS = [
+    "date",
+    "time",
+    "student_id",
+    "student__student__username",
+    "student__student__first_name",
+    "student__student__last_name",
+    "status",
+    "notes",
+]
+EXPORT_HEADER = ["date", "time", "student_id", "username", "first_name", "last_name", "status", "notes"]
+
+
+class Echo:
+    """File-like object whose write() hands the value straight back, so
+    csv.writer can be used to format one row at a time."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(course, chunk_size=2000):
+    """Yield the course records as tuples ordered by (date, id).
+
+    Rows are read in keyset batches of ``chunk_size`` instead of a single
+    cursor: MySQLdb buffers a whole result set client-side even for
+    ``.iterator()``, so this is what keeps memory flat on every backend.
+    """
+    queryset = AttendanceRecord.objects.filter(course=course).order_by("date", "id")
+    last = None
+    while True:
+        batch = queryset
+        if last is not None:
+            batch = batch.filter(Q(date__gt=last[0]) | Q(date=last[0], id__gt=last[1]))
+        rows = list(batch.values_list("id", *EXPORT_FIELDS)[:chunk_size])
+        for row in rows:
+            yield row[1:]
+        if len(rows) < chunk_size:
+            return
+        last = (rows[-1][1], rows[-1][0])
+
+
+def csv_lines(rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(EXPORT_HEADER)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def ndjson_lines(rows):
+    for row in rows:
+        record = dict(zip(EXPORT_HEADER, row))
+        record["date"] = record["date"].isoformat()
+        record["time"] = record["time"].isoformat() if record["time"] else None
+        yield json.dumps(record) + "\n"
+
+
+def gzip_stream(chunks):
+    compressor = zlib.compressobj(wbits=16 + zlib.MAX_WBITS)
+    for chunk in chunks:
+        data = compressor.compress(chunk.encode())
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+EXPORT_FORMATS = {
+    "csv": (csv_lines, "text/csv", "csv"),
+    "ndjson": (ndjson_lines, "application/x-ndjson", "ndjson"),
+}
@@ -0,0 +1,65 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from attendance.models import AttendanceRecord
+from attendance.services import AttendanceService
+
+
+class Command(BaseCommand):
+    help = (
+        "Move AttendanceRecord rows of finished terms or courses into the "
+        "ArchivedAttendanceRecord table, one chunk per transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--before", type=date.fromisoformat,
+            help="Archive records dated before this day (YYYY-MM-DD), e.g. the start of the current term.",
+        )
+        parser.add_argument(
+            "--course", type=int, action="append", dest="courses",
+            help="Archive the records of this (finished) course id. Can be repeated.",
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000,
+            help="Number of records moved per transaction (default: 1000).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only report how many records would be archived.",
+        )
+
+    def handle(self, *args, **options):
+        if not options["before"] and not options["courses"]:
+            raise CommandError("Pass --before, --course or both.")
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+
+        records = AttendanceRecord.objects.all()
+        if options["before"]:
+            records = records.filter(date__lt=options["before"])
+        if options["courses"]:
+            records = records.filter(course_id__in=options["courses"])
+
+        if options["dry_run"]:
+            self.stdout.write(f"{records.count()} attendance records would be archived.")
+            return
+
+        archived = 0
+        last_id = 0
+        while True:
+            ids = list(
+                records.filter(id__gt=last_id)
+                .order_by("id")
+                .values_list("id", flat=True)[:options["chunk_size"]]
+            )
+            if not ids:
+                break
+            with transaction.atomic():
+                archived += AttendanceService.archive_records(ids)
+            last_id = ids[-1]
+            self.stdout.write(f"Archived {archived} records...")
+
+        self.stdout.write(self.style.SUCCESS(f"Archived {archived} attendance records."))
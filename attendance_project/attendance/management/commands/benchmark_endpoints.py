@@ -0,0 +1,304 @@
+import itertools
+import json
+import statistics
+import subprocess
+import time
+import tracemalloc
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from rest_framework.test import APIClient
+from accounts.authentication import invalidate_user
+from accounts.models import User
+from accounts.tokens import ClaimsRefreshToken
+
+from attendance.cache import invalidate_course
+from notifications.models import Notification
+from students.models import Course, StudentData
+
+PASSWORD = "benchmark-endpoints-pass"
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def consume(response):
+    if getattr(response, "streaming", False):
+        for _ in response.streaming_content:
+            pass
+    return response
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark the API endpoints and the notification WebSocket against "
+        "the current database (see generate_dataset) and print p50/p95 "
+        "latency, query count and peak memory as JSON. Every endpoint is "
+        "covered except roster provisioning, which has the provision_roster "
+        "command. The benchmark runs in a transaction that is rolled back, "
+        "so the temporary users it needs and whatever --writes changes are "
+        "discarded; on-commit work such as socket broadcasts is not timed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--iterations", type=int, default=20)
+        parser.add_argument("--course", type=int, help="Course to benchmark (default: the largest one).")
+        parser.add_argument("--output", help="Write the JSON report to this file as well.")
+        parser.add_argument(
+            "--cold", action="store_true",
+            help="Clear the cache before every request to measure uncached latency.",
+        )
+        parser.add_argument(
+            "--writes", action="store_true",
+            help="Also benchmark endpoints that write (attendance, courses, enrollment, "
+                 "passwords, notifications). Their changes are rolled back.",
+        )
+        parser.add_argument(
+            "--in-memory-channel-layer", action="store_true",
+            help="Benchmark the WebSocket against InMemoryChannelLayer instead of the configured one.",
+        )
+
+    def handle(self, *args, **options):
+        course = self.pick_course(options["course"])
+        student_data = course.students.select_related("student").order_by("id").first()
+        if student_data is None or course.teacher is None:
+            raise CommandError("The benchmark course needs a teacher and at least one student.")
+        teacher, student = course.teacher, student_data.student
+
+        self.iterations = options["iterations"]
+        self.cold = options["cold"]
+        results = {}
+
+        # Login and refresh run over and over from one client, so lift the
+        # login throttles.
+        unthrottled = {scope: (10 ** 9, 1) for scope in settings.LOGIN_THROTTLE_RATES}
+        with transaction.atomic(), override_settings(
+            ALLOWED_HOSTS=["testserver"], LOGIN_THROTTLE_RATES=unthrottled
+        ):
+            admin = User.objects.create_superuser(
+                email="benchmark.admin@example.com", password=PASSWORD, first_name="Benchmark"
+            )
+            for name, user, method, url, data in self.endpoints(course, student_data, admin, options["writes"]):
+                results[name] = self.measure(user, method, url, data)
+                self.stderr.write(f"{name}: p50 {results[name]['p50_ms']} ms")
+            transaction.set_rollback(True)
+
+        # Drop what was cached from the rolled-back rows.
+        invalidate_course(course.id)
+        invalidate_user(admin.pk)
+
+        # The consumer queries from worker threads, outside the transaction.
+        layer = {"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}}
+        if options["in_memory_channel_layer"]:
+            with override_settings(CHANNEL_LAYERS=layer):
+                results["ws_notifications"] = self.measure_websocket(student)
+        else:
+            results["ws_notifications"] = self.measure_websocket(student)
+
+        report = {
+            "commit": self.commit(),
+            "database": connection.vendor,
+            "course_id": course.id,
+            "course_students": course.students.count(),
+            "course_records": course.attendance_records.count(),
+            "iterations": self.iterations,
+            "cold_cache": self.cold,
+            "endpoints": results,
+        }
+        payload = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                fh.write(payload)
+        self.stdout.write(payload)
+
+    def pick_course(self, course_id):
+        courses = Course.objects.select_related("teacher")
+        if course_id:
+            return courses.get(id=course_id)
+        course = courses.annotate(size=Count("students")).order_by("-size", "id").first()
+        if course is None:
+            raise CommandError("No courses found; run generate_dataset first.")
+        return course
+
+    def endpoints(self, course, student_data, admin, writes):
+        teacher, student = course.teacher, student_data.student
+        reads = [
+            ("accounts.login", None, "post", reverse("token_obtain_pair"),
+             {"identifier": admin.email, "password": PASSWORD}),
+            ("accounts.token_refresh", None, "post", reverse("token_refresh"),
+             {"refresh": str(ClaimsRefreshToken.for_user(student))}),
+            ("accounts.login_metrics", admin, "get", reverse("login-metrics"), None),
+            ("students.dashboard", student, "get", reverse("student_dashboard"), None),
+            ("students.teacher_dashboard", teacher, "get", reverse("teacher_dashboard"), None),
+            ("students.course_list", teacher, "get", reverse("course_list_create"), None),
+            ("students.course_detail", teacher, "get", reverse("course_detail", kwargs={"pk": course.id}), None),
+            ("students.course_students", teacher, "get", reverse("course_students", kwargs={"pk": course.id}), None),
+            ("attendance.take_list", teacher, "get", reverse("take_attendance-list"), None),
+            ("attendance.stats", teacher, "get", reverse("attendance-stats", kwargs={"course_id": course.id}), None),
+            ("attendance.stats_summary", teacher, "get",
+             reverse("attendance-stats", kwargs={"course_id": course.id}) + "?include_timeline=false", None),
+            ("attendance.student", student, "get", reverse("student-attendance", kwargs={"course_id": course.id}), None),
+            ("attendance.timeline", teacher, "get", reverse("attendance-timeline", kwargs={"course_id": course.id}), None),
+            ("attendance.export_csv", teacher, "get", reverse("attendance-export", kwargs={"course_id": course.id}), None),
+            ("attendance.cache_stats", admin, "get", reverse("attendance-cache-stats"), None),
+            ("notifications.list", student, "get", reverse("notifications-list"), None),
+            ("notifications.unread_count", student, "get", reverse("notifications-unread-count"), None),
+            ("notifications.sent", teacher, "get", reverse("notifications-sent"), None),
+            ("notifications.outbox_metrics", admin, "get", reverse("notifications-outbox-metrics"), None),
+        ]
+        if not writes:
+            return reads
+
+        records = [
+            {"student_id": student_id, "status": "P"}
+            for student_id in course.students.values_list("id", flat=True)
+        ]
+
+        # A fresh student enrolls again and again: drop the enrollment
+        # before each request.
+        newcomer = User.objects.create_user(
+            email="benchmark.student@example.com", password=PASSWORD, first_name="Benchmark"
+        )
+        newcomer_data = StudentData.objects.create(student=newcomer)
+        enrollments = StudentData.courses.through.objects.filter(studentdata=newcomer_data, course=course)
+
+        def enroll():
+            enrollments.delete()
+            return {"course_id": course.id}
+
+        # ... and flips between two passwords.
+        passwords = itertools.cycle([(PASSWORD, PASSWORD + "-2"), (PASSWORD + "-2", PASSWORD)])
+
+        def change_password():
+            old, new = next(passwords)
+            return {"old_password": old, "new_password": new}
+
+        notification = Notification.objects.create(
+            user=student, sender=teacher, title="Benchmark", message="Benchmark notification"
+        )
+        return reads + [
+            ("attendance.take", teacher, "post", reverse("take_attendance-list"),
+             {"course_id": course.id, "records": records}),
+            ("students.course_create", teacher, "post", reverse("course_list_create"),
+             {"title": "Benchmark course", "teacher_id": teacher.id}),
+            ("students.enroll", newcomer, "post", reverse("enroll_student"), enroll),
+            ("accounts.change_password", newcomer, "post", reverse("change-password"), change_password),
+            ("notifications.mark_read", student, "post",
+             reverse("notification-mark-read", kwargs={"pk": notification.pk}), {}),
+            ("notifications.mark_all_read", student, "post", reverse("notifications-mark-all-read"), {}),
+            ("notifications.send_course", teacher, "post", reverse("notification-send-course"),
+             {"course_id": course.id, "title": "Benchmark", "message": "Benchmark broadcast"}),
+        ]
+
+    def client_for(self, user):
+        client = APIClient()
+        if user is not None:
+            token = ClaimsRefreshToken.for_user(user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        return client
+
+    def measure(self, user, method, url, data):
+        """Time ``method`` on ``url``. ``data`` may be a callable, run
+        untimed before every request, that returns the payload."""
+        client = self.client_for(user)
+
+        def prepare():
+            if self.cold:
+                cache.clear()
+            return data() if callable(data) else data
+
+        def call(payload):
+            if method == "get":
+                return consume(client.get(url))
+            return consume(getattr(client, method)(url, payload, format="json"))
+
+        call(prepare())  # warm up imports, connections and the cache
+
+        timings = []
+        queries = []
+        status_code = None
+        for _ in range(self.iterations):
+            payload = prepare()
+            with CaptureQueriesContext(connection) as ctx:
+                start = time.perf_counter()
+                response = call(payload)
+                timings.append((time.perf_counter() - start) * 1000)
+            queries.append(len(ctx.captured_queries))
+            status_code = response.status_code
+
+        payload = prepare()
+        tracemalloc.start()
+        call(payload)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return {
+            "status": status_code,
+            "p50_ms": round(statistics.median(timings), 2),
+            "p95_ms": round(percentile(timings, 95), 2),
+            "mean_ms": round(statistics.fmean(timings), 2),
+            "queries": max(queries),
+            "peak_kb": round(peak / 1024, 1),
+        }
+
+    def measure_websocket(self, user):
+        from channels.layers import get_channel_layer
+        from channels.testing import WebsocketCommunicator
+        from notifications.routing import websocket_urlpatterns
+        from channels.routing import URLRouter
+
+        application = URLRouter(websocket_urlpatterns)
+        token = str(ClaimsRefreshToken.for_user(user).access_token)
+
+        async def session():
+            communicator = WebsocketCommunicator(application, f"/ws/notifications/?token={token}")
+            start = time.perf_counter()
+            connected, _ = await communicator.connect()
+            await communicator.receive_json_from(timeout=5)
+            connect_ms = (time.perf_counter() - start) * 1000
+            if not connected:
+                raise CommandError("WebSocket connection was rejected.")
+
+            start = time.perf_counter()
+            await get_channel_layer().group_send(
+                f"user_{user.id}",
+                {"type": "send_notification", "notification": {"title": "Benchmark"}},
+            )
+            await communicator.receive_json_from(timeout=5)
+            deliver_ms = (time.perf_counter() - start) * 1000
+            await communicator.disconnect()
+            return connect_ms, deliver_ms
+
+        connects, deliveries = [], []
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(self.iterations):
+                connect_ms, deliver_ms = async_to_sync(session)()
+                connects.append(connect_ms)
+                deliveries.append(deliver_ms)
+
+        return {
+            "connect_p50_ms": round(statistics.median(connects), 2),
+            "connect_p95_ms": round(percentile(connects, 95), 2),
+            "deliver_p50_ms": round(statistics.median(deliveries), 2),
+            "deliver_p95_ms": round(percentile(deliveries, 95), 2),
+            "connects_per_second": round(1000 / statistics.fmean(connects), 1),
+            "queries": len(ctx.captured_queries) // self.iterations,
+        }
+
+    def commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"],
+                capture_output=True, text=True, check=True,
+            ).stdout.strip()
+        except (OSError, subprocess.CalledProcessError):
+            return None
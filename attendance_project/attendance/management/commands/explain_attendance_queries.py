@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from attendance.query_plans import explain, full_scans, hot_queries
+
+
+class Command(BaseCommand):
+    help = "Run EXPLAIN on the hot attendance queries and flag full table scans."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--course", type=int, default=1, help="Course id used in the queries.")
+        parser.add_argument("--student", type=int, default=1, help="StudentData id used in the queries.")
+        parser.add_argument("--teacher", type=int, default=1, help="Teacher user id used in the queries.")
+        parser.add_argument(
+            "--fail-on-scan", action="store_true",
+            help="Exit with an error if any hot query scans a whole attendance table.",
+        )
+
+    def handle(self, *args, **options):
+        queries = hot_queries(options["course"], options["student"], options["teacher"])
+        offenders = []
+
+        self.stdout.write(f"Database vendor: {connection.vendor}")
+        for name, queryset in queries.items():
+            plan = explain(queryset)
+            scans = full_scans(plan)
+            self.stdout.write(f"\n== {name}")
+            self.stdout.write(plan)
+            if scans:
+                offenders.append(name)
+                self.stdout.write(self.style.WARNING(f"full scan on: {', '.join(scans)}"))
+
+        if offenders and options["fail_on_scan"]:
+            raise CommandError(f"Full table scans in: {', '.join(offenders)}")
+        if offenders:
+            self.stdout.write(self.style.WARNING(f"\nFull table scans in: {', '.join(offenders)}"))
+        else:
+            self.stdout.write(self.style.SUCCESS("\nAll hot attendance queries use an index."))
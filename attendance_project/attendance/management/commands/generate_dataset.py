@@ -0,0 +1,157 @@
+import random
+from datetime import date, timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from accounts.models import User
+from students.models import Course, StudentData
+from attendance.models import AttendanceRecord
+from attendance.services import AttendanceService
+from notifications.models import Notification, NotificationMessage
+
+BATCH_SIZE = 2000
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic institution (teachers, courses, students, "
+        "attendance history and notifications) with bulk inserts, for "
+        "benchmarking at production scale."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--teachers", type=int, default=20)
+        parser.add_argument("--courses", type=int, default=60)
+        parser.add_argument("--students", type=int, default=2000)
+        parser.add_argument("--days", type=int, default=120, help="Lecture days of attendance per course.")
+        parser.add_argument("--courses-per-student", type=int, default=4)
+        parser.add_argument("--notifications-per-student", type=int, default=20)
+        parser.add_argument("--password", default="benchpass123", help="Password set on every generated user.")
+        parser.add_argument("--prefix", default="bench", help="Prefix of generated usernames and emails.")
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        prefix = options["prefix"]
+        if User.objects.filter(username__startswith=f"{prefix}_").exists():
+            raise CommandError(f"Users with the prefix '{prefix}_' already exist; pick another --prefix.")
+        if options["courses"] and not options["teachers"]:
+            raise CommandError("--courses needs at least one teacher.")
+
+        rng = random.Random(options["seed"])
+        password = make_password(options["password"])
+
+        with transaction.atomic():
+            teachers = self.create_users(prefix, "TCR", options["teachers"], password)
+            Course.objects.bulk_create(
+                [
+                    Course(
+                        title=f"{prefix.title()} Course {i}",
+                        teacher=teachers[i % len(teachers)],
+                        max_students=options["students"],
+                    )
+                    for i in range(options["courses"])
+                ],
+                batch_size=BATCH_SIZE,
+            )
+            courses = list(
+                Course.objects.filter(teacher__in=teachers)
+                .select_related("teacher")
+                .order_by("id")
+            )
+            students = self.create_users(prefix, "STU", options["students"], password)
+            StudentData.objects.bulk_create(
+                [StudentData(student=user) for user in students], batch_size=BATCH_SIZE
+            )
+            student_data = list(
+                StudentData.objects.filter(student__username__startswith=f"{prefix}_student")
+                .order_by("student_id")
+            )
+        self.stdout.write(
+            f"Created {len(teachers)} teachers, {len(courses)} courses, {len(student_data)} students."
+        )
+
+        per_student = min(options["courses_per_student"], len(courses))
+        roster = {course.id: [] for course in courses}
+        members = {course.id: [] for course in courses}
+        Enrollment = StudentData.courses.through
+        enrollments = []
+        for data in student_data:
+            for course in rng.sample(courses, per_student):
+                roster[course.id].append(data.id)
+                members[course.id].append(data.student_id)
+                enrollments.append(Enrollment(studentdata_id=data.id, course_id=course.id))
+        Enrollment.objects.bulk_create(enrollments, batch_size=BATCH_SIZE)
+        self.stdout.write(f"Created {len(enrollments)} enrollments.")
+
+        records = 0
+        start = date.today() - timedelta(days=options["days"])
+        days = [start + timedelta(days=offset) for offset in range(options["days"])]
+        for course_id, student_ids in roster.items():
+            batch = [
+                AttendanceRecord(
+                    student_id=student_id,
+                    course_id=course_id,
+                    date=day,
+                    status=rng.choices("PLA", weights=(80, 10, 10))[0],
+                )
+                for day in days
+                for student_id in student_ids
+            ]
+            with transaction.atomic():
+                AttendanceRecord.objects.bulk_create(batch, batch_size=BATCH_SIZE)
+                AttendanceService.refresh_summaries(course_id, student_ids)
+            records += len(batch)
+        self.stdout.write(f"Created {records} attendance records.")
+
+        # Each course gets enough broadcasts for every enrolled student to
+        # receive about --notifications-per-student of them.
+        broadcasts = -(-options["notifications_per_student"] // max(per_student, 1))
+        receipts = []
+        created = 0
+        for course in courses:
+            recipients = members[course.id]
+            for i in range(broadcasts if recipients else 0):
+                content = NotificationMessage.objects.create(
+                    sender=course.teacher,
+                    title="Announcement",
+                    message=f"Synthetic announcement {i} for {course.title}.",
+                    course=course,
+                )
+                receipts.extend(
+                    Notification(user_id=user_id, content=content, is_read=rng.random() < 0.7)
+                    for user_id in recipients
+                )
+            if len(receipts) >= BATCH_SIZE:
+                Notification.objects.bulk_create(receipts, batch_size=BATCH_SIZE)
+                created += len(receipts)
+                receipts = []
+        if receipts:
+            Notification.objects.bulk_create(receipts, batch_size=BATCH_SIZE)
+            created += len(receipts)
+        self.stdout.write(f"Created {created} notifications.")
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Dataset ready. Every generated account uses the password '{options['password']}'."
+        ))
+
+    def create_users(self, prefix, role, count, password):
+        """Bulk insert users and read them back, since MySQL does not
+        return primary keys from bulk_create()."""
+        label = "teacher" if role == "TCR" else "student"
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"{prefix}_{label}{i}",
+                    email=f"{prefix}.{label}{i}@example.com",
+                    first_name=f"{label.title()}{i}",
+                    last_name=prefix.title(),
+                    role=role,
+                    password=password,
+                )
+                for i in range(count)
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        return list(User.objects.filter(username__startswith=f"{prefix}_{label}").order_by("id"))
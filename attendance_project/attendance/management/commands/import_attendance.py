@@ -0,0 +1,155 @@
+import csv
+import json
+import os
+from datetime import date, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from students.models import Course, StudentData
+from attendance.models import AttendanceRecord
+from attendance.services import AttendanceService
+
+STATUS_LOOKUP = {}
+for code, label in AttendanceRecord.STATUS_CHOICES:
+    STATUS_LOOKUP[code.lower()] = code
+    STATUS_LOOKUP[label.lower()] = code
+
+
+class Command(BaseCommand):
+    help = (
+        "Import historical attendance from a CSV file with the columns "
+        "student (username or email), course_id, date, status and optional "
+        "time and notes. Rows are written in chunked transactions and the "
+        "import can be resumed from its checkpoint after a failure."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path", help="Path of the CSV file to import.")
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000,
+            help="Rows written per transaction (default: 1000).",
+        )
+        parser.add_argument(
+            "--checkpoint",
+            help="Checkpoint file (default: <csv_path>.checkpoint).",
+        )
+        parser.add_argument(
+            "--resume", action="store_true",
+            help="Skip the rows already committed according to the checkpoint.",
+        )
+
+    def handle(self, *args, **options):
+        csv_path = self.csv_path = options["csv_path"]
+        chunk_size = options["chunk_size"]
+        checkpoint_path = options["checkpoint"] or f"{csv_path}.checkpoint"
+
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+        if not os.path.exists(csv_path):
+            raise CommandError(f"{csv_path} does not exist.")
+
+        done = 0
+        if options["resume"] and os.path.exists(checkpoint_path):
+            with open(checkpoint_path) as fh:
+                checkpoint = json.load(fh)
+            if checkpoint.get("file") != os.path.abspath(csv_path):
+                raise CommandError(f"{checkpoint_path} belongs to {checkpoint.get('file')}.")
+            done = checkpoint["rows"]
+            self.stdout.write(f"Resuming after row {done}.")
+
+        # Walk newest first so a user with several StudentData rows resolves
+        # to the oldest one.
+        students = {}
+        for student_id, username, email in StudentData.objects.order_by("-id") \
+                .values_list("id", "student__username", "student__email").iterator():
+            students[username.lower()] = student_id
+            students[email.lower()] = student_id
+        course_ids = set(Course.objects.values_list("id", flat=True))
+
+        imported = rejected = 0
+        row_number = 0
+        chunk = {}
+
+        with open(csv_path, newline="", encoding="utf-8-sig") as fh:
+            reader = csv.DictReader(fh)
+            missing = {"student", "course_id", "date", "status"} - set(reader.fieldnames or [])
+            if missing:
+                raise CommandError(f"Missing CSV columns: {', '.join(sorted(missing))}.")
+
+            for row in reader:
+                row_number += 1
+                if row_number <= done:
+                    continue
+
+                try:
+                    record = self.build_record(row, students, course_ids)
+                except ValueError as exc:
+                    rejected += 1
+                    self.stderr.write(f"Row {row_number}: {exc}")
+                else:
+                    chunk[(record.student_id, record.course_id, record.date)] = record
+
+                if row_number - done >= chunk_size:
+                    imported += self.flush(chunk, row_number, checkpoint_path)
+                    chunk = {}
+                    done = row_number
+
+        if row_number > done:
+            imported += self.flush(chunk, row_number, checkpoint_path)
+
+        if os.path.exists(checkpoint_path):
+            os.remove(checkpoint_path)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {imported} attendance records, rejected {rejected} rows."
+        ))
+
+    def build_record(self, row, students, course_ids):
+        student_id = students.get((row["student"] or "").strip().lower())
+        if student_id is None:
+            raise ValueError(f"unknown student {row['student']!r}")
+
+        try:
+            course_id = int(row["course_id"])
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid course_id {row['course_id']!r}")
+        if course_id not in course_ids:
+            raise ValueError(f"unknown course {course_id}")
+
+        status_value = STATUS_LOOKUP.get((row["status"] or "").strip().lower())
+        if status_value is None:
+            raise ValueError(f"invalid status {row['status']!r}")
+
+        try:
+            record_date = date.fromisoformat((row["date"] or "").strip())
+        except ValueError:
+            raise ValueError(f"invalid date {row['date']!r}")
+
+        record = AttendanceRecord(
+            student_id=student_id,
+            course_id=course_id,
+            date=record_date,
+            status=status_value,
+            notes=row.get("notes") or "",
+        )
+        if row.get("time"):
+            try:
+                record.time = time.fromisoformat(row["time"].strip())
+            except ValueError:
+                raise ValueError(f"invalid time {row['time']!r}")
+        return record
+
+    def flush(self, chunk, row_number, checkpoint_path):
+        records = list(chunk.values())
+        with transaction.atomic():
+            if records:
+                AttendanceService.write_records(records, update_fields=("status", "notes", "time"))
+
+        tmp_path = f"{checkpoint_path}.tmp"
+        with open(tmp_path, "w") as fh:
+            json.dump({"file": os.path.abspath(self.csv_path), "rows": row_number}, fh)
+        os.replace(tmp_path, checkpoint_path)
+
+        self.stdout.write(f"Committed rows up to {row_number}.")
+        return len(records)
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from students.models import Course
+from attendance.models import ArchivedAttendanceRecord, AttendanceRecord, AttendanceSummary
+from attendance.services import AttendanceService
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild AttendanceSummary rows from live and archived attendance "
+        "records, one chunk of students at a time."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=500,
+            help="Number of students recomputed per transaction (default: 500).",
+        )
+        parser.add_argument(
+            "--course", type=int, action="append", dest="courses",
+            help="Only rebuild this course id. Can be repeated.",
+        )
+
+    def handle(self, *args, **options):
+        chunk_size = options["chunk_size"]
+        course_ids = Course.objects.order_by("id").values_list("id", flat=True)
+        if options["courses"]:
+            course_ids = course_ids.filter(id__in=options["courses"])
+
+        rebuilt = 0
+        for course_id in course_ids.iterator():
+            live = AttendanceRecord.objects.filter(course_id=course_id)
+            archived = ArchivedAttendanceRecord.objects.filter(course_id=course_id)
+            student_ids = sorted(
+                set(live.values_list("student_id", flat=True).distinct())
+                | set(archived.values_list("student_id", flat=True).distinct())
+            )
+
+            for start in range(0, len(student_ids), chunk_size):
+                with transaction.atomic():
+                    AttendanceService.refresh_summaries(
+                        course_id, student_ids[start:start + chunk_size]
+                    )
+
+            stale, _ = AttendanceSummary.objects.filter(course_id=course_id) \
+                .exclude(student_id__in=live.values("student_id")) \
+                .exclude(student_id__in=archived.values("student_id")) \
+                .delete()
+
+            rebuilt += len(student_ids)
+            self.stdout.write(
+                f"Course {course_id}: {len(student_ids)} summaries rebuilt, {stale} stale removed."
+            )
+
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rebuilt} attendance summaries."))
@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 11:52
+
+import datetime
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0004_alter_attendancerecord_date'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='date',
+            field=models.DateField(default=datetime.date.today),
+        ),
+    ]
@@ -0,0 +1,42 @@
+from django.db import migrations
+from django.db.models import Count, Q
+
+BATCH_SIZE = 1000
+
+
+def populate_summaries(apps, schema_editor):
+    AttendanceRecord = apps.get_model("attendance", "AttendanceRecord")
+    AttendanceSummary = apps.get_model("attendance", "AttendanceSummary")
+
+    rows = AttendanceRecord.objects.values("student_id", "course_id").annotate(
+        present=Count("id", filter=Q(status="P")),
+        late=Count("id", filter=Q(status="L")),
+        absent=Count("id", filter=Q(status="A")),
+    ).order_by()
+
+    batch = []
+    for row in rows.iterator(chunk_size=BATCH_SIZE):
+        batch.append(AttendanceSummary(
+            student_id=row["student_id"],
+            course_id=row["course_id"],
+            present_count=row["present"],
+            late_count=row["late"],
+            absent_count=row["absent"],
+            score=row["present"] * 1.0 + row["late"] * 0.7,
+        ))
+        if len(batch) >= BATCH_SIZE:
+            AttendanceSummary.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        AttendanceSummary.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0006_attendancesummary'),
+    ]
+
+    operations = [
+        migrations.RunPython(populate_summaries, migrations.RunPython.noop),
+    ]
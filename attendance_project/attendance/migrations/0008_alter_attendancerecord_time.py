@@ -0,0 +1,19 @@
+# Generated by Django 6.0 on 2026-10-18 12:42
+
+import attendance.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0007_populate_attendancesummary'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='time',
+            field=models.TimeField(default=attendance.models.current_time),
+        ),
+    ]
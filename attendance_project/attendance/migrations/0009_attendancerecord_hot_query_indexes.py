@@ -0,0 +1,30 @@
+# Generated by Django 6.0 on 2026-10-18 12:44
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0008_alter_attendancerecord_time'),
+        ('students', '0007_alter_studentdata_courses'),
+    ]
+
+    # The composite indexes are created before the plain course_id index is
+    # dropped: MySQL refuses to drop the only index backing a foreign key.
+    operations = [
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['course', 'date'], name='attendance_course_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='attendancerecord',
+            index=models.Index(fields=['course', 'student', 'date', 'status'], name='attendance_course_student_idx'),
+        ),
+        migrations.AlterField(
+            model_name='attendancerecord',
+            name='course',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='attendance_records', to='students.course'),
+        ),
+    ]
@@ -0,0 +1,32 @@
+# Generated by Django 6.0 on 2026-10-18 14:05
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('attendance', '0009_attendancerecord_hot_query_indexes'),
+        ('students', '0007_alter_studentdata_courses'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedAttendanceRecord',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('time', models.TimeField()),
+                ('status', models.CharField(choices=[('P', 'Present'), ('A', 'Absent'), ('L', 'Late')], max_length=1)),
+                ('notes', models.TextField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('course', models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance_records', to='students.course')),
+                ('student', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='archived_attendance_records', to='students.studentdata')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['course', 'student', 'date'], name='archive_course_student_idx')],
+                'unique_together': {('student', 'course', 'date')},
+            },
+        ),
+    ]
@@ -1,12 +1,19 @@
+from datetime import date as date_cls, datetime
+
 from django.db import models
 from students.models import StudentData, Course
 
+
+def current_time():
+    return datetime.now().time()
+
+
 class AttendanceRecord(models.Model):
     student = models.ForeignKey(StudentData, on_delete=models.CASCADE, related_name="attendance_records")
-    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="attendance_records")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="attendance_records", db_index=False)
     
-    date = models.DateField(auto_now_add=True)
-    time = models.TimeField(auto_now_add=True)
+    date = models.DateField(default=date_cls.today)
+    time = models.TimeField(default=current_time)
 
     STATUS_CHOICES = [
         ('P', 'Present'),
@@ -18,6 +25,77 @@ class AttendanceRecord(models.Model):
 
     class Meta:
         unique_together = ("student", "course", "date")
+        # Both indexes lead with course, so they also replace the plain
+        # course_id FK index. (student, course, date) is served by the
+        # unique constraint above.
+        indexes = [
+            models.Index(fields=["course", "date"], name="attendance_course_date_idx"),
+            models.Index(fields=["course", "student", "date", "status"], name="attendance_course_student_idx"),
+        ]
 
     def __str__(self):
         return f"{self.student} - {self.course} - {self.date} - {self.status}"
+
+
+class ArchivedAttendanceRecord(models.Model):
+    """Cold copy of an ``AttendanceRecord`` from a finished term or course,
+    moved out by the ``archive_attendance`` command so the live table and
+    its indexes only hold current history."""
+
+    student = models.ForeignKey(StudentData, on_delete=models.CASCADE, related_name="archived_attendance_records")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="archived_attendance_records", db_index=False)
+
+    date = models.DateField()
+    time = models.TimeField()
+    status = models.CharField(max_length=1, choices=AttendanceRecord.STATUS_CHOICES)
+    notes = models.TextField(blank=True, null=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ("student", "course", "date")
+        indexes = [
+            models.Index(fields=["course", "student", "date"], name="archive_course_student_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.student} - {self.course} - {self.date} - {self.status} (archived)"
+
+
+class AttendanceSummary(models.Model):
+    """Running per-(student, course) totals so the stats endpoints do not
+    have to re-scan ``AttendanceRecord`` on every request."""
+
+    SCORES = {"P": 1.0, "L": 0.7, "A": 0.0}
+
+    student = models.ForeignKey(StudentData, on_delete=models.CASCADE, related_name="attendance_summaries")
+    course = models.ForeignKey(Course, on_delete=models.CASCADE, related_name="attendance_summaries")
+
+    present_count = models.PositiveIntegerField(default=0)
+    late_count = models.PositiveIntegerField(default=0)
+    absent_count = models.PositiveIntegerField(default=0)
+    score = models.FloatField(default=0.0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ("student", "course")
+        verbose_name_plural = "attendance summaries"
+
+    def __str__(self):
+        return f"{self.student} - {self.course} - {self.attendance_rate}%"
+
+    @classmethod
+    def weighted_score(cls, present, late, absent):
+        return present * cls.SCORES["P"] + late * cls.SCORES["L"] + absent * cls.SCORES["A"]
+
+    @property
+    def total_lectures(self):
+        return self.present_count + self.late_count + self.absent_count
+
+    @property
+    def attendance_rate(self):
+        total = self.total_lectures
+        return round((self.score / total) * 100, 2) if total else 0
+
+    @property
+    def grade_out_of_5(self):
+        return round((self.attendance_rate / 100) * 5, 2)
@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class TimelineCursorPagination(CursorPagination):
+    """Keyset pagination over attendance dates, so deep history pages cost
+    the same indexed range scan as the first one."""
+
+    ordering = ("date", "id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
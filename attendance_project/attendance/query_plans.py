@@ -0,0 +1,71 @@
+import json
+
+from django.db import connection
+from django.db.models import Count, Q
+
+from .models import ArchivedAttendanceRecord, AttendanceRecord, AttendanceSummary
+
+TABLE = AttendanceRecord._meta.db_table
+
+
+def hot_queries(course_id=1, student_id=1, teacher_id=1):
+    """The AttendanceRecord querysets behind the busiest endpoints, keyed by
+    a short name. Ids only need to be plausible; the planner does the rest."""
+    return {
+        "teacher_records": AttendanceRecord.objects.filter(course__teacher_id=teacher_id),
+        "student_timeline": AttendanceRecord.objects.filter(
+            student_id=student_id, course_id=course_id
+        ).order_by("date"),
+        "course_timelines": AttendanceRecord.objects.filter(
+            course_id=course_id
+        ).order_by("student_id", "date"),
+        "course_by_date": AttendanceRecord.objects.filter(
+            course_id=course_id
+        ).order_by("date", "id"),
+        "course_on_date": AttendanceRecord.objects.filter(
+            course_id=course_id, date="2025-01-01"
+        ),
+        "summary_refresh": AttendanceRecord.objects.filter(
+            course_id=course_id, student_id__in=[student_id]
+        ).values("student_id").annotate(
+            present=Count("id", filter=Q(status="P")),
+            late=Count("id", filter=Q(status="L")),
+            absent=Count("id", filter=Q(status="A")),
+        ).order_by(),
+        "course_summaries": AttendanceSummary.objects.filter(course_id=course_id),
+        "archived_course_timelines": ArchivedAttendanceRecord.objects.filter(
+            course_id=course_id
+        ).order_by("student_id", "date"),
+    }
+
+
+def explain(queryset):
+    if connection.vendor == "mysql":
+        return queryset.explain(format="json")
+    return queryset.explain()
+
+
+def _mysql_full_scans(node, tables):
+    if isinstance(node, dict):
+        if node.get("access_type") == "ALL" and node.get("table_name") in tables:
+            yield node["table_name"]
+        for value in node.values():
+            yield from _mysql_full_scans(value, tables)
+    elif isinstance(node, list):
+        for value in node:
+            yield from _mysql_full_scans(value, tables)
+
+
+def full_scans(plan, tables=(TABLE, AttendanceSummary._meta.db_table, ArchivedAttendanceRecord._meta.db_table)):
+    """Return the attendance tables that ``plan`` reads with a full scan."""
+    if connection.vendor == "mysql":
+        return sorted(set(_mysql_full_scans(json.loads(plan), tables)))
+
+    scanned = set()
+    for line in plan.splitlines():
+        for table in tables:
+            if connection.vendor == "sqlite" and f"SCAN {table}" in line:
+                scanned.add(table)
+            elif connection.vendor == "postgresql" and f"Seq Scan on {table}" in line:
+                scanned.add(table)
+    return sorted(scanned)
@@ -8,3 +8,12 @@ class AttendanceRecordSerializer(serializers.ModelSerializer):
     class Meta:
         model = AttendanceRecord
         fields = "__all__"
+
+
+class TimelineEntrySerializer(serializers.ModelSerializer):
+    student_id = serializers.IntegerField(read_only=True)
+    status = serializers.CharField(source="get_status_display", read_only=True)
+
+    class Meta:
+        model = AttendanceRecord
+        fields = ["student_id", "date", "status", "notes"]
@@ -0,0 +1,288 @@
+from datetime import date
+
+from django.db import connection, transaction
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from students.models import StudentData
+from .cache import invalidate_course
+from .models import ArchivedAttendanceRecord, AttendanceRecord, AttendanceSummary
+
+VALID_STATUSES = {choice for choice, _ in AttendanceRecord.STATUS_CHOICES}
+
+
+def _parse_date(value, default):
+    if not value:
+        return default
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(value)
+
+
+class AttendanceService:
+    UPSERT_BATCH_SIZE = 500
+
+    @staticmethod
+    def upsert_options(update_fields, unique_fields):
+        """bulk_create() kwargs that turn an insert into an upsert on
+        ``unique_fields``. MySQL resolves the conflict through ON DUPLICATE
+        KEY and refuses an explicit target."""
+        options = {
+            "update_conflicts": True,
+            "update_fields": update_fields,
+        }
+        if connection.features.supports_update_conflicts_with_target:
+            options["unique_fields"] = unique_fields
+        return options
+
+    @staticmethod
+    def refresh_summaries(course_id, student_ids, create=True):
+        """Recompute the ``AttendanceSummary`` rows of ``student_ids`` in one
+        course with a single grouped query and upsert them.
+
+        Archived records still count, so moving history to the archive
+        never changes a grade. Call this inside the transaction that changed
+        the records so the summaries never drift from them. With ``create=False`` only existing
+        rows are updated, which is what deletes need: a cascading delete of
+        the student or course may already have removed the summary.
+        """
+        student_ids = set(student_ids)
+        if not student_ids:
+            return
+        invalidate_course(course_id)
+
+        counts = {}
+        for model in (AttendanceRecord, ArchivedAttendanceRecord):
+            rows = model.objects.filter(
+                course_id=course_id, student_id__in=student_ids
+            ).values("student_id").annotate(
+                present=Count("id", filter=Q(status="P")),
+                late=Count("id", filter=Q(status="L")),
+                absent=Count("id", filter=Q(status="A")),
+            ).order_by()
+            for row in rows:
+                total = counts.setdefault(row["student_id"], {"present": 0, "late": 0, "absent": 0})
+                for key in total:
+                    total[key] += row[key]
+
+        summaries = []
+        for student_id in student_ids:
+            row = counts.get(student_id, {})
+            present = row.get("present", 0)
+            late = row.get("late", 0)
+            absent = row.get("absent", 0)
+            summaries.append(AttendanceSummary(
+                student_id=student_id,
+                course_id=course_id,
+                present_count=present,
+                late_count=late,
+                absent_count=absent,
+                score=AttendanceSummary.weighted_score(present, late, absent),
+            ))
+
+        if not create:
+            for summary in summaries:
+                AttendanceSummary.objects.filter(
+                    student_id=summary.student_id, course_id=course_id
+                ).update(
+                    present_count=summary.present_count,
+                    late_count=summary.late_count,
+                    absent_count=summary.absent_count,
+                    score=summary.score,
+                    updated_at=timezone.now(),
+                )
+            return
+
+        AttendanceSummary.objects.bulk_create(
+            summaries,
+            batch_size=AttendanceService.UPSERT_BATCH_SIZE,
+            **AttendanceService.upsert_options(
+                ["present_count", "late_count", "absent_count", "score", "updated_at"],
+                ["student", "course"],
+            )
+        )
+
+    @staticmethod
+    def discard_archived(records):
+        """Delete the ``ArchivedAttendanceRecord`` rows that share a
+        (student, course, date) key with ``records``. A live row replaces
+        its archived copy; keeping both would count the lecture twice."""
+        keys = {(record.student_id, record.course_id, record.date) for record in records}
+        if not keys:
+            return
+        archived = ArchivedAttendanceRecord.objects.filter(
+            student_id__in={student_id for student_id, _, _ in keys},
+            course_id__in={course_id for _, course_id, _ in keys},
+            date__in={record_date for _, _, record_date in keys},
+        ).values_list("id", "student_id", "course_id", "date")
+        stale = [row[0] for row in archived if row[1:] in keys]
+        if stale:
+            ArchivedAttendanceRecord.objects.filter(id__in=stale).delete()
+
+    @staticmethod
+    def write_records(records, update_fields=("status", "notes")):
+        """Upsert unsaved ``AttendanceRecord`` instances, drop any archived
+        copies they replace and refresh the summaries they touch. Must run
+        inside a transaction."""
+        AttendanceService.discard_archived(records)
+        AttendanceRecord.objects.bulk_create(
+            records,
+            batch_size=AttendanceService.UPSERT_BATCH_SIZE,
+            **AttendanceService.upsert_options(
+                list(update_fields), ["student", "course", "date"]
+            )
+        )
+
+        touched = {}
+        for record in records:
+            touched.setdefault(record.course_id, set()).add(record.student_id)
+        for course_id, student_ids in touched.items():
+            AttendanceService.refresh_summaries(course_id, student_ids)
+
+    @staticmethod
+    def archive_records(record_ids):
+        """Move the given ``AttendanceRecord`` rows into
+        ``ArchivedAttendanceRecord`` and return how many were moved. Must
+        run inside a transaction.
+
+        The live rows are removed with a raw delete: ``post_delete`` would
+        refresh the summary once per row, while one refresh per course at
+        the end covers the whole batch.
+        """
+        records = list(AttendanceRecord.objects.filter(id__in=record_ids))
+        if not records:
+            return 0
+
+        ArchivedAttendanceRecord.objects.bulk_create(
+            [
+                ArchivedAttendanceRecord(
+                    student_id=record.student_id,
+                    course_id=record.course_id,
+                    date=record.date,
+                    time=record.time,
+                    status=record.status,
+                    notes=record.notes,
+                )
+                for record in records
+            ],
+            batch_size=AttendanceService.UPSERT_BATCH_SIZE,
+            **AttendanceService.upsert_options(
+                ["time", "status", "notes"], ["student", "course", "date"]
+            )
+        )
+        moved = AttendanceRecord.objects.filter(id__in=[record.id for record in records])
+        moved._raw_delete(moved.db)
+
+        touched = {}
+        for record in records:
+            touched.setdefault(record.course_id, set()).add(record.student_id)
+        for course_id, student_ids in touched.items():
+            AttendanceService.refresh_summaries(course_id, student_ids)
+        return len(records)
+
+    @staticmethod
+    def take_attendance(course, records, default_date=None):
+        """Validate and upsert a batch of attendance records for one course.
+
+        Enrollment for the whole batch is checked with a single query and
+        the rows are written with batched upserts, so the cost no longer
+        grows with one round trip per student.
+
+        Returns ``(saved, results)`` where ``saved`` holds the stored
+        ``AttendanceRecord`` instances and ``results`` has one
+        accepted/rejected entry per submitted record, in input order.
+        Raises ``ValueError`` for an invalid ``default_date``: falling back
+        to today would overwrite today's marks for the whole batch.
+        """
+        try:
+            batch_date = _parse_date(default_date, date.today())
+        except TypeError:
+            raise ValueError(f"Invalid date: {default_date!r}")
+
+        results = []
+        pending = {}
+
+        for index, record in enumerate(records):
+            result = {"index": index, "student_id": None}
+            results.append(result)
+
+            if not isinstance(record, dict):
+                result.update(status="rejected", reason="Invalid record")
+                continue
+
+            try:
+                student_id = int(record.get("student_id"))
+            except (TypeError, ValueError):
+                result.update(status="rejected", reason="Invalid student_id")
+                continue
+            result["student_id"] = student_id
+
+            status_value = record.get("status", "P")
+            if not isinstance(status_value, str) or status_value not in VALID_STATUSES:
+                result.update(status="rejected", reason="Invalid status")
+                continue
+
+            try:
+                record_date = _parse_date(record.get("date"), batch_date)
+            except (TypeError, ValueError):
+                result.update(status="rejected", reason="Invalid date")
+                continue
+
+            key = (student_id, record_date)
+            if key in pending:
+                results[pending[key][0]].update(
+                    status="rejected", reason="Duplicate record in batch"
+                )
+            result["date"] = record_date
+            pending[key] = (index, status_value, record.get("notes", "") or "")
+
+        enrolled = set(
+            StudentData.objects.filter(
+                id__in={student_id for student_id, _ in pending},
+                courses=course,
+            ).values_list("id", flat=True)
+        )
+
+        to_write = {}
+        for key, (index, status_value, notes_value) in pending.items():
+            if results[index].get("status") == "rejected":
+                continue
+            if key[0] not in enrolled:
+                results[index].update(status="rejected", reason="Student not enrolled in course")
+                continue
+            to_write[key] = (index, status_value, notes_value)
+
+        saved = []
+        if to_write:
+            with transaction.atomic():
+                AttendanceService.write_records([
+                    AttendanceRecord(
+                        student_id=student_id,
+                        course=course,
+                        date=record_date,
+                        status=status_value,
+                        notes=notes_value,
+                    )
+                    for (student_id, record_date), (_, status_value, notes_value) in to_write.items()
+                ])
+
+                stored = AttendanceRecord.objects.filter(
+                    course=course,
+                    student_id__in={student_id for student_id, _ in to_write},
+                    date__in={record_date for _, record_date in to_write},
+                ).select_related("student__student", "course")
+
+                for attendance in stored:
+                    key = (attendance.student_id, attendance.date)
+                    if key not in to_write:
+                        continue
+                    results[to_write[key][0]].update(status="accepted", id=attendance.id)
+                    saved.append(attendance)
+
+            saved.sort(key=lambda r: to_write[(r.student_id, r.date)][0])
+
+        for result in results:
+            if "date" in result:
+                result["date"] = result["date"].isoformat()
+
+        return saved, results
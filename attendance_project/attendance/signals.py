@@ -0,0 +1,78 @@
+from django.db import models
+from django.db.models import Q
+from django.db.models.signals import pre_save, post_save, pre_delete, post_delete, m2m_changed
+from django.dispatch import receiver
+from accounts.models import User
+from students.models import Course, StudentData
+from .cache import invalidate_course
+from .models import AttendanceRecord
+from .services import AttendanceService
+
+@receiver(pre_save, sender=AttendanceRecord)
+def remember_previous_owner(sender, instance, **kwargs):
+    # An edit may move the record to another student or course; the old
+    # pair's summary has to be refreshed too.
+    instance._previous_owner = (
+        AttendanceRecord.objects.filter(pk=instance.pk).values_list("course_id", "student_id").first()
+        if instance.pk else None
+    )
+
+@receiver(post_save, sender=AttendanceRecord)
+def refresh_summary_on_save(sender, instance, **kwargs):
+    AttendanceService.discard_archived([instance])
+    AttendanceService.refresh_summaries(instance.course_id, [instance.student_id])
+    previous = getattr(instance, "_previous_owner", None)
+    if previous and previous != (instance.course_id, instance.student_id):
+        AttendanceService.refresh_summaries(previous[0], [previous[1]], create=False)
+
+@receiver(post_delete, sender=AttendanceRecord)
+def refresh_summary_on_delete(sender, instance, origin=None, **kwargs):
+    origin_model = origin._meta.model if isinstance(origin, models.Model) else getattr(origin, "model", None)
+    if origin_model not in (None, AttendanceRecord):
+        # Cascade from deleting a course, student or user: their summaries
+        # go with them, so skip the per-record refresh.
+        invalidate_course(instance.course_id)
+        return
+    AttendanceService.refresh_summaries(instance.course_id, [instance.student_id], create=False)
+
+@receiver(m2m_changed, sender=StudentData.courses.through)
+def invalidate_on_enrollment_change(sender, instance, action, reverse, pk_set, **kwargs):
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+    if reverse:
+        course_ids = [instance.pk]
+    elif action == "pre_clear":
+        course_ids = list(instance.courses.values_list("id", flat=True))
+    else:
+        course_ids = pk_set or []
+    for course_id in course_ids:
+        invalidate_course(course_id)
+
+
+# Cached stats and student responses also carry names and the course
+# title, so edits to those rows invalidate the courses they appear in.
+@receiver(post_save, sender=Course)
+def invalidate_on_course_change(sender, instance, created, **kwargs):
+    if not created:
+        invalidate_course(instance.pk)
+
+@receiver(post_save, sender=StudentData)
+@receiver(pre_delete, sender=StudentData)
+def invalidate_on_student_change(sender, instance, **kwargs):
+    if kwargs.get("created"):
+        return
+    for course_id in instance.courses.values_list("id", flat=True):
+        invalidate_course(course_id)
+
+@receiver(post_save, sender=User)
+def invalidate_on_user_change(sender, instance, created, update_fields=None, **kwargs):
+    # Logins and password changes touch nothing a response shows.
+    if created or (update_fields and set(update_fields) <= {"last_login", "password"}):
+        return
+    course_ids = (
+        Course.objects.filter(Q(students__student=instance) | Q(teacher=instance))
+        .values_list("id", flat=True)
+        .distinct()
+    )
+    for course_id in course_ids:
+        invalidate_course(course_id)
@@ -0,0 +1,105 @@
+from django.db.models import Q, Sum
+from django.db.models.functions import Coalesce
+
+from students.models import StudentData
+from .models import ArchivedAttendanceRecord, AttendanceRecord, AttendanceSummary
+
+
+def timeline_entry(record):
+    return {
+        "date": record.date,
+        "status": record.get_status_display(),
+        "notes": record.notes
+    }
+
+
+def history(model_filter, include_archived=False):
+    """Live attendance records matching ``model_filter``, plus the archived
+    ones when ``include_archived`` is set. Returns a list of querysets so
+    each table is read with its own index."""
+    sources = [AttendanceRecord.objects.filter(**model_filter)]
+    if include_archived:
+        sources.append(ArchivedAttendanceRecord.objects.filter(**model_filter))
+    return sources
+
+
+def window(records, date_from=None, date_to=None):
+    """Restrict an attendance record queryset to an inclusive date range."""
+    if date_from:
+        records = records.filter(date__gte=date_from)
+    if date_to:
+        records = records.filter(date__lte=date_to)
+    return records
+
+
+class CourseAttendanceStats:
+    """Attendance statistics for every student enrolled in a course.
+
+    The whole course costs two queries however many students it has: one
+    grouped aggregate over the enrolled students' summaries and one ordered
+    scan of the course records that is split into per-student timelines.
+    Totals always cover the full history, archived records included;
+    ``date_from``/``date_to`` only narrow the timelines,
+    ``include_timeline=False`` skips them and ``include_archived=True``
+    adds archived records to them (one more query).
+    """
+
+    def __init__(self, course, date_from=None, date_to=None, include_timeline=True, include_archived=False):
+        self.course = course
+        self.date_from = date_from
+        self.date_to = date_to
+        self.include_timeline = include_timeline
+        self.include_archived = include_archived
+
+    def students(self):
+        in_course = Q(attendance_summaries__course=self.course)
+        return (
+            StudentData.objects.filter(courses=self.course)
+            .select_related("student")
+            .annotate(
+                present_count=Coalesce(Sum("attendance_summaries__present_count", filter=in_course), 0),
+                late_count=Coalesce(Sum("attendance_summaries__late_count", filter=in_course), 0),
+                absent_count=Coalesce(Sum("attendance_summaries__absent_count", filter=in_course), 0),
+                score=Coalesce(Sum("attendance_summaries__score", filter=in_course), 0.0),
+            )
+            .order_by("id")
+        )
+
+    def timelines(self):
+        timelines = {}
+        for records in history({"course": self.course}, self.include_archived):
+            records = window(records, self.date_from, self.date_to) \
+                .only("student_id", "date", "status", "notes").order_by("student_id", "date")
+            for record in records:
+                timelines.setdefault(record.student_id, []).append(timeline_entry(record))
+        if self.include_archived:
+            for timeline in timelines.values():
+                timeline.sort(key=lambda entry: entry["date"])
+        return timelines
+
+    def as_list(self):
+        timelines = self.timelines() if self.include_timeline else None
+        data = []
+
+        for student in self.students():
+            summary = AttendanceSummary(
+                present_count=student.present_count,
+                late_count=student.late_count,
+                absent_count=student.absent_count,
+                score=student.score,
+            )
+
+            entry = {
+                "id": student.id,
+                "name": student.full_name,
+                "username": student.student.username,
+                "fullId": student.fullId,
+                "total_lectures": summary.total_lectures,
+                "attendance_rate": summary.attendance_rate,
+                "grade_out_of_5": summary.grade_out_of_5,
+            }
+            if timelines is not None:
+                entry["timeline"] = timelines.get(student.id, [])
+            data.append(entry)
+
+        return data
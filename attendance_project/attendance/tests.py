@@ -1,3 +1,708 @@
+import csv
+import gzip
+import json
+import os
+import tempfile
+from datetime import date
+from io import StringIO
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.urls import reverse
+from unittest.mock import patch
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from accounts.models import User
+from students.models import Course, StudentData
+from notifications.models import Notification
+from attendance.models import ArchivedAttendanceRecord, AttendanceRecord, AttendanceSummary
+from attendance.cache import cache_stats
+from attendance.exports import export_rows
+from attendance.query_plans import explain, full_scans, hot_queries
+from attendance.services import AttendanceService
 
-# Create your tests here.
+
+class TakeAttendanceTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com',
+            password='teachpass123',
+            first_name='Teach',
+            last_name='Er',
+            role='TCR'
+        )
+        self.course = Course.objects.create(title='Biology 101', teacher=self.teacher)
+
+        self.students = []
+        for i in range(3):
+            user = User.objects.create_user(
+                email=f'student{i}@example.com',
+                password='studpass123',
+                first_name=f'Stu{i}',
+                last_name='Dent',
+                role='STU'
+            )
+            student_data = StudentData.objects.create(student=user)
+            student_data.courses.add(self.course)
+            self.students.append(student_data)
+
+        outsider = User.objects.create_user(
+            email='outsider@example.com',
+            password='studpass123',
+            first_name='Out',
+            last_name='Sider',
+            role='STU'
+        )
+        self.outsider = StudentData.objects.create(student=outsider)
+
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.teacher)
+        cache.clear()
+
+    def test_create_upserts_records(self):
+        url = reverse('take_attendance-list')
+        payload = {
+            'course_id': self.course.id,
+            'records': [
+                {'student_id': s.id, 'status': 'P', 'date': '2025-01-10'}
+                for s in self.students
+            ],
+        }
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(len(response.data), 3)
+
+        payload['records'][0]['status'] = 'L'
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(AttendanceRecord.objects.filter(course=self.course).count(), 3)
+        self.assertEqual(
+            AttendanceRecord.objects.get(student=self.students[0], date=date(2025, 1, 10)).status,
+            'L'
+        )
+
+    def test_create_uses_payload_date(self):
+        url = reverse('take_attendance-list')
+        payload = {
+            'course_id': self.course.id,
+            'date': '2025-02-01',
+            'records': [{'student_id': self.students[0].id, 'status': 'A'}],
+        }
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data[0]['date'], '2025-02-01')
+
+    def test_invalid_batch_date_is_rejected(self):
+        for url in (reverse('take_attendance-list'), reverse('take_attendance-bulk')):
+            for value in ('2025-13-01', 20250101):
+                with self.subTest(url=url, date=value):
+                    response = self.client.post(url, {
+                        'course_id': self.course.id,
+                        'date': value,
+                        'records': [{'student_id': self.students[0].id, 'status': 'A'}],
+                    }, format='json')
+                    self.assertEqual(response.status_code, 400)
+                    self.assertIn('date', response.data)
+        self.assertFalse(AttendanceRecord.objects.exists())
+
+    def test_bulk_reports_rejected_records(self):
+        url = reverse('take_attendance-bulk')
+        payload = {
+            'course_id': self.course.id,
+            'records': [
+                {'student_id': self.students[0].id, 'status': 'P', 'date': '2025-01-10'},
+                {'student_id': self.outsider.id, 'status': 'P', 'date': '2025-01-10'},
+                {'student_id': self.students[1].id, 'status': 'X', 'date': '2025-01-10'},
+                {'student_id': self.students[2].id, 'status': 'P', 'date': 'not-a-date'},
+                {'student_id': self.students[2].id, 'status': ['P'], 'date': '2025-01-11'},
+            ],
+        }
+        response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['accepted'], 1)
+        self.assertEqual(response.data['rejected'], 4)
+        statuses = [r['status'] for r in response.data['results']]
+        self.assertEqual(statuses, ['accepted', 'rejected', 'rejected', 'rejected', 'rejected'])
+        self.assertEqual(response.data['results'][4]['reason'], 'Invalid status')
+        self.assertEqual(
+            response.data['results'][1]['reason'], 'Student not enrolled in course'
+        )
+
+    def test_bulk_query_count_is_bounded(self):
+        url = reverse('take_attendance-bulk')
+        payload = {
+            'course_id': self.course.id,
+            'records': [
+                {'student_id': s.id, 'status': 'P', 'date': '2025-01-10'}
+                for s in self.students
+            ],
+        }
+        # course lookup, enrollment check, archived-copy lookup, upsert,
+        # live + archived summary aggregates, summary upsert, re-read,
+        # savepoint + release
+        with self.assertNumQueries(10):
+            response = self.client.post(url, payload, format='json')
+        self.assertEqual(response.data['accepted'], 3)
+
+    def test_stats_query_count_is_constant(self):
+        self.client.post(reverse('take_attendance-list'), {
+            'course_id': self.course.id,
+            'records': [
+                {'student_id': s.id, 'status': status_value, 'date': f'2025-01-1{day}'}
+                for s in self.students
+                for day, status_value in enumerate(['P', 'L', 'A'])
+            ],
+        }, format='json')
+
+        url = reverse('attendance-stats', kwargs={'course_id': self.course.id})
+        # course lookup, grouped summary aggregate, timeline scan
+        with self.assertNumQueries(3):
+            response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 3)
+        first = response.data[0]
+        self.assertEqual(
+            set(first),
+            {'id', 'name', 'username', 'fullId', 'total_lectures',
+             'attendance_rate', 'grade_out_of_5', 'timeline'}
+        )
+        self.assertEqual(first['username'], self.students[0].student.username)
+        self.assertEqual(first['total_lectures'], 3)
+        self.assertEqual(first['attendance_rate'], 56.67)
+        self.assertEqual(
+            [entry['status'] for entry in first['timeline']],
+            ['Present', 'Late', 'Absent']
+        )
+
+    def test_bulk_not_teacher(self):
+        self.client.force_authenticate(user=self.students[0].student)
+        url = reverse('take_attendance-bulk')
+        response = self.client.post(url, {'course_id': self.course.id, 'records': []}, format='json')
+        self.assertEqual(response.status_code, 403)
+
+
+class AttendanceSummaryTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com',
+            password='teachpass123',
+            first_name='Teach',
+            last_name='Er',
+            role='TCR'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com',
+            password='studpass123',
+            first_name='Stu',
+            last_name='Dent',
+            role='STU'
+        )
+        self.course = Course.objects.create(title='Biology 101', teacher=self.teacher)
+        self.student_data = StudentData.objects.create(student=self.student)
+        self.student_data.courses.add(self.course)
+        self.client = APIClient()
+        cache.clear()
+
+    def take(self, records):
+        self.client.force_authenticate(user=self.teacher)
+        return self.client.post(
+            reverse('take_attendance-list'),
+            {'course_id': self.course.id, 'records': records},
+            format='json'
+        )
+
+    def summary(self):
+        return AttendanceSummary.objects.get(student=self.student_data, course=self.course)
+
+    def test_bulk_write_updates_summary(self):
+        self.take([
+            {'student_id': self.student_data.id, 'status': 'P', 'date': '2025-01-10'},
+        ])
+        self.take([
+            {'student_id': self.student_data.id, 'status': 'L', 'date': '2025-01-11'},
+            {'student_id': self.student_data.id, 'status': 'A', 'date': '2025-01-12'},
+        ])
+        summary = self.summary()
+        self.assertEqual(
+            (summary.present_count, summary.late_count, summary.absent_count),
+            (1, 1, 1)
+        )
+        self.assertEqual(summary.attendance_rate, 56.67)
+
+    def test_model_save_and_delete_update_summary(self):
+        record = AttendanceRecord.objects.create(
+            student=self.student_data, course=self.course, date=date(2025, 1, 10), status='A'
+        )
+        self.assertEqual(self.summary().absent_count, 1)
+
+        record.status = 'P'
+        record.save()
+        self.assertEqual((self.summary().present_count, self.summary().absent_count), (1, 0))
+
+        record.delete()
+        self.assertEqual(self.summary().total_lectures, 0)
+
+    def test_moving_a_record_refreshes_both_summaries(self):
+        other = StudentData.objects.create(student=User.objects.create_user(
+            email='other@example.com', password='studpass123', first_name='Ot', role='STU'
+        ))
+        other.courses.add(self.course)
+        record = AttendanceRecord.objects.create(
+            student=self.student_data, course=self.course, date=date(2025, 1, 10), status='P'
+        )
+
+        self.client.force_authenticate(user=self.teacher)
+        response = self.client.patch(
+            reverse('take_attendance-detail', args=[record.id]), {'student': other.id}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.summary().present_count, 0)
+        self.assertEqual(
+            AttendanceSummary.objects.get(student=other, course=self.course).present_count, 1
+        )
+
+    def test_course_delete_does_not_refresh_per_record(self):
+        def delete_course(records):
+            course = Course.objects.create(title='Temp', teacher=self.teacher)
+            AttendanceService.write_records([
+                AttendanceRecord(student=self.student_data, course=course, date=date(2025, 1, day), status='P')
+                for day in range(1, records + 1)
+            ])
+            with CaptureQueriesContext(connection) as ctx:
+                course.delete()
+            return len(ctx.captured_queries)
+
+        self.assertEqual(delete_course(2), delete_course(20))
+        self.assertFalse(AttendanceSummary.objects.filter(course__title='Temp').exists())
+
+    def test_stats_views_read_summary(self):
+        self.take([
+            {'student_id': self.student_data.id, 'status': 'P', 'date': '2025-01-10'},
+            {'student_id': self.student_data.id, 'status': 'L', 'date': '2025-01-11'},
+        ])
+
+        response = self.client.get(reverse('attendance-stats', kwargs={'course_id': self.course.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data[0]['total_lectures'], 2)
+        self.assertEqual(response.data[0]['attendance_rate'], 85.0)
+        self.assertEqual(len(response.data[0]['timeline']), 2)
+
+        self.client.force_authenticate(user=self.student)
+        response = self.client.get(reverse('student-attendance', kwargs={'course_id': self.course.id}))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['attendance_rate'], 85.0)
+        self.assertEqual(response.data['grade_out_of_5'], 4.25)
+        self.assertEqual(response.data['today']['attended'], 1)
+
+    def test_stats_are_cached_until_a_write(self):
+        self.take([{'student_id': self.student_data.id, 'status': 'P', 'date': '2025-01-10'}])
+        url = reverse('attendance-stats', kwargs={'course_id': self.course.id})
+
+        self.client.get(url)
+        # course lookup only, the payload comes from the cache
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.data[0]['total_lectures'], 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.take([{'student_id': self.student_data.id, 'status': 'A', 'date': '2025-01-11'}])
+        response = self.client.get(url)
+        self.assertEqual(response.data[0]['total_lectures'], 2)
+
+        self.assertEqual(cache_stats()['hits'], 1)
+        self.assertEqual(cache_stats()['misses'], 2)
+
+    def test_enrollment_change_invalidates_stats(self):
+        self.client.force_authenticate(user=self.teacher)
+        url = reverse('attendance-stats', kwargs={'course_id': self.course.id})
+        self.assertEqual(len(self.client.get(url).data), 1)
+
+        other = User.objects.create_user(
+            email='other@example.com', password='studpass123', first_name='Ot', role='STU'
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            StudentData.objects.create(student=other).courses.add(self.course)
+        self.assertEqual(len(self.client.get(url).data), 2)
+
+    def test_name_and_title_edits_invalidate_stats(self):
+        self.client.force_authenticate(user=self.teacher)
+        stats_url = reverse('attendance-stats', kwargs={'course_id': self.course.id})
+        self.client.get(stats_url)
+
+        self.student.first_name = 'Renamed'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+        self.assertEqual(self.client.get(stats_url).data[0]['name'], 'Renamed Dent')
+
+        self.client.force_authenticate(user=self.student)
+        student_url = reverse('student-attendance', kwargs={'course_id': self.course.id})
+        self.client.get(student_url)
+        self.course.title = 'Biology 102'
+        with self.captureOnCommitCallbacks(execute=True):
+            self.course.save()
+        self.assertIn('Biology 102', str(self.client.get(student_url).data))
+
+    def test_cache_stats_requires_admin(self):
+        self.client.force_authenticate(user=self.teacher)
+        url = reverse('attendance-cache-stats')
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+        self.teacher.is_staff = True
+        self.teacher.save()
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('hit_rate', response.data)
+
+    def test_rebuild_command(self):
+        AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(student=self.student_data, course=self.course, date=date(2025, 1, d), status='P')
+            for d in range(1, 6)
+        ])
+        self.assertFalse(AttendanceSummary.objects.exists())
+
+        call_command('rebuild_attendance_summaries', chunk_size=1, stdout=StringIO())
+        self.assertEqual(self.summary().present_count, 5)
+
+
+class AttendanceTimelineTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com',
+            password='teachpass123',
+            first_name='Teach',
+            last_name='Er',
+            role='TCR'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com',
+            password='studpass123',
+            first_name='Stu',
+            last_name='Dent',
+            role='STU'
+        )
+        self.course = Course.objects.create(title='Biology 101', teacher=self.teacher)
+        self.student_data = StudentData.objects.create(student=self.student)
+        self.student_data.courses.add(self.course)
+        AttendanceRecord.objects.bulk_create([
+            AttendanceRecord(student=self.student_data, course=self.course, date=date(2025, 1, d), status='P')
+            for d in range(1, 11)
+        ])
+        self.client = APIClient()
+        cache.clear()
+
+    def test_stats_date_window(self):
+        self.client.force_authenticate(user=self.teacher)
+        url = reverse('attendance-stats', kwargs={'course_id': self.course.id})
+        response = self.client.get(url, {'from': '2025-01-03', 'to': '2025-01-05'})
+        self.assertEqual(response.status_code, 200)
+        dates = [str(entry['date']) for entry in response.data[0]['timeline']]
+        self.assertEqual(dates, ['2025-01-03', '2025-01-04', '2025-01-05'])
+
+    def test_stats_without_timeline(self):
+        self.client.force_authenticate(user=self.teacher)
+        url = reverse('attendance-stats', kwargs={'course_id': self.course.id})
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {'include_timeline': 'false'})
+        self.assertNotIn('timeline', response.data[0])
+
+    def test_invalid_window(self):
+        self.client.force_authenticate(user=self.student)
+        url = reverse('student-attendance', kwargs={'course_id': self.course.id})
+        response = self.client.get(url, {'from': '01/03/2025'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_student_view_date_window(self):
+        self.client.force_authenticate(user=self.student)
+        url = reverse('student-attendance', kwargs={'course_id': self.course.id})
+        response = self.client.get(url, {'from': '2025-01-09'})
+        self.assertEqual(len(response.data['timeline']), 2)
+
+        response = self.client.get(url, {'include_timeline': 'false'})
+        self.assertNotIn('timeline', response.data)
+
+    def test_timeline_cursor_pagination(self):
+        self.client.force_authenticate(user=self.student)
+        url = reverse('attendance-timeline', kwargs={'course_id': self.course.id})
+        response = self.client.get(url, {'page_size': 4})
+        self.assertEqual(response.status_code, 200)
+        seen = [entry['date'] for entry in response.data['results']]
+
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            seen.extend(entry['date'] for entry in response.data['results'])
+
+        self.assertEqual(seen, [f'2025-01-{d:02d}' for d in range(1, 11)])
+
+    def test_timeline_requires_enrollment(self):
+        other = Course.objects.create(title='Chemistry 101', teacher=self.teacher)
+        self.client.force_authenticate(user=self.student)
+        url = reverse('attendance-timeline', kwargs={'course_id': other.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_csv(self):
+        self.client.force_authenticate(user=self.teacher)
+        url = reverse('attendance-export', kwargs={'course_id': self.course.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['date', 'time', 'student_id'])
+        self.assertEqual(len(lines), 11)
+
+    def test_export_ndjson_gzip(self):
+        self.client.force_authenticate(user=self.teacher)
+        url = reverse('attendance-export', kwargs={'course_id': self.course.id})
+        response = self.client.get(url, {'output': 'ndjson', 'compress': 'gzip'})
+        self.assertEqual(response.status_code, 200)
+        body = gzip.decompress(b''.join(response.streaming_content)).decode()
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 10)
+        self.assertEqual(rows[0]['username'], self.student.username)
+
+    def test_export_rows_are_chunked(self):
+        rows = list(export_rows(self.course, chunk_size=3))
+        self.assertEqual([row[0] for row in rows], [date(2025, 1, d) for d in range(1, 11)])
+
+    def test_export_not_teacher(self):
+        self.client.force_authenticate(user=self.student)
+        url = reverse('attendance-export', kwargs={'course_id': self.course.id})
+        self.assertEqual(self.client.get(url).status_code, 403)
+
+
+class ImportAttendanceTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com',
+            password='teachpass123',
+            first_name='Teach',
+            last_name='Er',
+            role='TCR'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com',
+            password='studpass123',
+            first_name='Stu',
+            last_name='Dent',
+            role='STU'
+        )
+        self.course = Course.objects.create(title='Biology 101', teacher=self.teacher)
+        self.student_data = StudentData.objects.create(student=self.student)
+        self.student_data.courses.add(self.course)
+
+        tmp = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False, newline='')
+        writer = csv.writer(tmp)
+        writer.writerow(['student', 'course_id', 'date', 'status', 'time', 'notes'])
+        for day in range(1, 7):
+            writer.writerow([self.student.email, self.course.id, f'2024-03-0{day}', 'Present', '08:30', ''])
+        writer.writerow(['nobody@example.com', self.course.id, '2024-03-07', 'P', '', ''])
+        tmp.close()
+        self.csv_path = tmp.name
+        self.addCleanup(os.remove, self.csv_path)
+
+    def test_import_keeps_explicit_dates(self):
+        err = StringIO()
+        call_command('import_attendance', self.csv_path, chunk_size=4, stdout=StringIO(), stderr=err)
+
+        records = AttendanceRecord.objects.filter(course=self.course).order_by('date')
+        self.assertEqual(records.count(), 6)
+        self.assertEqual(records[0].date, date(2024, 3, 1))
+        self.assertEqual(str(records[0].time), '08:30:00')
+        self.assertIn('unknown student', err.getvalue())
+        self.assertEqual(
+            AttendanceSummary.objects.get(student=self.student_data, course=self.course).present_count, 6
+        )
+        self.assertFalse(os.path.exists(f'{self.csv_path}.checkpoint'))
+
+    def test_import_resumes_from_checkpoint(self):
+        original = AttendanceService.write_records
+        calls = []
+
+        def fail_second_chunk(records, **kwargs):
+            calls.append(len(records))
+            if len(calls) == 2:
+                raise RuntimeError('connection lost')
+            return original(records, **kwargs)
+
+        with patch.object(AttendanceService, 'write_records', side_effect=fail_second_chunk):
+            with self.assertRaises(RuntimeError):
+                call_command('import_attendance', self.csv_path, chunk_size=3, stdout=StringIO(), stderr=StringIO())
+
+        self.assertEqual(AttendanceRecord.objects.count(), 3)
+        self.addCleanup(lambda: os.path.exists(f'{self.csv_path}.checkpoint') and os.remove(f'{self.csv_path}.checkpoint'))
+
+        out = StringIO()
+        call_command('import_attendance', self.csv_path, chunk_size=3, resume=True, stdout=out, stderr=StringIO())
+        self.assertIn('Resuming after row 3', out.getvalue())
+        self.assertEqual(AttendanceRecord.objects.count(), 6)
+
+
+class QueryPlanTests(TestCase):
+    def test_hot_queries_use_indexes(self):
+        for name, queryset in hot_queries().items():
+            with self.subTest(query=name):
+                self.assertEqual(full_scans(explain(queryset)), [])
+
+    def test_full_scan_is_reported(self):
+        plan = explain(AttendanceRecord.objects.filter(notes='late bus'))
+        self.assertEqual(full_scans(plan), [AttendanceRecord._meta.db_table])
+
+    def test_command_passes_with_fail_on_scan(self):
+        call_command('explain_attendance_queries', fail_on_scan=True, stdout=StringIO())
+
+
+class ArchiveAttendanceTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email='teacher@example.com',
+            password='teachpass123',
+            first_name='Teach',
+            last_name='Er',
+            role='TCR'
+        )
+        self.student = User.objects.create_user(
+            email='student@example.com',
+            password='studpass123',
+            first_name='Stu',
+            last_name='Dent',
+            role='STU'
+        )
+        self.course = Course.objects.create(title='Biology 101', teacher=self.teacher)
+        self.student_data = StudentData.objects.create(student=self.student)
+        self.student_data.courses.add(self.course)
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceService.take_attendance(self.course, [
+                {'student_id': self.student_data.id, 'status': status, 'date': f'2025-01-0{day}'}
+                for day, status in enumerate('PLAPP', start=1)
+            ])
+        self.client = APIClient()
+        cache.clear()
+
+    def archive(self, **options):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('archive_attendance', stdout=StringIO(), **options)
+
+    def summary(self):
+        return AttendanceSummary.objects.get(student=self.student_data, course=self.course)
+
+    def test_archive_moves_records_in_chunks(self):
+        times = dict(AttendanceRecord.objects.values_list('date', 'time'))
+        self.archive(before=date(2025, 1, 4), chunk_size=2)
+        self.assertEqual(
+            sorted(AttendanceRecord.objects.values_list('date', flat=True)),
+            [date(2025, 1, 4), date(2025, 1, 5)]
+        )
+        archived = ArchivedAttendanceRecord.objects.order_by('date')
+        self.assertEqual([r.status for r in archived], ['P', 'L', 'A'])
+        self.assertEqual({r.date: r.time for r in archived}, {d: times[d] for d in times if d < date(2025, 1, 4)})
+
+    def test_summary_keeps_archived_counts(self):
+        self.archive(courses=[self.course.id])
+        self.assertFalse(AttendanceRecord.objects.exists())
+        self.assertEqual(self.summary().total_lectures, 5)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceService.take_attendance(self.course, [
+                {'student_id': self.student_data.id, 'status': 'P', 'date': '2025-02-01'}
+            ])
+        summary = self.summary()
+        self.assertEqual((summary.present_count, summary.late_count, summary.absent_count), (4, 1, 1))
+
+        call_command('rebuild_attendance_summaries', stdout=StringIO())
+        self.assertEqual(self.summary().total_lectures, 6)
+
+    def test_stats_include_archived(self):
+        self.archive(before=date(2025, 1, 3))
+        self.client.force_authenticate(user=self.teacher)
+        url = reverse('attendance-stats', kwargs={'course_id': self.course.id})
+
+        response = self.client.get(url)
+        self.assertEqual(response.data[0]['total_lectures'], 5)
+        self.assertEqual(len(response.data[0]['timeline']), 3)
+
+        response = self.client.get(url, {'include_archived': 'true'})
+        dates = [str(entry['date']) for entry in response.data[0]['timeline']]
+        self.assertEqual(dates, [f'2025-01-0{day}' for day in range(1, 6)])
+
+    def test_student_view_include_archived(self):
+        self.archive(before=date(2025, 1, 3))
+        self.client.force_authenticate(user=self.student)
+        url = reverse('student-attendance', kwargs={'course_id': self.course.id})
+
+        response = self.client.get(url)
+        self.assertEqual(len(response.data['timeline']), 3)
+
+        response = self.client.get(url, {'include_archived': 'true', 'to': '2025-01-03'})
+        statuses = [entry['status'] for entry in response.data['timeline']]
+        self.assertEqual(statuses, ['Present', 'Late', 'Absent'])
+
+    def test_rewriting_an_archived_date_replaces_the_archived_copy(self):
+        self.archive(before=date(2025, 1, 3))
+        with self.captureOnCommitCallbacks(execute=True):
+            AttendanceService.take_attendance(self.course, [
+                {'student_id': self.student_data.id, 'status': 'A', 'date': '2025-01-01'}
+            ])
+        self.assertEqual(
+            list(ArchivedAttendanceRecord.objects.values_list('date', flat=True)), [date(2025, 1, 2)]
+        )
+        summary = self.summary()
+        self.assertEqual((summary.present_count, summary.late_count, summary.absent_count), (2, 1, 2))
+
+        self.client.force_authenticate(user=self.teacher)
+        url = reverse('attendance-stats', kwargs={'course_id': self.course.id})
+        response = self.client.get(url, {'include_archived': 'true'})
+        dates = [str(entry['date']) for entry in response.data[0]['timeline']]
+        self.assertEqual(dates, [f'2025-01-0{day}' for day in range(1, 6)])
+
+    def test_archive_requires_a_filter(self):
+        with self.assertRaises(CommandError):
+            call_command('archive_attendance', stdout=StringIO())
+
+
+class BenchmarkCommandTests(TestCase):
+    def test_generate_dataset_and_benchmark(self):
+        call_command(
+            'generate_dataset', teachers=1, courses=2, students=4, days=3,
+            courses_per_student=1, notifications_per_student=2, stdout=StringIO(),
+        )
+        self.assertEqual(Course.objects.count(), 2)
+        self.assertEqual(AttendanceRecord.objects.count(), 12)
+        self.assertEqual(AttendanceSummary.objects.count(), 4)
+
+        out = StringIO()
+        call_command(
+            'benchmark_endpoints', iterations=2, in_memory_channel_layer=True,
+            stdout=out, stderr=StringIO(),
+        )
+        report = json.loads(out.getvalue())
+        for name, result in report['endpoints'].items():
+            if name != 'ws_notifications':
+                with self.subTest(endpoint=name):
+                    self.assertEqual(result['status'], 200)
+        self.assertIn('deliver_p95_ms', report['endpoints']['ws_notifications'])
+
+    def test_benchmark_writes_are_rolled_back(self):
+        call_command(
+            'generate_dataset', teachers=1, courses=1, students=3, days=2,
+            courses_per_student=1, notifications_per_student=1, stdout=StringIO(),
+        )
+        counts = lambda: (
+            User.objects.count(), Course.objects.count(), AttendanceRecord.objects.count(),
+            Notification.objects.count(), Notification.objects.filter(is_read=True).count(),
+        )
+        before = counts()
+
+        out = StringIO()
+        call_command(
+            'benchmark_endpoints', iterations=2, writes=True, in_memory_channel_layer=True,
+            stdout=out, stderr=StringIO(),
+        )
+        report = json.loads(out.getvalue())
+        for name in ('accounts.login', 'accounts.change_password', 'students.enroll',
+                     'students.course_create', 'notifications.mark_read', 'attendance.take'):
+            with self.subTest(endpoint=name):
+                self.assertIn(report['endpoints'][name]['status'], (200, 201, 202))
+        self.assertEqual(counts(), before)
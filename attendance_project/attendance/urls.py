@@ -1,6 +1,6 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TakeAttendanceViewSet, AttendanceStatsView ,StudentAttendanceView
+from .views import TakeAttendanceViewSet, AttendanceStatsView ,StudentAttendanceView, AttendanceTimelineView, AttendanceExportView, AttendanceCacheStatsView
 
 
 router = DefaultRouter()
@@ -10,5 +10,8 @@ urlpatterns = [
     path("", include(router.urls)),
     path("stats/<int:course_id>/", AttendanceStatsView.as_view(), name="attendance-stats"),
     path("student/<int:course_id>/", StudentAttendanceView.as_view(), name="student-attendance"),
+    path("timeline/<int:course_id>/", AttendanceTimelineView.as_view(), name="attendance-timeline"),
+    path("export/<int:course_id>/", AttendanceExportView.as_view(), name="attendance-export"),
+    path("cache-stats/", AttendanceCacheStatsView.as_view(), name="attendance-cache-stats"),
     
 ]
@@ -1,15 +1,55 @@
 from datetime import date
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.utils.timezone import localdate
 
-from rest_framework import viewsets, status
+from rest_framework import generics, viewsets, status
+from rest_framework.decorators import action
+from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 
 from students.models import StudentData, Course
-from .models import AttendanceRecord
-from .serializers import AttendanceRecordSerializer
+from .cache import cache_stats, cached_response_data
+from .exports import EXPORT_FORMATS, export_rows, gzip_stream
+from .models import AttendanceRecord, AttendanceSummary
+from .pagination import TimelineCursorPagination
+from .serializers import AttendanceRecordSerializer, TimelineEntrySerializer
+from .services import AttendanceService
+from .stats import CourseAttendanceStats, history, timeline_entry, window
+
+
+def batch_date(request):
+    """Read the optional top-level ``date`` of an attendance batch."""
+    value = request.data.get("date")
+    if value in (None, ""):
+        return None
+    try:
+        return date.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValidationError({"date": "Use the YYYY-MM-DD format."})
+
+
+def timeline_options(request):
+    """Read the ``from``/``to``/``include_timeline``/``include_archived``
+    query parameters shared by the attendance read endpoints."""
+    params = request.query_params
+    options = {}
+    for param, key in (("from", "date_from"), ("to", "date_to")):
+        value = params.get(param)
+        if not value:
+            options[key] = None
+            continue
+        try:
+            options[key] = date.fromisoformat(value)
+        except ValueError:
+            raise ValidationError({param: "Use the YYYY-MM-DD format."})
+    options["include_timeline"] = params.get("include_timeline", "true").lower() not in ("false", "0", "no")
+    options["include_archived"] = params.get("include_archived", "false").lower() in ("true", "1", "yes")
+    return options
+
 
 class TakeAttendanceViewSet(viewsets.ModelViewSet):
     serializer_class = AttendanceRecordSerializer
@@ -21,6 +61,14 @@ class TakeAttendanceViewSet(viewsets.ModelViewSet):
             return AttendanceRecord.objects.none()
         return AttendanceRecord.objects.filter(course__teacher=user)
 
+    def perform_update(self, serializer):
+        with transaction.atomic():
+            serializer.save()
+
+    def perform_destroy(self, instance):
+        with transaction.atomic():
+            instance.delete()
+
     def create(self, request, *args, **kwargs):
         user = request.user
         if user.role != "TCR":
@@ -33,38 +81,50 @@ class TakeAttendanceViewSet(viewsets.ModelViewSet):
         records = request.data.get("records", [])
         course = get_object_or_404(Course, id=course_id, teacher=user)
 
-        created_records = []
-
-        for record in records:
-            student_id = record.get("student_id")
-            status_value = record.get("status", "P")
-            notes_value = record.get("notes", "")
-            record_date = record.get("date")
-            record_date = date.fromisoformat(record_date) if record_date else date.today()
-
-            try:
-                student = StudentData.objects.get(
-                    id=student_id,
-                    courses=course
-                )
-            except StudentData.DoesNotExist:
-                continue
-
-            attendance, _ = AttendanceRecord.objects.update_or_create(
-                student=student,
-                course=course,
-                date=record_date,
-                defaults={
-                    "status": status_value,
-                    "notes": notes_value
-                }
+        if not isinstance(records, list):
+            return Response(
+                {"detail": "records must be a list."},
+                status=status.HTTP_400_BAD_REQUEST
             )
 
-            created_records.append(attendance)
+        created_records, _ = AttendanceService.take_attendance(
+            course, records, default_date=batch_date(request)
+        )
 
         serializer = AttendanceRecordSerializer(created_records, many=True)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
+    @action(detail=False, methods=["post"], url_path="bulk")
+    def bulk(self, request):
+        user = request.user
+        if user.role != "TCR":
+            return Response(
+                {"detail": "Not authorized"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        course_id = request.data.get("course_id")
+        records = request.data.get("records", [])
+        course = get_object_or_404(Course, id=course_id, teacher=user)
+
+        if not isinstance(records, list):
+            return Response(
+                {"detail": "records must be a list."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        _, results = AttendanceService.take_attendance(
+            course, records, default_date=batch_date(request)
+        )
+        accepted = sum(1 for r in results if r["status"] == "accepted")
+
+        return Response({
+            "course_id": course.id,
+            "accepted": accepted,
+            "rejected": len(results) - accepted,
+            "results": results,
+        }, status=status.HTTP_201_CREATED)
+
 
 class AttendanceStatsView(APIView):
     permission_classes = [IsAuthenticated]
@@ -78,55 +138,11 @@ class AttendanceStatsView(APIView):
             )
 
         course = get_object_or_404(Course, id=course_id, teacher=user)
-        students = course.students.all()
-        data = []
-
-        for student in students:
-            records = AttendanceRecord.objects.filter(
-                course=course,
-                student=student
-            ).order_by("date")
-
-            total_lectures = records.count()
-            total_score = 0.0
-            timeline = []
-
-            for record in records:
-                if record.status == "P":
-                    score = 1.0
-                    status_text = "Present"
-                elif record.status == "L":
-                    score = 0.7
-                    status_text = "Late"
-                else:
-                    score = 0.0
-                    status_text = "Absent"
-
-                total_score += score
-
-                timeline.append({
-                    "date": record.date,
-                    "status": status_text,
-                    "notes": record.notes
-                })
-
-            attendance_rate = (
-                round((total_score / total_lectures) * 100, 2)
-                if total_lectures > 0 else 0
-            )
-
-            grade_out_of_5 = round((attendance_rate / 100) * 5, 2)
-
-            data.append({
-                "id": student.id,
-                "name": student.full_name,
-                "username": student.user.username if hasattr(student, "user") else "",
-                "fullId": student.fullId,
-                "total_lectures": total_lectures,
-                "attendance_rate": attendance_rate,
-                "grade_out_of_5": grade_out_of_5,
-                "timeline": timeline
-            })
+        options = timeline_options(request)
+        data = cached_response_data(
+            "stats", course.id, request,
+            lambda: CourseAttendanceStats(course, **options).as_list()
+        )
 
         return Response(data, status=status.HTTP_200_OK)
 class StudentAttendanceView(APIView):
@@ -143,46 +159,122 @@ class StudentAttendanceView(APIView):
         except Course.DoesNotExist:
             return Response({"detail": "Not enrolled in this course"}, status=403)
 
-        records = AttendanceRecord.objects.filter(student=student_data, course=course).order_by("date")
-        timeline = []
-        total_score = 0.0
-
-        for record in records:
-            if record.status == "P":
-                score = 1.0
-                status_text = "Present"
-            elif record.status == "L":
-                score = 0.7
-                status_text = "Late"
-            else:
-                score = 0.0
-                status_text = "Absent"
-
-            total_score += score
-            timeline.append({
-                "date": record.date,
-                "status": status_text,
-                "notes": record.notes
-            })
-
-        total_lectures = records.count()
-        attendance_rate = round((total_score / total_lectures) * 100, 2) if total_lectures else 0
-        grade_out_of_5 = round((attendance_rate / 100) * 5, 2)
-
+        options = timeline_options(request)
         today_date = localdate()
-        upcoming_classes = course.schedule.filter(date=today_date).values("id", "topic", "start_time", "end_time") if hasattr(course, "schedule") else []
 
-        return Response({
-            "student": student_data.student.username,
-            "course_title": course.title,
-            "course_instructor": course.teacher.get_full_name() if course.teacher else "TBA",
-            "attendance_rate": attendance_rate,
-            "grade_out_of_5": grade_out_of_5,
-            "timeline": timeline,
-            "today": {
-                "date": today_date,
-                "attended": sum(1 for r in records if r.status == "P"),
-                "total": len(upcoming_classes),
-                "classes": list(upcoming_classes)
+        def build():
+            summary = AttendanceSummary.objects.filter(student=student_data, course=course).first() \
+                or AttendanceSummary(student=student_data, course=course)
+
+            upcoming_classes = course.schedule.filter(date=today_date).values("id", "topic", "start_time", "end_time") if hasattr(course, "schedule") else []
+
+            data = {
+                "student": student_data.student.username,
+                "course_title": course.title,
+                "course_instructor": course.teacher.get_full_name() if course.teacher else "TBA",
+                "attendance_rate": summary.attendance_rate,
+                "grade_out_of_5": summary.grade_out_of_5,
+                "today": {
+                    "date": today_date,
+                    "attended": summary.present_count,
+                    "total": len(upcoming_classes),
+                    "classes": list(upcoming_classes)
+                }
             }
-        }, status=status.HTTP_200_OK)
+            if options["include_timeline"]:
+                records = []
+                for source in history({"student": student_data, "course": course}, options["include_archived"]):
+                    records.extend(window(source, options["date_from"], options["date_to"]).order_by("date"))
+                records.sort(key=lambda record: record.date)
+                data["timeline"] = [timeline_entry(record) for record in records]
+            return data
+
+        data = cached_response_data(
+            f"student:{student_data.id}:{today_date}", course.id, request, build
+        )
+
+        return Response(data, status=status.HTTP_200_OK)
+
+
+class AttendanceTimelineView(generics.ListAPIView):
+    """Keyset-paginated attendance history for one course.
+
+    Teachers see the whole course, optionally narrowed with ``student_id``;
+    students only ever see their own records. Only live records are listed;
+    archived history is served by the stats and student views with
+    ``include_archived``.
+    """
+    serializer_class = TimelineEntrySerializer
+    pagination_class = TimelineCursorPagination
+    permission_classes = [IsAuthenticated]
+
+    def get_queryset(self):
+        user = self.request.user
+        course_id = self.kwargs["course_id"]
+
+        if user.role == "TCR":
+            course = get_object_or_404(Course, id=course_id, teacher=user)
+            records = AttendanceRecord.objects.filter(course=course)
+            student_id = self.request.query_params.get("student_id")
+            if student_id:
+                if not student_id.isdigit():
+                    raise ValidationError({"student_id": "Must be an integer."})
+                records = records.filter(student_id=student_id)
+        else:
+            student_data = StudentData.objects.filter(student=user, courses__id=course_id).first()
+            if student_data is None:
+                raise PermissionDenied("Not enrolled in this course")
+            records = AttendanceRecord.objects.filter(student=student_data, course_id=course_id)
+
+        options = timeline_options(self.request)
+        return window(records, options["date_from"], options["date_to"])
+
+
+
+class AttendanceExportView(APIView):
+    """Stream a course's attendance as CSV or NDJSON (``?output=``),
+    optionally gzip-compressed with ``?compress=gzip``."""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, course_id):
+        user = request.user
+        if user.role != "TCR":
+            return Response(
+                {"detail": "Not authorized"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        course = get_object_or_404(Course, id=course_id, teacher=user)
+
+        output = request.query_params.get("output", "csv")
+        if output not in EXPORT_FORMATS:
+            return Response(
+                {"detail": f"output must be one of: {', '.join(EXPORT_FORMATS)}."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        compress = request.query_params.get("compress")
+        if compress not in (None, "", "gzip"):
+            return Response(
+                {"detail": "compress must be gzip."},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        formatter, content_type, extension = EXPORT_FORMATS[output]
+        stream = formatter(export_rows(course))
+        filename = f"attendance_course_{course.id}.{extension}"
+        if compress:
+            stream = gzip_stream(stream)
+            content_type = "application/gzip"
+            filename += ".gz"
+
+        response = StreamingHttpResponse(stream, content_type=content_type)
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
+
+
+
+class AttendanceCacheStatsView(APIView):
+    permission_classes = [IsAdminUser]
+
+    def get(self, request):
+        return Response(cache_stats(), status=status.HTTP_200_OK)
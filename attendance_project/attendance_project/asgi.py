@@ -2,20 +2,24 @@
 import os
 import django
 from django.core.asgi import get_asgi_application
-from channels.routing import ProtocolTypeRouter, URLRouter
-from channels.auth import AuthMiddlewareStack
+from channels.routing import ChannelNameRouter, ProtocolTypeRouter, URLRouter
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'attendance_project.settings')
 
 django.setup()
 
+from notifications.consumers import OutboxWorkerConsumer
 from notifications.routing import websocket_urlpatterns
+from notifications.services import OUTBOX_CHANNEL
 
 application = ProtocolTypeRouter({
     "http": get_asgi_application(),
-    "websocket": AuthMiddlewareStack(
-        URLRouter(websocket_urlpatterns)
-    ),
+    # The notification socket authenticates from its JWT, so no session
+    # or cookie lookup runs on connect.
+    "websocket": URLRouter(websocket_urlpatterns),
+    "channel": ChannelNameRouter({
+        OUTBOX_CHANNEL: OutboxWorkerConsumer.as_asgi(),
+    }),
 })
 
 print("ASGI application loaded with WebSocket support")
@@ -145,13 +145,40 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "accounts.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_PERMISSION_CLASSES": (
         "rest_framework.permissions.IsAuthenticated",
     ),
+    # Reverse proxies in front of the app. Leave unset when clients connect
+    # directly: the per-address throttles then ignore X-Forwarded-For,
+    # which any client can forge.
+    "NUM_PROXIES": config('NUM_PROXIES', default=None, cast=lambda v: None if v in (None, '') else int(v)),
 }
 
+# Token buckets guarding login and token refresh (see accounts/throttling.py),
+# as (capacity, seconds to refill it). A whole campus can sit behind one NAT
+# address, so the per-address buckets are generous; the per-account ones do
+# the real guessing protection.
+LOGIN_THROTTLE_RATES = {
+    "login_ip": (config('LOGIN_THROTTLE_IP_PER_MINUTE', default=600, cast=int), 60),
+    "login_identifier": (config('LOGIN_THROTTLE_IDENTIFIER_PER_MINUTE', default=5, cast=int), 60),
+    "refresh_ip": (config('REFRESH_THROTTLE_IP_PER_MINUTE', default=1200, cast=int), 60),
+    "refresh_user": (config('REFRESH_THROTTLE_USER_PER_MINUTE', default=10, cast=int), 60),
+}
+# Password hashes a process runs at once during login, and how long a login
+# waits for a free slot before getting a 429.
+LOGIN_HASH_CONCURRENCY = config('LOGIN_HASH_CONCURRENCY', default=4, cast=int)
+LOGIN_HASH_WAIT_SECONDS = 0.5
+
+# How long CachedJWTAuthentication keeps a resolved user; entries are also
+# dropped whenever the user is saved.
+AUTH_USER_CACHE_SECONDS = 60
+
+# Largest roster the upload API provisions within the request; hashing runs
+# in the web worker, so bigger rosters go through `manage.py provision_roster`.
+ROSTER_UPLOAD_MAX_ROWS = config('ROSTER_UPLOAD_MAX_ROWS', default=200, cast=int)
+
 SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),
     "REFRESH_TOKEN_LIFETIME": timedelta(days=7),
@@ -178,3 +205,56 @@ CHANNEL_LAYERS = {
     }
 }
 
+# Cache used for the attendance read endpoints. Set CACHE_URL to a
+# redis:// URL in production so every worker shares the same entries.
+CACHE_URL = config('CACHE_URL', default='')
+
+if CACHE_URL:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.redis.RedisCache",
+            "LOCATION": CACHE_URL,
+        }
+    }
+else:
+    CACHES = {
+        "default": {
+            "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+            "LOCATION": "attendance",
+        }
+    }
+
+ATTENDANCE_CACHE_TIMEOUT = 300
+
+# Notification outbox delivery (see notifications/outbox.py): failed rows
+# are retried with exponential backoff, then dead-lettered.
+NOTIFICATION_OUTBOX_MAX_ATTEMPTS = config('NOTIFICATION_OUTBOX_MAX_ATTEMPTS', default=5, cast=int)
+NOTIFICATION_OUTBOX_BACKOFF_SECONDS = 30
+NOTIFICATION_OUTBOX_MAX_BACKOFF_SECONDS = 3600
+# How long a worker owns the rows it claimed before another one may take
+# them over.
+NOTIFICATION_OUTBOX_CLAIM_SECONDS = 300
+# Most notifications replayed to a reconnecting socket; past this the client
+# reloads the inbox instead.
+NOTIFICATION_REPLAY_LIMIT = config('NOTIFICATION_REPLAY_LIMIT', default=100, cast=int)
+# Sockets connected with ?coalesce=1 get bursts as one notifications_batch
+# frame: flushed after a quiet window, a maximum delay or a full batch.
+NOTIFICATION_COALESCE_WINDOW_MS = 50
+NOTIFICATION_COALESCE_MAX_DELAY_MS = 250
+NOTIFICATION_COALESCE_MAX_BATCH = 50
+# Caches of the notification socket (see notifications/auth.py): validated
+# tokens, in process, and each user's course ids, in the shared cache and
+# dropped on every enrollment or teacher change.
+NOTIFICATION_WS_TOKEN_CACHE_SECONDS = 300
+NOTIFICATION_WS_MEMBERSHIP_CACHE_SECONDS = 3600
+
+# Notification retention (see notifications/retention.py), in days; None
+# keeps rows forever. Titles listed in NOTIFICATION_TITLE_RETENTION_DAYS
+# expire sooner than the general limit.
+NOTIFICATION_RETENTION_DAYS = config('NOTIFICATION_RETENTION_DAYS', default=365, cast=int)
+NOTIFICATION_READ_RETENTION_DAYS = config('NOTIFICATION_READ_RETENTION_DAYS', default=90, cast=int)
+NOTIFICATION_TITLE_RETENTION_DAYS = {
+    "Course Enrollment": 30,
+    "Course Assignment": 90,
+}
+NOTIFICATION_OUTBOX_RETENTION_DAYS = 7
@@ -12,13 +12,17 @@ class CourseSubject(Subject):
             sender = self.course.teacher
             self.attach(UserObserver(student_user, sender=sender))
 
+    def attach_enrolled_students(self):
+        """Attach every student enrolled in the course, loaded in one query."""
+        for student_data in self.course.students.select_related("student"):
+            self.attach_student(student_data.student)
+
     def attach_teacher(self, teacher_user):
         if teacher_user:
             self.attach(UserObserver(teacher_user, sender=teacher_user))
     def notify(self, message, title="Notification", sender=None, **kwargs):
-        for observer in self._observers:
-            observer.update(
-            message=message,
+        super().notify(
+            message,
             title=title,
             sender=sender,
             course=self.course,
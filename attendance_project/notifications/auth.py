@@ -0,0 +1,109 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework_simplejwt.models import TokenUser
+from rest_framework_simplejwt.tokens import AccessToken
+
+
+class TTLCache:
+    """Small thread-safe in-process cache with per-entry expiry; the
+    oldest entries are dropped past ``maxsize``."""
+
+    def __init__(self, maxsize=10000):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires = entry
+            if expires <= time.monotonic():
+                del self._entries[key]
+                return None
+            return value
+
+    def set(self, key, value, timeout):
+        with self._lock:
+            self._entries.pop(key, None)
+            self._entries[key] = (value, time.monotonic() + timeout)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+token_users = TTLCache()
+
+
+def _membership_version_key(user_id):
+    return f"notifications:courses:{user_id}:version"
+
+
+def cached_course_ids(user_id):
+    """Return ``(course_ids, version)`` for a user's sockets from the shared
+    cache; ``course_ids`` is ``None`` on a miss.
+
+    Entries are stored under a per-user version that
+    ``invalidate_course_ids`` drops whenever an enrollment or teacher
+    change commits, in whichever process it happens. A missing version is
+    seeded from the clock, so a dropped one never comes back to entries
+    stored under it. Called straight from the consumer: the lookup needs
+    no database and is not worth a thread-pool hop.
+    """
+    key = _membership_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return cache.get(f"notifications:courses:{user_id}:v{version}"), version
+
+
+def store_course_ids(user_id, version, course_ids):
+    cache.set(
+        f"notifications:courses:{user_id}:v{version}",
+        course_ids,
+        settings.NOTIFICATION_WS_MEMBERSHIP_CACHE_SECONDS,
+    )
+
+
+def invalidate_course_ids(user_ids):
+    cache.delete_many([_membership_version_key(user_id) for user_id in user_ids])
+
+# Claims ClaimsRefreshToken adds; older tokens fall back to a user lookup.
+USER_CLAIMS = ("username", "role")
+
+
+def user_from_token(raw_token):
+    """Authorize a socket from its access token without touching the
+    database.
+
+    Returns a ``TokenUser`` built from the token's claims, cached for
+    ``NOTIFICATION_WS_TOKEN_CACHE_SECONDS`` but never past the token's
+    expiry. Returns ``None`` for a token issued without the claims. Raises
+    ``TokenError`` for an invalid or expired token.
+    """
+    user = token_users.get(raw_token)
+    if user is not None:
+        return user
+
+    token = AccessToken(raw_token)
+    if any(claim not in token for claim in USER_CLAIMS):
+        return None
+
+    user = TokenUser(token)
+    timeout = min(settings.NOTIFICATION_WS_TOKEN_CACHE_SECONDS, token["exp"] - time.time())
+    if timeout > 0:
+        token_users.set(raw_token, user, timeout)
+    return user
@@ -1,13 +1,25 @@
+import asyncio
 import json
+from channels.consumer import SyncConsumer
 from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
+from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.db.models import Q
+from students.models import Course
+from .auth import cached_course_ids, store_course_ids, user_from_token
+from .models import Notification
+from .serializers import NotificationSerializer
+from rest_framework_simplejwt.exceptions import TokenError
 from rest_framework_simplejwt.tokens import AccessToken
 from urllib.parse import parse_qs
 
 User = get_user_model()
 
 class NotificationConsumer(AsyncWebsocketConsumer):
+    coalesce = False
+    flush_task = None
+
     async def connect(self):
         print("WebSocket connection attempt received")
         
@@ -20,7 +32,7 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             await self.close()
             return
         
-        user = await self.get_user_from_token(token)
+        user = await self.authenticate(token)
         
         if not user:
             print("Invalid token")
@@ -29,10 +41,24 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         
         self.scope['user'] = user
         self.user = user
+
+        # Opt-in: buffer bursts of notifications and send them as one
+        # notifications_batch frame (see deliver()).
+        self.coalesce = query_params.get('coalesce', ['0'])[0] in ('1', 'true')
+        self.pending = []
         
         self.group_name = f"user_{user.id}"
         
         await self.channel_layer.group_add(self.group_name, self.channel_name)
+
+        # Course-wide notifications arrive once per course group instead of
+        # once per recipient.
+        self.course_groups = set()
+        course_ids, version = cached_course_ids(user.id)
+        if course_ids is None:
+            course_ids = await self.get_course_ids(user.id)
+            store_course_ids(user.id, version, course_ids)
+        await self.join_course_groups(course_ids)
         
         await self.accept()
         print(f"WebSocket connected for user: {user.username} (ID: {user.id})")
@@ -42,9 +68,25 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             'message': f'Connected as {user.username}'
         }))
 
+        # A reconnecting client passes the newest id it has seen and gets
+        # what it missed in one frame instead of reloading the inbox.
+        last_seen_id = query_params.get('last_seen_id', [None])[0]
+        if last_seen_id is not None and last_seen_id.isdigit():
+            notifications, truncated = await self.get_missed_notifications(user, int(last_seen_id))
+            await self.send(text_data=json.dumps({
+                'type': 'missed_notifications',
+                'notifications': notifications,
+                'truncated': truncated
+            }))
+
     async def disconnect(self, close_code):
+        # Whatever is still buffered is replayed on reconnect.
+        if self.flush_task is not None:
+            self.flush_task.cancel()
         if hasattr(self, 'group_name'):
             await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        for group in getattr(self, 'course_groups', ()):
+            await self.channel_layer.group_discard(group, self.channel_name)
         print(f"🔌 WebSocket disconnected with code: {close_code}")
 
     async def receive(self, text_data):
@@ -66,22 +108,111 @@ class NotificationConsumer(AsyncWebsocketConsumer):
         notification_data = event.get('notification', {})
         print(f"Sending notification via WebSocket: {notification_data}")
         
-        await self.send(text_data=json.dumps({
-            'type': 'new_notification',
-            'notification': notification_data
-        }))
+        await self.deliver(notification_data)
+
+    async def send_course_notification(self, event):
+        """Course-wide notification: look up this user's receipt of the
+        message, or ignore the event when the user did not get one."""
+        receipt = await self.get_receipt(event.get('message_id'))
+        if receipt is None:
+            return
+
+        await self.deliver({**event.get('notification', {}), **receipt})
+
+    async def deliver(self, notification):
+        """Send one notification, or buffer it in coalescing mode.
+
+        The buffer is flushed once no new notification arrived for
+        ``NOTIFICATION_COALESCE_WINDOW_MS``, but never later than
+        ``NOTIFICATION_COALESCE_MAX_DELAY_MS`` after its first entry, and
+        right away when it holds ``NOTIFICATION_COALESCE_MAX_BATCH``.
+        """
+        if not self.coalesce:
+            await self.send(text_data=json.dumps({
+                'type': 'new_notification',
+                'notification': notification
+            }))
+            return
+
+        loop = asyncio.get_running_loop()
+        if not self.pending:
+            self.batch_started = loop.time()
+        self.pending.append(notification)
+        if len(self.pending) >= settings.NOTIFICATION_COALESCE_MAX_BATCH:
+            await self.flush()
+            return
+
+        if self.flush_task is not None:
+            self.flush_task.cancel()
+        waited = loop.time() - self.batch_started
+        delay = min(
+            settings.NOTIFICATION_COALESCE_WINDOW_MS / 1000,
+            max(settings.NOTIFICATION_COALESCE_MAX_DELAY_MS / 1000 - waited, 0),
+        )
+        self.flush_task = asyncio.ensure_future(self.flush_later(delay))
+
+    async def flush_later(self, delay):
+        await asyncio.sleep(delay)
+        await self.flush()
+
+    async def flush(self):
+        """Send the buffered notifications. Also called ahead of other
+        frames so they never overtake a pending batch."""
+        task, self.flush_task = self.flush_task, None
+        if task is not None and task is not asyncio.current_task():
+            task.cancel()
+        batch, self.pending = self.pending, []
+        if batch:
+            await self.send(text_data=json.dumps({
+                'type': 'notifications_batch',
+                'notifications': batch
+            }))
+
+    async def course_subscribe(self, event):
+        await self.join_course_groups(event.get('course_ids', []))
+
+    async def course_unsubscribe(self, event):
+        for course_id in event.get('course_ids', []):
+            group = f"course_{course_id}"
+            if group in self.course_groups:
+                self.course_groups.discard(group)
+                await self.channel_layer.group_discard(group, self.channel_name)
+
+    async def join_course_groups(self, course_ids):
+        for course_id in course_ids:
+            group = f"course_{course_id}"
+            if group not in self.course_groups:
+                self.course_groups.add(group)
+                await self.channel_layer.group_add(group, self.channel_name)
 
     async def notification_read(self, event):
+        await self.flush()
         await self.send(text_data=json.dumps({
             'type': 'notification_read',
             'notification_id': event.get('notification_id')
         }))
 
     async def all_notifications_read(self, event):
+        await self.flush()
         await self.send(text_data=json.dumps({
             'type': 'all_notifications_read'
         }))
 
+    async def authenticate(self, token):
+        """Resolve the connecting user from the token's claims (no database
+        query, no thread-pool hop); tokens without the claims fall back to
+        loading the user."""
+        if token.startswith('Bearer '):
+            token = token[7:]
+        try:
+            user = user_from_token(token)
+        except TokenError as e:
+            print(f"Token validation error: {e}")
+            return None
+        if user is None:
+            user = await self.get_user_from_token(token)
+        return user
+
     @database_sync_to_async
     def get_user_from_token(self, token):
         try:
@@ -96,4 +227,48 @@ class NotificationConsumer(AsyncWebsocketConsumer):
             
         except Exception as e:
             print(f"Token validation error: {e}")
-            return None
\ No newline at end of file
+            return None
+
+    @database_sync_to_async
+    def get_missed_notifications(self, user, last_seen_id):
+        """Inbox notifications newer than ``last_seen_id``, oldest first and
+        at most ``NOTIFICATION_REPLAY_LIMIT`` of them. ``truncated`` tells
+        the client there were more."""
+        limit = settings.NOTIFICATION_REPLAY_LIMIT
+        missed = list(
+            Notification.objects.filter(user_id=user.id, id__gt=last_seen_id)
+            .exclude(content__sender_id=user.id)
+            .select_related('content__sender', 'content__course')
+            .order_by('id')[:limit + 1]
+        )
+        return NotificationSerializer(missed[:limit], many=True).data, len(missed) > limit
+
+    @database_sync_to_async
+    def get_receipt(self, message_id):
+        return (
+            Notification.objects.filter(content_id=message_id, user_id=self.user.id)
+            .values('id', 'is_read')
+            .first()
+        )
+
+    @database_sync_to_async
+    def get_course_ids(self, user_id):
+        return list(
+            Course.objects.filter(Q(students__student_id=user_id) | Q(teacher_id=user_id))
+            .values_list('id', flat=True)
+            .distinct()
+        )
+
+
+class OutboxWorkerConsumer(SyncConsumer):
+    """Background worker for the notification outbox.
+
+    Run it with ``python manage.py runworker notification-outbox``. Every
+    committed outbox row sends it an ``outbox.wake`` message; retries that
+    are waiting out their backoff are picked up by the next wake-up or by
+    ``process_notification_outbox --interval``.
+    """
+
+    def outbox_wake(self, message):
+        from .outbox import drain
+        drain()
@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from notifications.outbox import drain, outbox_metrics, retry_dead
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued notifications from the outbox in batches. Runs once "
+        "by default; pass --interval to keep polling as a worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size", type=int, default=100,
+            help="Outbox rows delivered per transaction (default: 100).",
+        )
+        parser.add_argument(
+            "--interval", type=float,
+            help="Keep running and poll for due rows every this many seconds.",
+        )
+        parser.add_argument(
+            "--retry-dead", action="store_true",
+            help="Requeue dead-lettered rows before delivering.",
+        )
+
+    def handle(self, *args, **options):
+        if options["retry_dead"]:
+            self.stdout.write(f"Requeued {retry_dead()} dead-lettered rows.")
+
+        while True:
+            processed = drain(options["batch_size"])
+            if processed or not options["interval"]:
+                metrics = outbox_metrics()
+                self.stdout.write(
+                    f"Processed {processed} outbox rows "
+                    f"(pending {metrics['pending']}, dead {metrics['dead']})."
+                )
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
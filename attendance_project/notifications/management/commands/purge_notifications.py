@@ -0,0 +1,40 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from notifications.retention import run_retention
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete notifications past their retention limits (see the "
+        "NOTIFICATION_*_RETENTION_DAYS settings), orphaned messages and old "
+        "delivered outbox rows, in small rate-limited chunks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--chunk-size", type=int, default=1000,
+            help="Rows deleted per statement (default: 1000).",
+        )
+        parser.add_argument(
+            "--pause", type=float, default=0.1,
+            help="Seconds to sleep between chunks (default: 0.1).",
+        )
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Only report how many rows would be purged.",
+        )
+
+    def handle(self, *args, **options):
+        if options["chunk_size"] < 1:
+            raise CommandError("--chunk-size must be positive.")
+        if options["pause"] < 0:
+            raise CommandError("--pause cannot be negative.")
+
+        report = run_retention(options["chunk_size"], options["pause"], options["dry_run"])
+
+        verb = "Would purge" if options["dry_run"] else "Purged"
+        for name, count in report["purged"].items():
+            self.stdout.write(f"{name}: {count}")
+        self.stdout.write(self.style.SUCCESS(
+            f"{verb} {report['total']} rows in {report['elapsed_seconds']}s."
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 6.0 on 2026-10-18 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0004_notification_course'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='notification',
+            name='batch_id',
+            field=models.UUIDField(blank=True, db_index=True, editable=False, null=True),
+        ),
+    ]
@@ -0,0 +1,100 @@
+from django.core.management.color import no_style
+from django.db import migrations
+from django.db.models import Max, OuterRef, Subquery
+
+BATCH_SIZE = 2000
+MESSAGE_FIELDS = ("sender_id", "title", "message", "course_id", "course_title")
+
+
+def message_key(row):
+    # Rows of one bulk fan-out share a batch id. Older broadcasts were
+    # written one row per recipient, so identical content from the same
+    # sender within the same second counts as one broadcast.
+    if row.batch_id:
+        return ("batch", row.batch_id)
+    return ("row",) + tuple(getattr(row, name) for name in MESSAGE_FIELDS) + (
+        row.created_at.replace(microsecond=0),
+    )
+
+
+def split_messages(apps, schema_editor):
+    Notification = apps.get_model("notifications", "Notification")
+    NotificationMessage = apps.get_model("notifications", "NotificationMessage")
+
+    # Message ids are assigned here so one bulk insert per chunk works on
+    # backends that do not return primary keys from bulk_create().
+    next_id = (NotificationMessage.objects.aggregate(last=Max("id"))["last"] or 0) + 1
+    previous = {}
+    last_id = 0
+
+    while True:
+        rows = list(
+            Notification.objects.filter(id__gt=last_id, content__isnull=True).order_by("id")[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+
+        current = {}
+        messages = []
+        for row in rows:
+            key = message_key(row)
+            message_id = current.get(key) or previous.get(key)
+            if message_id is None:
+                message_id = next_id
+                next_id += 1
+                messages.append(NotificationMessage(
+                    id=message_id, **{name: getattr(row, name) for name in MESSAGE_FIELDS}
+                ))
+            current[key] = message_id
+            row.content_id = message_id
+
+        NotificationMessage.objects.bulk_create(messages)
+        Notification.objects.bulk_update(rows, ["content"], batch_size=500)
+        # created_at is auto_now_add, so copy the original timestamp over
+        # from the first receipt of every new message.
+        NotificationMessage.objects.filter(id__in=[m.id for m in messages]).update(
+            created_at=Subquery(
+                Notification.objects.filter(content_id=OuterRef("id")).order_by("id").values("created_at")[:1]
+            )
+        )
+
+        # A broadcast can straddle two chunks, never more.
+        previous = current
+        last_id = rows[-1].id
+
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        for sql in connection.ops.sequence_reset_sql(no_style(), [NotificationMessage]):
+            cursor.execute(sql)
+
+
+def merge_messages(apps, schema_editor):
+    Notification = apps.get_model("notifications", "Notification")
+
+    last_id = 0
+    while True:
+        rows = list(
+            Notification.objects.filter(id__gt=last_id, content__isnull=False)
+            .select_related("content")
+            .order_by("id")[:BATCH_SIZE]
+        )
+        if not rows:
+            break
+        for row in rows:
+            for name in MESSAGE_FIELDS:
+                setattr(row, name, getattr(row.content, name))
+        Notification.objects.bulk_update(
+            rows, ["sender", "title", "message", "course", "course_title"], batch_size=500
+        )
+        last_id = rows[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0007_notificationmessage'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_messages, merge_messages),
+    ]
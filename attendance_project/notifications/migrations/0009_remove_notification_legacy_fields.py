@@ -0,0 +1,55 @@
+# Generated by Django 6.0 on 2026-10-18 15:45
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0008_split_notification_messages'),
+    ]
+
+    operations = [
+        # Give the required columns a default first, so unapplying this
+        # migration can re-add them to existing rows before 0008 fills them.
+        migrations.AlterField(
+            model_name='notification',
+            name='title',
+            field=models.CharField(default='', max_length=255),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='message',
+            field=models.TextField(default=''),
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='batch_id',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='course',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='course_title',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='message',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='sender',
+        ),
+        migrations.RemoveField(
+            model_name='notification',
+            name='title',
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='content',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='notifications.notificationmessage'),
+        ),
+    ]
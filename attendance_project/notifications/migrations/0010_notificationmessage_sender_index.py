@@ -0,0 +1,20 @@
+# Generated by Django 6.0 on 2026-10-18 16:20
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0009_remove_notification_legacy_fields'),
+        ('students', '0007_alter_studentdata_courses'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notificationmessage',
+            index=models.Index(fields=['sender', 'created_at'], name='notif_message_sender_idx'),
+        ),
+    ]
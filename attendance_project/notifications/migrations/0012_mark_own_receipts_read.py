@@ -0,0 +1,22 @@
+from django.db import migrations
+from django.db.models import F
+
+
+def mark_own_receipts_read(apps, schema_editor):
+    # Receipts of a user's own broadcasts are created read now; bring the
+    # existing ones in line so the unread count can skip the message join.
+    Notification = apps.get_model("notifications", "Notification")
+    Notification.objects.filter(
+        is_read=False, content__sender_id=F("user_id")
+    ).update(is_read=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0011_notification_user_unread_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(mark_own_receipts_read, migrations.RunPython.noop),
+    ]
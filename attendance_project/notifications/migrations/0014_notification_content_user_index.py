@@ -0,0 +1,25 @@
+# Generated by Django 6.0 on 2026-10-18 16:20
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications', '0013_notification_user_replay_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['content', 'user'], name='notification_content_user_idx'),
+        ),
+        migrations.AlterField(
+            model_name='notification',
+            name='content',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='receipts', to='notifications.notificationmessage'),
+        ),
+    ]
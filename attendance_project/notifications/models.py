@@ -1,42 +1,153 @@
 from django.db import models
+from django.utils import timezone
 from accounts.models import User
 from students.models import Course
 
-class Notification(models.Model):
-    user = models.ForeignKey(
-        User, on_delete=models.CASCADE, related_name="notifications"
-    )
+class NotificationMessage(models.Model):
+    """The content of a notification, stored once per broadcast and shared
+    by the ``Notification`` receipt of every recipient."""
+
     sender = models.ForeignKey(
-        User, on_delete=models.SET_NULL, null=True, blank=True, 
-        related_name="sent_notifications"
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="sent_notification_messages"
     )
     title = models.CharField(max_length=255)
     message = models.TextField()
     course = models.ForeignKey(
-        Course, on_delete=models.SET_NULL, null=True, blank=True, 
-        related_name="notifications"
+        Course, on_delete=models.SET_NULL, null=True, blank=True,
+        related_name="notification_messages"
     )
     course_title = models.CharField(max_length=255, null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
-    is_read = models.BooleanField(default=False)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["sender", "created_at"], name="notif_message_sender_idx"),
+        ]
 
     def __str__(self):
         return self.title
-    
+
     def save(self, *args, **kwargs):
         if self.course:
             self.course_title = self.course.title
         elif not self.course_title:
             self.course_title = None
         super().save(*args, **kwargs)
-    
+
+
+class NotificationManager(models.Manager):
+    MESSAGE_FIELDS = ("sender", "title", "message", "course", "course_title")
+
+    def create(self, **kwargs):
+        """Also accept the message fields (``title``, ``message``,
+        ``sender``, ``course``) directly and store them in a new
+        ``NotificationMessage`` for this one receipt."""
+        if "content" not in kwargs and "content_id" not in kwargs:
+            fields = {name: kwargs.pop(name) for name in self.MESSAGE_FIELDS if name in kwargs}
+            kwargs["content"] = NotificationMessage.objects.create(**fields)
+        return super().create(**kwargs)
+
+
+class Notification(models.Model):
+    """One recipient's receipt of a ``NotificationMessage``."""
+
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="notifications", db_index=False
+    )
+    content = models.ForeignKey(
+        NotificationMessage, on_delete=models.CASCADE, related_name="receipts", db_index=False
+    )
+    created_at = models.DateTimeField(auto_now_add=True)
+    is_read = models.BooleanField(default=False)
+    read_at = models.DateTimeField(null=True, blank=True)
+
+    objects = NotificationManager()
+
+    def __str__(self):
+        return self.title
+
+    @property
+    def title(self):
+        return self.content.title
+
+    @property
+    def message(self):
+        return self.content.message
+
+    @property
+    def sender(self):
+        return self.content.sender
+
+    @property
+    def course(self):
+        return self.content.course
+
+    @property
+    def course_title(self):
+        return self.content.course_title
+
     @property
     def course_code(self):
         return None
     
     @property
     def course_id(self):
-        return self.course.id if self.course else None
+        return self.content.course_id
     
     class Meta:
-        pass
\ No newline at end of file
+        # Serves the unread badge count and the inbox; it also replaces
+        # the plain user_id FK index.
+        indexes = [
+            models.Index(fields=["user", "is_read", "created_at"], name="notification_user_unread_idx"),
+            # Range scan for replaying what a reconnecting socket missed.
+            models.Index(fields=["user", "id"], name="notification_user_replay_idx"),
+            # A socket resolving its receipt of a course-wide message; it
+            # also replaces the plain content_id FK index.
+            models.Index(fields=["content", "user"], name="notification_content_user_idx"),
+        ]
+
+
+class NotificationOutbox(models.Model):
+    """A notification fan-out waiting for the delivery worker.
+
+    Rows are written in the caller's transaction and turned into
+    ``Notification`` rows plus WebSocket messages by
+    ``notifications.outbox.process_batch``, run by the
+    ``process_notification_outbox`` command or the ``notification-outbox``
+    Channels worker.
+    """
+
+    PENDING = "pending"
+    DELIVERED = "delivered"
+    DEAD = "dead"
+    STATUS_CHOICES = [
+        (PENDING, "Pending"),
+        (DELIVERED, "Delivered"),
+        (DEAD, "Dead"),
+    ]
+
+    recipient_ids = models.JSONField()
+    sender = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    course = models.ForeignKey(
+        Course, on_delete=models.SET_NULL, null=True, blank=True, related_name="+"
+    )
+    title = models.CharField(max_length=255, default="Notification")
+    message = models.TextField()
+
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default=PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    delivered_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "available_at"], name="outbox_status_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.title} -> {len(self.recipient_ids)} recipients ({self.status})"
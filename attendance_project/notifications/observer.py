@@ -3,4 +3,13 @@ from abc import ABC, abstractmethod
 class Observer(ABC):
     @abstractmethod
     def update(self, message: str, **kwargs):
-        raise NotImplementedError
\ No newline at end of file
+        raise NotImplementedError
+
+    @classmethod
+    def update_many(cls, observers, message: str, **kwargs):
+        """Deliver one message to several observers of this class.
+
+        Subclasses override this when they can deliver to all of them at
+        once; the default simply calls ``update()`` on each."""
+        for observer in observers:
+            observer.update(message, **kwargs)
\ No newline at end of file
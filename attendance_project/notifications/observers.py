@@ -17,4 +17,23 @@ class UserObserver(Observer):
             sender=sender,
             course=course,
             title=title
-        )
\ No newline at end of file
+        )
+
+    @classmethod
+    def update_many(cls, observers, message: str, **kwargs):
+        title = kwargs.get('title', 'Notification')
+        course = kwargs.get('course', None)
+
+        by_sender = {}
+        for observer in observers:
+            sender = kwargs.get('sender', observer.sender)
+            by_sender.setdefault(sender, []).append(observer.user)
+
+        for sender, users in by_sender.items():
+            NotificationService.enqueue(
+                users,
+                message,
+                sender=sender,
+                course=course,
+                title=title
+            )
\ No newline at end of file
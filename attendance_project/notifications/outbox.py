@@ -0,0 +1,146 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models import Min
+from django.utils import timezone
+
+from .models import NotificationOutbox
+from .services import NotificationService
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+
+def backoff(attempts):
+    """Delay before retry number ``attempts``: exponential, capped."""
+    delay = settings.NOTIFICATION_OUTBOX_BACKOFF_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(delay, settings.NOTIFICATION_OUTBOX_MAX_BACKOFF_SECONDS))
+
+
+def deliver(entry):
+    """Deliver one outbox row and record the outcome on it.
+
+    The notifications and the new status are committed together in one
+    transaction of their own; a failed delivery leaves no partial rows
+    behind. The WebSocket messages go out once it commits. After
+    ``NOTIFICATION_OUTBOX_MAX_ATTEMPTS`` failures the row is dead-lettered
+    and only an operator retries it.
+    """
+    with transaction.atomic():
+        # Re-check under a row lock: the claim may have expired and another
+        # worker delivered the row meanwhile.
+        entry = (
+            NotificationOutbox.objects.select_for_update()
+            .filter(pk=entry.pk, status=NotificationOutbox.PENDING)
+            .first()
+        )
+        if entry is None:
+            return False
+        try:
+            with transaction.atomic():
+                NotificationService.notify_users(
+                    User.objects.filter(id__in=entry.recipient_ids).order_by("id"),
+                    entry.message,
+                    sender=entry.sender,
+                    course=entry.course,
+                    title=entry.title,
+                )
+        except Exception as exc:
+            logger.exception("Delivering notification outbox row %s failed", entry.pk)
+            entry.attempts += 1
+            entry.last_error = f"{type(exc).__name__}: {exc}"
+            if entry.attempts >= settings.NOTIFICATION_OUTBOX_MAX_ATTEMPTS:
+                entry.status = NotificationOutbox.DEAD
+            else:
+                entry.available_at = timezone.now() + backoff(entry.attempts)
+            entry.save(update_fields=["attempts", "last_error", "status", "available_at"])
+            return False
+
+        entry.status = NotificationOutbox.DELIVERED
+        entry.delivered_at = timezone.now()
+        entry.save(update_fields=["status", "delivered_at"])
+        return True
+
+
+def claim(batch_size=100):
+    """Claim up to ``batch_size`` due outbox rows and return them.
+
+    The rows are picked with SKIP LOCKED, so several workers can drain the
+    outbox side by side, and pushed ``NOTIFICATION_OUTBOX_CLAIM_SECONDS``
+    into the future so no other worker takes them while they are being
+    delivered. A worker that dies mid-batch leaves its rows due again once
+    the claim runs out. The transaction only covers the claim itself.
+    """
+    with transaction.atomic():
+        entries = list(
+            NotificationOutbox.objects.filter(
+                status=NotificationOutbox.PENDING, available_at__lte=timezone.now()
+            )
+            .select_for_update(skip_locked=True)
+            .order_by("available_at", "id")[:batch_size]
+        )
+        NotificationOutbox.objects.filter(pk__in=[entry.pk for entry in entries]).update(
+            available_at=timezone.now() + timedelta(seconds=settings.NOTIFICATION_OUTBOX_CLAIM_SECONDS)
+        )
+    return entries
+
+
+def process_batch(batch_size=100):
+    """Deliver up to ``batch_size`` due outbox rows and return how many were
+    processed. Each row is delivered in its own transaction."""
+    entries = claim(batch_size)
+    for entry in entries:
+        deliver(entry)
+    return len(entries)
+
+
+def drain(batch_size=100, max_batches=None):
+    """Process batches until no due row is left (or ``max_batches`` ran)."""
+    processed = batches = 0
+    while max_batches is None or batches < max_batches:
+        count = process_batch(batch_size)
+        processed += count
+        batches += 1
+        if count < batch_size:
+            break
+    return processed
+
+
+def retry_dead(ids=None):
+    """Put dead-lettered rows back in the queue and return how many."""
+    entries = NotificationOutbox.objects.filter(status=NotificationOutbox.DEAD)
+    if ids:
+        entries = entries.filter(id__in=ids)
+    return entries.update(
+        status=NotificationOutbox.PENDING, attempts=0, available_at=timezone.now()
+    )
+
+
+def outbox_metrics():
+    """Queue depth of the notification outbox and delivery lag over the
+    last hour."""
+    now = timezone.now()
+    pending = NotificationOutbox.objects.filter(status=NotificationOutbox.PENDING)
+    oldest = pending.aggregate(oldest=Min("created_at"))["oldest"]
+
+    delivered = list(
+        NotificationOutbox.objects.filter(
+            status=NotificationOutbox.DELIVERED, delivered_at__gte=now - timedelta(hours=1)
+        ).values_list("created_at", "delivered_at")
+    )
+    lags = sorted((done - created).total_seconds() for created, done in delivered)
+
+    return {
+        "pending": pending.count(),
+        "due": pending.filter(available_at__lte=now).count(),
+        "retrying": pending.filter(attempts__gt=0).count(),
+        "dead": NotificationOutbox.objects.filter(status=NotificationOutbox.DEAD).count(),
+        "oldest_pending_seconds": round((now - oldest).total_seconds(), 3) if oldest else 0.0,
+        "delivered_last_hour": len(lags),
+        "delivery_lag_avg_seconds": round(sum(lags) / len(lags), 3) if lags else 0.0,
+        "delivery_lag_max_seconds": round(lags[-1], 3) if lags else 0.0,
+    }
@@ -0,0 +1,11 @@
+from rest_framework.pagination import CursorPagination
+
+
+class NotificationCursorPagination(CursorPagination):
+    """Newest notifications first, paginated on ``(created_at, id)`` so
+    every page is the same indexed range scan however deep it is."""
+
+    ordering = ("-created_at", "-id")
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
@@ -0,0 +1,82 @@
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Notification, NotificationMessage, NotificationOutbox
+
+
+def policies(now=None):
+    """The retention rules as ``(name, queryset)`` pairs, in the order they
+    are applied. Rules whose limit is ``None`` are left out."""
+    now = now or timezone.now()
+    rules = []
+
+    for title, days in settings.NOTIFICATION_TITLE_RETENTION_DAYS.items():
+        if days is not None:
+            rules.append((f"title:{title}", Notification.objects.filter(
+                content__title=title, created_at__lt=now - timedelta(days=days)
+            )))
+
+    if settings.NOTIFICATION_READ_RETENTION_DAYS is not None:
+        cutoff = now - timedelta(days=settings.NOTIFICATION_READ_RETENTION_DAYS)
+        # Rows read before read_at existed fall back to their age.
+        rules.append(("read", Notification.objects.filter(is_read=True).filter(
+            Q(read_at__lt=cutoff) | Q(read_at__isnull=True, created_at__lt=cutoff)
+        )))
+
+    if settings.NOTIFICATION_RETENTION_DAYS is not None:
+        rules.append(("expired", Notification.objects.filter(
+            created_at__lt=now - timedelta(days=settings.NOTIFICATION_RETENTION_DAYS)
+        )))
+
+    # Messages whose receipts are all gone.
+    rules.append(("orphaned_messages", NotificationMessage.objects.filter(receipts__isnull=True)))
+
+    if settings.NOTIFICATION_OUTBOX_RETENTION_DAYS is not None:
+        rules.append(("delivered_outbox", NotificationOutbox.objects.filter(
+            status=NotificationOutbox.DELIVERED,
+            delivered_at__lt=now - timedelta(days=settings.NOTIFICATION_OUTBOX_RETENTION_DAYS),
+        )))
+
+    return rules
+
+
+def purge(queryset, chunk_size=1000, pause=0.0):
+    """Delete the rows of ``queryset`` in primary-key chunks and return how
+    many went.
+
+    Each chunk is a short ``DELETE ... WHERE id IN (...)`` of its own, with
+    ``pause`` seconds of sleep in between, so the purge never holds locks
+    for long and leaves room for regular traffic.
+    """
+    model = queryset.model
+    deleted = 0
+    last_id = 0
+    while True:
+        ids = list(
+            queryset.filter(id__gt=last_id).order_by("id").values_list("id", flat=True)[:chunk_size]
+        )
+        if not ids:
+            break
+        deleted += model.objects.filter(id__in=ids).delete()[1].get(model._meta.label, 0)
+        last_id = ids[-1]
+        if pause and len(ids) == chunk_size:
+            time.sleep(pause)
+    return deleted
+
+
+def run_retention(chunk_size=1000, pause=0.0, dry_run=False):
+    """Apply every retention rule and report rows purged per rule and the
+    elapsed time. With ``dry_run`` the rows are only counted."""
+    start = time.monotonic()
+    purged = {}
+    for name, queryset in policies():
+        purged[name] = queryset.count() if dry_run else purge(queryset, chunk_size, pause)
+    return {
+        "purged": purged,
+        "total": sum(purged.values()),
+        "elapsed_seconds": round(time.monotonic() - start, 3),
+    }
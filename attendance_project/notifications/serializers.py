@@ -1,8 +1,11 @@
 from rest_framework import serializers
-from .models import Notification
+from .models import Notification, NotificationMessage
 
 class NotificationSerializer(serializers.ModelSerializer):
+    title = serializers.CharField(source="content.title", read_only=True)
+    message = serializers.CharField(source="content.message", read_only=True)
     sender = serializers.SerializerMethodField()
+    course = serializers.IntegerField(source="content.course_id", read_only=True)
     course_title = serializers.SerializerMethodField()  
     course_id = serializers.SerializerMethodField()
     
@@ -21,12 +24,35 @@ class NotificationSerializer(serializers.ModelSerializer):
         ]
     
     def get_sender(self, obj):
-        if obj.sender:
-            return obj.sender.get_full_name() or obj.sender.username
+        sender = obj.content.sender
+        if sender:
+            return sender.get_full_name() or sender.username
         return "System"
     
     def get_course_id(self, obj):
-        return obj.course.id if obj.course else None
+        return obj.content.course_id
     
     def get_course_title(self, obj):
-        return obj.course.title if obj.course else None
\ No newline at end of file
+        course = obj.content.course
+        return course.title if course else None
+
+
+class SentNotificationSerializer(serializers.ModelSerializer):
+    """One broadcast in the sender's outbox view; ``recipient_count`` and
+    ``read_count`` are annotated by the view."""
+    recipient_count = serializers.IntegerField(read_only=True)
+    read_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = NotificationMessage
+        fields = [
+            "id",
+            "title",
+            "message",
+            "course_id",
+            "course_title",
+            "created_at",
+            "recipient_count",
+            "read_count",
+        ]
+
@@ -1,22 +1,35 @@
+import asyncio
+import logging
+
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
-from .models import Notification
+from django.db import connection, transaction
+from students.models import StudentData
+from .auth import invalidate_course_ids
+from .models import Notification, NotificationMessage, NotificationOutbox
 from .serializers import NotificationSerializer
 
+logger = logging.getLogger(__name__)
+
+OUTBOX_CHANNEL = "notification-outbox"
+
 class NotificationService:
+    BULK_BATCH_SIZE = 1000
+
     @staticmethod
     def notify_user(user, message, sender=None, course=None, title="Notification"):
-        
+
         notification = Notification.objects.create(
             user=user,
-            title=title,  
+            title=title,
             message=message,
             sender=sender,
             course=course,
+            is_read=sender is not None and sender.pk == user.pk,
         )
-        
+
         serializer = NotificationSerializer(notification)
-        
+
         channel_layer = get_channel_layer()
         async_to_sync(channel_layer.group_send)(
             f"user_{user.id}",
@@ -24,4 +37,166 @@ class NotificationService:
                 "type": "send_notification",
                 "notification": serializer.data
             }
-        )
\ No newline at end of file
+        )
+
+    @staticmethod
+    def notify_users(users, message, sender=None, course=None, title="Notification"):
+        """Send the same notification to every user in ``users``.
+
+        The content is stored once, all receipts go in with ``bulk_create``
+        and the WebSocket messages are sent concurrently in one event-loop
+        pass once the transaction commits, instead of one insert and one
+        blocking ``group_send`` per recipient. The sender's own receipt is created read so it never
+        shows up in their unread count. Returns the notifications.
+        """
+        users = list(users)
+        if not users:
+            return []
+
+        content = NotificationMessage.objects.create(
+            title=title,
+            message=message,
+            sender=sender,
+            course=course,
+        )
+        notifications = Notification.objects.bulk_create(
+            [
+                Notification(user=user, content=content, is_read=sender is not None and sender.pk == user.pk)
+                for user in users
+            ],
+            batch_size=NotificationService.BULK_BATCH_SIZE,
+        )
+        if not connection.features.can_return_rows_from_bulk_insert:
+            notifications = list(content.receipts.order_by("id"))
+            for notification in notifications:
+                notification.content = content
+
+        messages = NotificationService.delivery_messages(notifications, course)
+
+        def send():
+            try:
+                NotificationService.broadcast(messages)
+            except Exception:
+                # The receipts are stored; the client replays them on reconnect.
+                logger.warning("Could not broadcast notification %s", content.pk, exc_info=True)
+
+        transaction.on_commit(send)
+        return notifications
+
+    @staticmethod
+    def course_group(course_id):
+        return f"course_{course_id}"
+
+    @staticmethod
+    def course_member_ids(course):
+        """Ids of the users whose sockets are subscribed to ``course``'s
+        group: the enrolled students and the teacher."""
+        member_ids = set(
+            StudentData.objects.filter(courses=course).values_list("student_id", flat=True)
+        )
+        if course.teacher_id:
+            member_ids.add(course.teacher_id)
+        return member_ids
+
+    @staticmethod
+    def delivery_messages(notifications, course=None):
+        """Build the ``(group, message)`` pairs delivering ``notifications``,
+        which are receipts of one message.
+
+        Receipts of course members go out as a single ``course_<id>`` event
+        carrying the content and the message id; every subscribed socket
+        looks up its own receipt (see ``NotificationConsumer``). The event
+        stays the same size however large the class, which matters because
+        the channel layer stores one copy per subscribed socket. Everyone
+        else gets a ``user_<id>`` message as before.
+        """
+        member_ids = NotificationService.course_member_ids(course) if course is not None else set()
+        members = [n for n in notifications if n.user_id in member_ids]
+        others = [n for n in notifications if n.user_id not in member_ids]
+
+        messages = []
+        if members:
+            content = dict(NotificationSerializer(members[0]).data)
+            del content["id"], content["is_read"]
+            messages.append((NotificationService.course_group(course.id), {
+                "type": "send_course_notification",
+                "notification": content,
+                "message_id": members[0].content_id,
+            }))
+
+        payloads = NotificationSerializer(others, many=True).data
+        messages.extend(
+            (f"user_{notification.user_id}", {"type": "send_notification", "notification": payload})
+            for notification, payload in zip(others, payloads)
+        )
+        return messages
+
+    @staticmethod
+    def broadcast(messages):
+        """``group_send`` every ``(group, message)`` pair concurrently."""
+        if not messages:
+            return
+        channel_layer = get_channel_layer()
+
+        async def send_all():
+            await asyncio.gather(*(
+                channel_layer.group_send(group, message) for group, message in messages
+            ))
+
+        async_to_sync(send_all)()
+
+    @staticmethod
+    def enqueue(users, message, sender=None, course=None, title="Notification"):
+        """Queue a notification for ``users`` in the outbox and return the
+        outbox row, or ``None`` when there is nobody to notify.
+
+        The row is part of the caller's transaction; once it commits the
+        Channels worker is woken up. Delivery happens later through
+        ``notify_users``.
+        """
+        recipient_ids = sorted({getattr(user, "pk", user) for user in users})
+        if not recipient_ids:
+            return None
+
+        entry = NotificationOutbox.objects.create(
+            recipient_ids=recipient_ids,
+            sender=sender,
+            course=course,
+            title=title,
+            message=message,
+        )
+        transaction.on_commit(NotificationService.wake_outbox_worker)
+        return entry
+
+    @staticmethod
+    def sync_course_subscriptions(user_ids, course_ids, subscribe=True):
+        """Tell the open sockets of ``user_ids`` to join (or leave) the
+        groups of ``course_ids`` once the current transaction commits, and
+        drop their cached course ids."""
+        user_ids, course_ids = set(user_ids), sorted(set(course_ids))
+        if not user_ids or not course_ids:
+            return
+        event = {
+            "type": "course_subscribe" if subscribe else "course_unsubscribe",
+            "course_ids": course_ids,
+        }
+        messages = [(f"user_{user_id}", event) for user_id in sorted(user_ids)]
+
+        def send():
+            invalidate_course_ids(user_ids)
+            try:
+                NotificationService.broadcast(messages)
+            except Exception:
+                logger.warning("Could not update course subscriptions", exc_info=True)
+
+        transaction.on_commit(send)
+
+    @staticmethod
+    def wake_outbox_worker():
+        """Nudge the ``notification-outbox`` Channels worker. Best effort:
+        if no worker is listening, the polling command still picks the
+        row up."""
+        try:
+            async_to_sync(get_channel_layer().send)(OUTBOX_CHANNEL, {"type": "outbox.wake"})
+        except Exception:
+            logger.warning("Could not wake the notification outbox worker", exc_info=True)
@@ -14,5 +14,11 @@ class Subject:
             self._observers.remove(observer)
 
     def notify(self, message: str, **kwargs):
+        for observer_class, observers in self._by_class().items():
+            observer_class.update_many(observers, message, **kwargs)
+
+    def _by_class(self):
+        groups = {}
         for observer in self._observers:
-            observer.update(message, **kwargs)
\ No newline at end of file
+            groups.setdefault(type(observer), []).append(observer)
+        return groups
\ No newline at end of file
@@ -1,10 +1,30 @@
-from django.test import TestCase
+import json
+from datetime import timedelta
+from io import StringIO
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from asgiref.sync import async_to_sync
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from channels.routing import URLRouter
+from channels.testing import WebsocketCommunicator
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
 from django.contrib.auth import get_user_model
+from django.core.management import call_command
 from django.urls import reverse
 from rest_framework.test import APIClient
 from rest_framework_simplejwt.tokens import RefreshToken
-from notifications.models import Notification
+from accounts.tokens import ClaimsRefreshToken
+from notifications.models import Notification, NotificationMessage, NotificationOutbox
+from notifications.auth import cached_course_ids, token_users
+from notifications.outbox import claim, drain, outbox_metrics, retry_dead
+from notifications.retention import purge, run_retention
+from notifications.routing import websocket_urlpatterns
 from notifications.serializers import NotificationSerializer
+from notifications.services import NotificationService
 from students.models import Course, StudentData
 
 User = get_user_model()
@@ -49,6 +69,26 @@ class NotificationModelTests(TestCase):
         self.assertEqual(data["message"], "Hello")
         self.assertEqual(data["sender"], "System")
 
+    @patch("notifications.services.get_channel_layer")
+    def test_broadcast_stores_content_once(self, mock_layer):
+        mock_layer.return_value = MagicMock(group_send=AsyncMock())
+        NotificationMessage.objects.all().delete()
+        NotificationService.notify_users(
+            [self.user, self.sender], "Shared text", sender=self.sender, course=self.course, title="Hi"
+        )
+        content = NotificationMessage.objects.get()
+        self.assertEqual(content.course_title, "Test Course")
+        self.assertEqual(content.receipts.count(), 2)
+
+        receipt = content.receipts.get(user=self.user)
+        data = NotificationSerializer(receipt).data
+        self.assertEqual(data["title"], "Hi")
+        self.assertEqual(data["message"], "Shared text")
+        self.assertEqual(data["course"], self.course.id)
+        self.assertEqual(data["course_id"], self.course.id)
+        self.assertEqual(data["course_title"], "Test Course")
+        self.assertEqual(data["sender"], self.sender.get_full_name() or self.sender.username)
+
 
 class NotificationAPIViewTests(TestCase):
     def setUp(self):
@@ -92,13 +132,130 @@ class NotificationAPIViewTests(TestCase):
             "course_id": self.course.id,
             "message": "Hello Students"
         })
-        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.status_code, 202)
+        self.assertFalse(Notification.objects.filter(content__message="Hello Students").exists())
+
+        drain()
         self.assertTrue(Notification.objects.filter(
-            user=self.student_user, message="Hello Students"
+            user=self.student_user, content__message="Hello Students"
         ).exists())
         self.assertTrue(Notification.objects.filter(
-            user=self.sender, message="Hello Students"
+            user=self.sender, content__message="Hello Students"
         ).exists())
+    @patch("notifications.services.get_channel_layer")
+    def test_send_course_notification_fans_out_in_bulk(self, mock_layer):
+        mock_layer.return_value = MagicMock(group_send=AsyncMock())
+        others = [
+            User.objects.create_user(
+                username=f"student{i}", email=f"student{i}@example.com", password="pass"
+            )
+            for i in range(5)
+        ]
+        for user in others:
+            StudentData.objects.create(student=user).courses.add(self.course)
+
+        token = self.get_token(self.sender)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        # auth user, course + teacher, enrolled students, outbox insert
+        with self.assertNumQueries(4):
+            response = self.client.post(reverse("notification-send-course"), {
+                "course_id": self.course.id,
+                "message": "Bulk hello",
+                "title": "Reminder",
+            })
+        self.assertEqual(response.status_code, 202)
+        with self.captureOnCommitCallbacks(execute=True):
+            drain()
+
+        notifications = Notification.objects.filter(content__message="Bulk hello")
+        self.assertEqual(notifications.count(), 7)
+        self.assertEqual(notifications.values("content").distinct().count(), 1)
+        self.assertTrue(all(n.course_title == "Math" for n in notifications))
+
+        sends = [
+            call.args for call in mock_layer.return_value.group_send.await_args_list
+            if call.args[1].get("notification", {}).get("title") == "Reminder"
+        ]
+        # everyone is a course member, so one course-wide event covers them
+        self.assertEqual(len(sends), 1)
+        group, event = sends[0]
+        self.assertEqual(group, f"course_{self.course.id}")
+        self.assertEqual(event["type"], "send_course_notification")
+        self.assertEqual(event["message_id"], notifications[0].content_id)
+        self.assertNotIn("receipts", event)
+
+    def test_course_event_size_does_not_grow_with_the_class(self):
+        def course_event(class_size):
+            course = Course.objects.create(title="Sized", teacher=self.sender)
+            users = [
+                User.objects.create_user(
+                    username=f"s{class_size}_{i}", email=f"s{class_size}_{i}@example.com", password="pass"
+                )
+                for i in range(class_size)
+            ]
+            for user in users:
+                StudentData.objects.create(student=user).courses.add(course)
+            notifications = NotificationService.notify_users(users, "Same text", sender=self.sender, course=course)
+            [(group, event)] = NotificationService.delivery_messages(notifications, course)
+            event["message_id"] = event["notification"]["course"] = event["notification"]["course_id"] = 0
+            return len(json.dumps(event))
+
+        self.assertEqual(course_event(2), course_event(40))
+
+    @patch("notifications.services.get_channel_layer")
+    def test_notify_users_returns_saved_rows(self, mock_layer):
+        mock_layer.return_value = MagicMock(group_send=AsyncMock())
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications = NotificationService.notify_users(
+                [self.student_user], "Hi", sender=self.sender, course=self.course
+            )
+        self.assertEqual(len(notifications), 1)
+        self.assertIsNotNone(notifications[0].pk)
+        self.assertEqual(NotificationService.notify_users([], "Hi"), [])
+        mock_layer.return_value.group_send.assert_awaited_once()
+
+    def test_inbox_is_cursor_paginated(self):
+        for i in range(5):
+            Notification.objects.create(
+                user=self.student_user, sender=self.sender, course=self.course,
+                title=f"N{i}", message="Hello"
+            )
+        Notification.objects.create(user=self.student_user, sender=self.student_user, title="Own", message="x")
+
+        token = self.get_token(self.student_user)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        url = reverse("notifications-list")
+        # auth user, one page with sender and course joined in
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"page_size": 3})
+        page = response.json()
+        self.assertEqual([n["title"] for n in page["results"]], ["N4", "N3", "N2"])
+        self.assertEqual(page["results"][0]["course_title"], "Math")
+
+        page = self.client.get(page["next"]).json()
+        titles = [n["title"] for n in page["results"]]
+        self.assertEqual(titles[:2], ["N1", "N0"])
+        self.assertNotIn("Own", titles)
+
+    @patch("notifications.services.get_channel_layer")
+    def test_unread_count(self, mock_layer):
+        mock_layer.return_value = MagicMock(group_send=AsyncMock())
+        Notification.objects.filter(user__in=[self.student_user, self.sender]).delete()
+        for i in range(3):
+            NotificationService.notify_users(
+                [self.student_user, self.sender], f"Hello {i}", sender=self.sender, course=self.course
+            )
+        Notification.objects.filter(user=self.student_user, content__message="Hello 0").update(is_read=True)
+
+        url = reverse("notifications-unread-count")
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.get_token(self.student_user)}")
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data, {"unread": 2})
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.get_token(self.sender)}")
+        self.assertEqual(self.client.get(url).data, {"unread": 0})
+
     def test_sent_notification_list_view(self):
         token = self.get_token(self.sender)
         self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
@@ -111,8 +268,491 @@ class NotificationAPIViewTests(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, 200)
 
-        data = response.json()
+        data = response.json()["results"]
         data = [d for d in data if d["title"] == "Test"]
 
         self.assertEqual(len(data), 1)
-        self.assertEqual(data[0]["title"], "Test")
\ No newline at end of file
+        self.assertEqual(data[0]["title"], "Test")
+
+    @patch("notifications.services.get_channel_layer")
+    def test_sent_list_groups_broadcasts_in_constant_queries(self, mock_layer):
+        mock_layer.return_value = MagicMock(group_send=AsyncMock())
+        others = [
+            User.objects.create_user(
+                username=f"student{i}", email=f"student{i}@example.com", password="pass"
+            )
+            for i in range(3)
+        ]
+        recipients = [self.student_user, self.sender, *others]
+        for i in range(4):
+            NotificationService.notify_users(
+                recipients, f"Broadcast {i}", sender=self.sender, course=self.course, title=f"B{i}"
+            )
+        Notification.objects.filter(user=others[0], content__title="B3").update(is_read=True)
+
+        token = self.get_token(self.sender)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {token}")
+        url = reverse("notifications-sent")
+        # auth user, one grouped page query
+        with self.assertNumQueries(2):
+            response = self.client.get(url, {"page_size": 2})
+        self.assertEqual(response.status_code, 200)
+
+        page = response.json()
+        self.assertEqual([b["title"] for b in page["results"]], ["B3", "B2"])
+        self.assertEqual(page["results"][0]["recipient_count"], 4)
+        self.assertEqual(page["results"][0]["read_count"], 1)
+        self.assertEqual(page["results"][0]["course_title"], "Math")
+
+        response = self.client.get(page["next"])
+        titles = [b["title"] for b in response.json()["results"]]
+        self.assertEqual(titles[:2], ["B1", "B0"])
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class CourseGroupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass"
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@example.com", password="pass"
+        )
+        self.outsider = User.objects.create_user(
+            username="outsider", email="outsider@example.com", password="pass"
+        )
+        self.course = Course.objects.create(title="Math", teacher=self.teacher)
+        self.other_course = Course.objects.create(title="Physics", teacher=self.teacher)
+        self.student_data = StudentData.objects.create(student=self.student)
+        self.student_data.courses.add(self.course)
+
+    def connect(self, user, token_class=RefreshToken):
+        token = str(token_class.for_user(user).access_token)
+        return WebsocketCommunicator(URLRouter(websocket_urlpatterns), f"/ws/notifications/?token={token}")
+
+    def test_connect_authorizes_from_token_claims(self):
+        token_users.clear()
+
+        async def scenario(communicator):
+            connected, _ = await communicator.connect()
+            frame = await communicator.receive_json_from()
+            await communicator.disconnect()
+            return connected, frame
+
+        # the first connect loads the course ids into the shared cache,
+        # later ones need no query
+        with self.assertNumQueries(1):
+            connected, frame = async_to_sync(scenario)(self.connect(self.student, ClaimsRefreshToken))
+        self.assertTrue(connected)
+        self.assertEqual(frame["message"], f"Connected as {self.student.username}")
+        with self.assertNumQueries(0):
+            connected, _ = async_to_sync(scenario)(self.connect(self.student, ClaimsRefreshToken))
+        self.assertTrue(connected)
+
+        # tokens issued without the claims still work through a user lookup
+        with self.assertNumQueries(1):
+            connected, _ = async_to_sync(scenario)(self.connect(self.student))
+        self.assertTrue(connected)
+
+        bad = WebsocketCommunicator(URLRouter(websocket_urlpatterns), "/ws/notifications/?token=nope")
+        connected, _ = async_to_sync(bad.connect)()
+        self.assertFalse(connected)
+
+    def test_enrollment_change_drops_cached_course_ids(self):
+        async def connect():
+            communicator = self.connect(self.student, ClaimsRefreshToken)
+            await communicator.connect()
+            await communicator.receive_json_from()
+            await communicator.disconnect()
+
+        async_to_sync(connect)()
+        self.assertEqual(cached_course_ids(self.student.id)[0], [self.course.id])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student_data.courses.add(self.other_course)
+        self.assertIsNone(cached_course_ids(self.student.id)[0])
+
+        async_to_sync(connect)()
+        self.assertEqual(sorted(cached_course_ids(self.student.id)[0]), [self.course.id, self.other_course.id])
+
+    @patch("notifications.services.get_channel_layer")
+    def test_course_members_share_one_group_send(self, mock_layer):
+        mock_layer.return_value = MagicMock(group_send=AsyncMock())
+        with self.captureOnCommitCallbacks(execute=True):
+            notifications = NotificationService.notify_users(
+                [self.teacher, self.student, self.outsider], "Hi", sender=self.teacher, course=self.course
+            )
+
+        sends = dict(call.args for call in mock_layer.return_value.group_send.await_args_list)
+        self.assertEqual(sorted(sends), sorted([f"course_{self.course.id}", f"user_{self.outsider.id}"]))
+        self.assertEqual(sends[f"course_{self.course.id}"]["message_id"], notifications[0].content_id)
+        by_user = {n.user_id: n.id for n in notifications}
+        self.assertEqual(sends[f"user_{self.outsider.id}"]["notification"]["id"], by_user[self.outsider.id])
+
+    def test_socket_receives_its_own_receipt(self):
+        def notify():
+            with self.captureOnCommitCallbacks(execute=True):
+                return NotificationService.notify_users(
+                    [self.teacher, self.student], "Course hello", sender=self.teacher, course=self.course
+                )
+
+        async def scenario():
+            communicator = self.connect(self.student)
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+            await communicator.receive_json_from()
+            notifications = await database_sync_to_async(notify)()
+            frame = await communicator.receive_json_from()
+            self.assertTrue(await communicator.receive_nothing())
+            await communicator.disconnect()
+            return frame, notifications
+
+        frame, notifications = async_to_sync(scenario)()
+        receipt = next(n for n in notifications if n.user_id == self.student.id)
+        self.assertEqual(frame["type"], "new_notification")
+        self.assertEqual(frame["notification"]["id"], receipt.id)
+        self.assertEqual(frame["notification"]["message"], "Course hello")
+        self.assertFalse(frame["notification"]["is_read"])
+
+    def test_enrollment_changes_update_open_sockets(self):
+        def enroll(add):
+            with self.captureOnCommitCallbacks(execute=True):
+                if add:
+                    self.student_data.courses.add(self.other_course)
+                else:
+                    self.other_course.students.remove(self.student_data)
+
+        def notify(text):
+            with self.captureOnCommitCallbacks(execute=True):
+                NotificationService.notify_users(
+                    [self.student], text, sender=self.teacher, course=self.other_course
+                )
+
+        async def scenario():
+            communicator = self.connect(self.student)
+            await communicator.connect()
+            await communicator.receive_json_from()
+
+            await database_sync_to_async(enroll)(True)
+            # let the socket process the subscribe event first
+            await communicator.receive_nothing()
+            await database_sync_to_async(notify)("Welcome")
+            joined = await communicator.receive_json_from()
+
+            await database_sync_to_async(enroll)(False)
+            await communicator.receive_nothing()
+            await get_channel_layer().group_send(f"course_{self.other_course.id}", {
+                "type": "send_course_notification",
+                "notification": {"message": "Too late"},
+                "message_id": await database_sync_to_async(
+                    lambda: Notification.objects.filter(user=self.student).latest("id").content_id
+                )(),
+            })
+            left = await communicator.receive_nothing()
+            await communicator.disconnect()
+            return joined, left
+
+        joined, left = async_to_sync(scenario)()
+        self.assertEqual(joined["notification"]["message"], "Welcome")
+        self.assertTrue(left)
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    NOTIFICATION_REPLAY_LIMIT=3,
+)
+class NotificationReplayTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.teacher = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass"
+        )
+        self.student = User.objects.create_user(
+            username="student", email="student@example.com", password="pass"
+        )
+        self.seen = Notification.objects.create(
+            user=self.student, sender=self.teacher, title="Seen", message="old"
+        )
+
+    def session(self, query):
+        token = str(RefreshToken.for_user(self.student).access_token)
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f"/ws/notifications/?token={token}{query}"
+            )
+            await communicator.connect()
+            await communicator.receive_json_from()
+            frame = None if await communicator.receive_nothing() else await communicator.receive_json_from()
+            await communicator.disconnect()
+            return frame
+
+        return async_to_sync(scenario)()
+
+    def test_replays_missed_notifications(self):
+        missed = [
+            Notification.objects.create(user=self.student, sender=self.teacher, title=f"M{i}", message="x")
+            for i in range(2)
+        ]
+        Notification.objects.create(user=self.student, sender=self.student, title="Own", message="x")
+        Notification.objects.create(user=self.teacher, sender=self.student, title="Other", message="x")
+
+        frame = self.session(f"&last_seen_id={self.seen.id}")
+        self.assertEqual(frame["type"], "missed_notifications")
+        self.assertEqual([n["id"] for n in frame["notifications"]], [n.id for n in missed])
+        self.assertFalse(frame["truncated"])
+
+    def test_replay_is_capped(self):
+        for i in range(5):
+            Notification.objects.create(user=self.student, sender=self.teacher, title=f"M{i}", message="x")
+
+        frame = self.session(f"&last_seen_id={self.seen.id}")
+        self.assertEqual([n["title"] for n in frame["notifications"]], ["M0", "M1", "M2"])
+        self.assertTrue(frame["truncated"])
+
+    def test_no_replay_without_last_seen_id(self):
+        Notification.objects.create(user=self.student, sender=self.teacher, title="New", message="x")
+        self.assertIsNone(self.session(""))
+        self.assertIsNone(self.session("&last_seen_id=abc"))
+
+
+@override_settings(
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    NOTIFICATION_COALESCE_WINDOW_MS=50,
+    NOTIFICATION_COALESCE_MAX_DELAY_MS=1000,
+    NOTIFICATION_COALESCE_MAX_BATCH=3,
+)
+class NotificationCoalescingTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(
+            username="student", email="student@example.com", password="pass"
+        )
+
+    def frames(self, query, events):
+        token = str(RefreshToken.for_user(self.user).access_token)
+
+        async def scenario():
+            communicator = WebsocketCommunicator(
+                URLRouter(websocket_urlpatterns), f"/ws/notifications/?token={token}{query}"
+            )
+            await communicator.connect()
+            await communicator.receive_json_from()
+            for event in events:
+                await get_channel_layer().group_send(f"user_{self.user.id}", event)
+            frames = []
+            while not await communicator.receive_nothing(timeout=0.3):
+                frames.append(await communicator.receive_json_from())
+            await communicator.disconnect()
+            return frames
+
+        return async_to_sync(scenario)()
+
+    def notification(self, i):
+        return {"type": "send_notification", "notification": {"id": i}}
+
+    def test_burst_is_sent_as_batches(self):
+        frames = self.frames("&coalesce=1", [self.notification(i) for i in range(5)])
+        self.assertEqual([f["type"] for f in frames], ["notifications_batch"] * 2)
+        self.assertEqual([[n["id"] for n in f["notifications"]] for f in frames], [[0, 1, 2], [3, 4]])
+
+    def test_pending_batch_goes_out_before_other_frames(self):
+        frames = self.frames("&coalesce=1", [
+            self.notification(1), {"type": "all_notifications_read"}
+        ])
+        self.assertEqual([f["type"] for f in frames], ["notifications_batch", "all_notifications_read"])
+
+    def test_coalescing_is_opt_in(self):
+        frames = self.frames("", [self.notification(i) for i in range(2)])
+        self.assertEqual([f["type"] for f in frames], ["new_notification"] * 2)
+
+
+@override_settings(NOTIFICATION_OUTBOX_MAX_ATTEMPTS=2)
+class NotificationOutboxTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            username="teacher",
+            email="teacher@example.com",
+            password="pass"
+        )
+        self.student_user = User.objects.create_user(
+            username="student",
+            email="student@example.com",
+            password="pass"
+        )
+        self.course = Course.objects.create(title="Math", teacher=self.teacher)
+        NotificationOutbox.objects.all().delete()
+
+    def test_enrollment_is_queued_not_sent(self):
+        StudentData.objects.create(student=self.student_user).courses.add(self.course)
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.recipient_ids, [self.student_user.id])
+        self.assertEqual(entry.title, "Course Enrollment")
+        self.assertFalse(Notification.objects.filter(user=self.student_user).exists())
+
+        drain()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, NotificationOutbox.DELIVERED)
+        self.assertTrue(Notification.objects.filter(
+            user=self.student_user, content__title="Course Enrollment", content__sender=self.teacher
+        ).exists())
+
+    def test_reverse_enrollment_queues_one_row(self):
+        other = User.objects.create_user(username="other", email="other@example.com", password="pass")
+        students = [StudentData.objects.create(student=u) for u in (self.student_user, other)]
+        self.course.students.add(*students)
+        entry = NotificationOutbox.objects.get()
+        self.assertEqual(entry.recipient_ids, sorted([self.student_user.id, other.id]))
+
+    @patch("notifications.services.NotificationService.delivery_messages", side_effect=ConnectionError("down"))
+    def test_failed_delivery_backs_off_then_dead_letters(self, mock_messages):
+        entry = NotificationService.enqueue([self.student_user], "Hi", sender=self.teacher)
+
+        with self.assertLogs("notifications.outbox", level="ERROR"):
+            drain()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, NotificationOutbox.PENDING)
+        self.assertEqual(entry.attempts, 1)
+        self.assertIn("ConnectionError", entry.last_error)
+        self.assertGreater(entry.available_at, timezone.now() + timedelta(seconds=20))
+        self.assertFalse(Notification.objects.filter(content__message="Hi").exists())
+
+        self.assertEqual(drain(), 0)  # still backing off
+        NotificationOutbox.objects.filter(pk=entry.pk).update(available_at=timezone.now())
+        with self.assertLogs("notifications.outbox", level="ERROR"):
+            drain()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, NotificationOutbox.DEAD)
+        self.assertEqual(outbox_metrics()["dead"], 1)
+
+        mock_messages.side_effect = None
+        mock_messages.return_value = []
+        self.assertEqual(retry_dead(), 1)
+        drain()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, NotificationOutbox.DELIVERED)
+        self.assertEqual(Notification.objects.filter(content__message="Hi").count(), 1)
+
+    @patch("notifications.services.NotificationService.broadcast", side_effect=ConnectionError("down"))
+    def test_broadcast_runs_after_commit(self, mock_broadcast):
+        entry = NotificationService.enqueue([self.student_user], "Hi", sender=self.teacher)
+        with self.captureOnCommitCallbacks() as callbacks:
+            drain()
+        mock_broadcast.assert_not_called()
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, NotificationOutbox.DELIVERED)
+
+        # a socket that misses the message replays it; the row is not retried
+        with self.assertLogs("notifications.services", level="WARNING"):
+            for callback in callbacks:
+                callback()
+        mock_broadcast.assert_called_once()
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), (NotificationOutbox.DELIVERED, 0))
+
+    def test_claimed_rows_are_skipped_by_other_workers(self):
+        entry = NotificationService.enqueue([self.student_user], "Hi", sender=self.teacher)
+        self.assertEqual([claimed.pk for claimed in claim()], [entry.pk])
+        self.assertEqual(claim(), [])
+        entry.refresh_from_db()
+        self.assertGreater(entry.available_at, timezone.now() + timedelta(seconds=200))
+
+    def test_metrics_endpoint_is_admin_only(self):
+        NotificationService.enqueue([self.student_user], "Queued")
+        client = APIClient()
+        url = reverse("notifications-outbox-metrics")
+
+        client.force_authenticate(user=self.teacher)
+        self.assertEqual(client.get(url).status_code, 403)
+
+        admin = User.objects.create_superuser(username="admin", email="admin@example.com", password="pass")
+        client.force_authenticate(user=admin)
+        response = client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["pending"], 1)
+        self.assertEqual(response.data["due"], 1)
+        self.assertIn("delivery_lag_avg_seconds", response.data)
+
+
+
+@override_settings(
+    NOTIFICATION_RETENTION_DAYS=365,
+    NOTIFICATION_READ_RETENTION_DAYS=30,
+    NOTIFICATION_TITLE_RETENTION_DAYS={"Course Enrollment": 7},
+    NOTIFICATION_OUTBOX_RETENTION_DAYS=7,
+)
+class NotificationRetentionTests(TestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username="student", email="student@example.com", password="pass"
+        )
+        self.sender = User.objects.create_user(
+            username="teacher", email="teacher@example.com", password="pass"
+        )
+        self.now = timezone.now()
+
+    def receipt(self, title, age_days, is_read=False, read_days=None):
+        notification = Notification.objects.create(
+            user=self.user, sender=self.sender, title=title, message="x", is_read=is_read
+        )
+        Notification.objects.filter(id=notification.id).update(
+            created_at=self.now - timedelta(days=age_days),
+            read_at=self.now - timedelta(days=read_days) if read_days is not None else None,
+        )
+        return notification
+
+    def test_policies_purge_expired_rows(self):
+        keep = [
+            self.receipt("Course Enrollment", 3),
+            self.receipt("Reminder", 100),
+            self.receipt("Reminder", 100, is_read=True, read_days=10),
+        ]
+        self.receipt("Course Enrollment", 8)
+        self.receipt("Reminder", 100, is_read=True, read_days=40)
+        self.receipt("Reminder", 40, is_read=True)
+        self.receipt("Reminder", 400)
+        old_entry = NotificationOutbox.objects.create(
+            recipient_ids=[self.user.id], message="x", status=NotificationOutbox.DELIVERED,
+            delivered_at=self.now - timedelta(days=8),
+        )
+        pending = NotificationOutbox.objects.create(recipient_ids=[self.user.id], message="x")
+
+        report = run_retention(chunk_size=2)
+
+        self.assertEqual(report["purged"], {
+            "title:Course Enrollment": 1,
+            "read": 2,
+            "expired": 1,
+            "orphaned_messages": 4,
+            "delivered_outbox": 1,
+        })
+        self.assertEqual(report["total"], 9)
+        self.assertEqual(
+            sorted(Notification.objects.values_list("id", flat=True)), sorted(n.id for n in keep)
+        )
+        self.assertEqual(NotificationMessage.objects.count(), 3)
+        self.assertFalse(NotificationOutbox.objects.filter(id=old_entry.id).exists())
+        self.assertTrue(NotificationOutbox.objects.filter(id=pending.id).exists())
+
+    def test_purge_deletes_in_chunks(self):
+        for _ in range(5):
+            self.receipt("Reminder", 400)
+        # per chunk: select ids, delete; then one empty select
+        with self.assertNumQueries(7):
+            self.assertEqual(purge(Notification.objects.all(), chunk_size=2), 5)
+
+    @override_settings(NOTIFICATION_READ_RETENTION_DAYS=None, NOTIFICATION_TITLE_RETENTION_DAYS={})
+    def test_command_dry_run_reports_without_deleting(self):
+        self.receipt("Reminder", 400)
+        self.receipt("Reminder", 100, is_read=True, read_days=90)
+        out = StringIO()
+        call_command("purge_notifications", "--dry-run", stdout=out)
+
+        self.assertIn("expired: 1", out.getvalue())
+        self.assertNotIn("read:", out.getvalue())
+        self.assertIn("Would purge 1 rows", out.getvalue())
+        self.assertEqual(Notification.objects.count(), 2)
+
+        call_command("purge_notifications", "--pause", "0", stdout=StringIO())
+        self.assertEqual(Notification.objects.count(), 1)
@@ -1,17 +1,21 @@
 from django.urls import path
 from .views import (
     NotificationListView,
+    UnreadNotificationCountView,
     MarkNotificationReadView,
     SendCourseNotificationView,
     MarkAllReadView,
     SentNotificationListView,
+    OutboxMetricsView,
 )
 
 urlpatterns = [
     path('', NotificationListView.as_view(), name='notifications-list'),
+    path('unread-count/', UnreadNotificationCountView.as_view(), name='notifications-unread-count'),
     path('<int:pk>/mark-read/', MarkNotificationReadView.as_view(), name='notification-mark-read'),
     path('send-course/', SendCourseNotificationView.as_view(), name='notification-send-course'),
     path('mark-all-read/', MarkAllReadView.as_view(), name='notifications-mark-all-read'),
     path('sent/', SentNotificationListView.as_view(), name='notifications-sent'), 
+    path('outbox/metrics/', OutboxMetricsView.as_view(), name='notifications-outbox-metrics'),
 
 ]
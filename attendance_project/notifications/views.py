@@ -1,29 +1,47 @@
+from django.db.models import Count, Q
+from django.utils import timezone
+from rest_framework import generics
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from .models import Notification
-from .serializers import NotificationSerializer
+from .models import Notification, NotificationMessage
+from .pagination import NotificationCursorPagination
+from .serializers import NotificationSerializer, SentNotificationSerializer
 from students.models import Course
 from notifications.CourseSubject import CourseSubject
 from django.contrib.auth import get_user_model
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from .outbox import outbox_metrics
 
 User = get_user_model()
 
-class NotificationListView(APIView):
+class NotificationListView(generics.ListAPIView):
+    """The current user's inbox, newest first and cursor-paginated."""
+    serializer_class = NotificationSerializer
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        return Notification.objects.filter(user=user)\
+            .exclude(content__sender=user)\
+            .select_related("content__sender", "content__course")
+
+
+class UnreadNotificationCountView(APIView):
+    """Unread badge count, answered from the (user, is_read, created_at)
+    index alone. Receipts of a user's own broadcasts are created read."""
+
     def get(self, request):
-        notifications = Notification.objects.filter(user=request.user)\
-            .exclude(sender=request.user)\
-            .order_by("-created_at")
-        serializer = NotificationSerializer(notifications, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        unread = Notification.objects.filter(user=request.user, is_read=False).count()
+        return Response({"unread": unread}, status=status.HTTP_200_OK)
 
 class MarkNotificationReadView(APIView):
     def post(self, request, pk):
         try:
             notification = Notification.objects.get(pk=pk, user=request.user)
             notification.is_read = True
-            notification.save()
+            notification.read_at = timezone.now()
+            notification.save(update_fields=["is_read", "read_at"])
             return Response({"detail": "Notification marked as read."}, status=status.HTTP_200_OK)
         except Notification.DoesNotExist:
             return Response({"detail": "Not found."}, status=status.HTTP_404_NOT_FOUND)
@@ -43,12 +61,10 @@ class SendCourseNotificationView(APIView):
             )
 
         try:
-            course = Course.objects.get(id=course_id)
+            course = Course.objects.select_related("teacher").get(id=course_id)
 
             subject = CourseSubject(course)
-
-            for student_data in course.students.all():
-                subject.attach_student(student_data.student)
+            subject.attach_enrolled_students()
 
             if course.teacher:
                 subject.attach_teacher(course.teacher)
@@ -56,8 +72,8 @@ class SendCourseNotificationView(APIView):
             subject.notify(message, title=title, sender=sender)
 
             return Response(
-                {"detail": "Notifications sent."},
-                status=status.HTTP_201_CREATED
+                {"detail": "Notifications queued."},
+                status=status.HTTP_202_ACCEPTED
             )
 
         except Course.DoesNotExist:
@@ -69,26 +85,25 @@ class SendCourseNotificationView(APIView):
     
 class MarkAllReadView(APIView):
     def post(self, request):
-        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True)
+        Notification.objects.filter(user=request.user, is_read=False).update(is_read=True, read_at=timezone.now())
         return Response({"detail": "All notifications marked as read."}, status=status.HTTP_200_OK)
-class SentNotificationListView(APIView):
+class SentNotificationListView(generics.ListAPIView):
+    """Broadcasts sent by the current user, one entry per message with its
+    recipient and read counts, from a single grouped query per page."""
+    serializer_class = SentNotificationSerializer
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        user = self.request.user
+        to_others = ~Q(receipts__user=user)
+        return NotificationMessage.objects.filter(sender=user).annotate(
+            recipient_count=Count("receipts", filter=to_others),
+            read_count=Count("receipts", filter=to_others & Q(receipts__is_read=True)),
+        )
+
+
+class OutboxMetricsView(APIView):
+    permission_classes = [IsAdminUser]
+
     def get(self, request):
-        notifications = Notification.objects.filter(sender=request.user)
-        data = []
-
-        for n in notifications:
-            recipients = Notification.objects.filter(
-                title=n.title, created_at=n.created_at, sender=n.sender
-            ).exclude(user=n.sender)
-            
-            data.append({
-                "id": n.id,
-                "title": n.title,
-                "message": n.message,
-                "course_title": n.course.title if n.course else None,
-                "created_at": n.created_at,
-                "recipient_count": recipients.count(),
-                "recipient_ids": list(recipients.values_list('id', flat=True))
-            })
-
-        return Response(data)
+        return Response(outbox_metrics(), status=status.HTTP_200_OK)
@@ -0,0 +1,41 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from students.provisioning import provision_roster, read_roster
+
+
+class Command(BaseCommand):
+    help = (
+        "Create student accounts, StudentData rows and enrollments from a "
+        "roster CSV (columns: email, first_name, last_name, password, "
+        "courses) in bulk."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv", help="Path of the roster CSV file.")
+        parser.add_argument(
+            "--course", type=int, action="append", dest="courses", default=[],
+            help="Also enroll every student in this course id. Can be repeated.",
+        )
+        parser.add_argument(
+            "--workers", type=int,
+            help="Processes hashing passwords (default: one per CPU).",
+        )
+
+    def handle(self, *args, **options):
+        if options["workers"] is not None and options["workers"] < 1:
+            raise CommandError("--workers must be positive.")
+        try:
+            with open(options["csv"], newline="", encoding="utf-8-sig") as roster:
+                rows = read_roster(roster.read())
+        except (OSError, ValueError) as exc:
+            raise CommandError(str(exc))
+
+        summary = provision_roster(rows, options["courses"], options["workers"])
+
+        for problem in summary["invalid"]:
+            self.stderr.write(f"Skipped {problem}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {summary['created']} students ({summary['existing']} already existed), "
+            f"{summary['enrollments']} enrollments and {summary['notifications_queued']} "
+            f"queued notifications in {summary['elapsed_seconds']}s."
+        ))
@@ -0,0 +1,197 @@
+import csv
+import io
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+
+from accounts.models import User
+from attendance.cache import invalidate_course
+from notifications.services import NotificationService
+from .models import Course, StudentData
+from .signals import enrollment_message
+
+BATCH_SIZE = 1000
+
+
+def read_roster(text):
+    """Parse a roster CSV into ``(line, row)`` pairs.
+
+    Columns: ``email`` (required), ``first_name``, ``last_name``,
+    ``password`` and ``courses`` (course ids separated by ``;``). Rows
+    without a password get an unusable one.
+    """
+    reader = csv.DictReader(io.StringIO(text))
+    if not reader.fieldnames or "email" not in reader.fieldnames:
+        raise ValueError("The roster needs an 'email' column.")
+    return [(reader.line_num, row) for row in reader]
+
+
+def hash_passwords(passwords, workers=None):
+    """``make_password`` for every password. Hashing is deliberately slow
+    and dominates a large roster, so it runs on a process pool."""
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(passwords) <= workers:
+        return [make_password(password) for password in passwords]
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        chunksize = max(1, len(passwords) // (workers * 4))
+        return list(pool.map(make_password, passwords, chunksize=chunksize))
+
+
+def provision_roster(rows, course_ids=(), workers=None):
+    """Create the students of a roster with their ``StudentData`` and
+    enrollments, and return a summary.
+
+    ``rows`` are ``(line, row)`` pairs from ``read_roster``; every student
+    is also enrolled in ``course_ids``. Students whose email already exists
+    are not recreated, but still get missing enrollments; an email that
+    belongs to a teacher or admin is reported as invalid. Passwords are
+    hashed first, outside any transaction; everything else is written
+    with ``bulk_create`` in one transaction, which skips the
+    per-enrollment ``m2m_changed`` work: each course gets one batched
+    enrollment notification for its new students and one summary for its
+    teacher instead.
+    """
+    start = time.monotonic()
+    invalid = []
+    students = {}
+    seen = set()
+    for line, row in rows:
+        email = User.objects.normalize_email((row.get("email") or "").strip())
+        if not email:
+            invalid.append(f"line {line}: missing email")
+            continue
+        if email.lower() in seen:
+            invalid.append(f"line {line}: duplicate email {email}")
+            continue
+        seen.add(email.lower())
+        try:
+            courses = {int(c) for c in (row.get("courses") or "").split(";") if c.strip()}
+        except ValueError:
+            invalid.append(f"line {line}: course ids must be numbers")
+            continue
+        students[email] = {
+            "first_name": (row.get("first_name") or "").strip(),
+            "last_name": (row.get("last_name") or "").strip(),
+            "password": row.get("password") or None,
+            "courses": courses | set(course_ids),
+        }
+
+    wanted = set().union(*(s["courses"] for s in students.values())) if students else set()
+    courses = Course.objects.select_related("teacher").in_bulk(wanted)
+    for email, student in students.items():
+        unknown = student["courses"] - courses.keys()
+        if unknown:
+            invalid.append(f"{email}: unknown course ids {sorted(unknown)}")
+            student["courses"] -= unknown
+
+    # Hash before the transaction: it takes minutes for a large roster and
+    # must not hold locks meanwhile.
+    existing = set(
+        User.objects.filter(email_lower__in=seen).values_list("email_lower", flat=True)
+    )
+    candidates = [email for email in students if email.lower() not in existing]
+    hashes = dict(zip(
+        candidates, hash_passwords([students[email]["password"] for email in candidates], workers)
+    ))
+
+    with transaction.atomic():
+        # Someone may have registered meanwhile; they become existing users.
+        existing = dict(
+            User.objects.filter(email_lower__in=seen).values_list("email_lower", "role")
+        )
+        for email in list(students):
+            if existing.get(email.lower(), User.STUDENT) != User.STUDENT:
+                invalid.append(f"{email}: the existing account is not a student")
+                del students[email]
+        new = [email for email in candidates if email.lower() not in existing]
+
+        # Reserving usernames locks the UsernameSequence rows until commit,
+        # so it is the last step before the insert.
+        usernames = {}
+        by_base = {}
+        for email in new:
+            by_base.setdefault(User.objects.username_base(students[email]["first_name"], User.STUDENT), []).append(email)
+        for emails in by_base.values():
+            names = User.objects.reserve_usernames(students[emails[0]]["first_name"], User.STUDENT, len(emails))
+            usernames.update(zip(emails, names))
+
+        User.objects.bulk_create(
+            [
+                User(
+                    email=email,
+                    username=usernames[email],
+                    first_name=students[email]["first_name"],
+                    last_name=students[email]["last_name"],
+                    role=User.STUDENT,
+                    password=hashes[email],
+                )
+                for email in new
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        # Re-read the ids: bulk_create does not return them on MySQL.
+        user_ids = dict(
+            User.objects.filter(email_lower__in=seen, role=User.STUDENT).values_list("email_lower", "id")
+        )
+
+        profiles = dict(
+            StudentData.objects.filter(student_id__in=user_ids.values()).values_list("student_id", "id")
+        )
+        missing = [user_id for user_id in user_ids.values() if user_id not in profiles]
+        StudentData.objects.bulk_create(
+            [StudentData(student_id=user_id) for user_id in missing], batch_size=BATCH_SIZE
+        )
+        if missing:
+            profiles.update(
+                StudentData.objects.filter(student_id__in=missing).values_list("student_id", "id")
+            )
+
+        Enrollment = StudentData.courses.through
+        enrolled = set(
+            Enrollment.objects.filter(studentdata_id__in=profiles.values()).values_list("studentdata_id", "course_id")
+        )
+        added = {}
+        for email, student in students.items():
+            user_id = user_ids[email.lower()]
+            for course_id in student["courses"]:
+                if (profiles[user_id], course_id) not in enrolled:
+                    added.setdefault(course_id, []).append(user_id)
+        Enrollment.objects.bulk_create(
+            [
+                Enrollment(studentdata_id=profiles[user_id], course_id=course_id)
+                for course_id, ids in added.items()
+                for user_id in ids
+            ],
+            batch_size=BATCH_SIZE,
+        )
+
+        queued = 0
+        for course_id, ids in added.items():
+            course = courses[course_id]
+            invalidate_course(course_id)
+            NotificationService.sync_course_subscriptions(ids, [course_id])
+            NotificationService.enqueue(
+                ids, title="Course Enrollment", message=enrollment_message(course),
+                sender=course.teacher, course=course,
+            )
+            queued += 1
+            if course.teacher:
+                NotificationService.enqueue(
+                    [course.teacher],
+                    title="Roster Update",
+                    message=f"{len(ids)} students were enrolled in '{course.title}'.",
+                    sender=None,
+                )
+                queued += 1
+
+    return {
+        "created": len(new),
+        "existing": sum(role == User.STUDENT for role in existing.values()),
+        "enrollments": sum(len(ids) for ids in added.values()),
+        "notifications_queued": queued,
+        "invalid": invalid,
+        "elapsed_seconds": round(time.monotonic() - start, 3),
+    }
@@ -1,28 +1,77 @@
-from django.db.models.signals import post_save, m2m_changed
+from django.db.models.signals import pre_save, post_save, m2m_changed
 from django.dispatch import receiver
+from accounts.models import User
 from .models import Course, StudentData
 from notifications.services import NotificationService
 
 @receiver(post_save, sender=Course)
 def notify_teacher_on_course(sender, instance, created, **kwargs):
-    print(f"[DEBUG] post_save signal fired for Course id={instance.id}, created={created}")
     if created and instance.teacher:
-        NotificationService.notify_user(
-            user=instance.teacher,
+        NotificationService.enqueue(
+            [instance.teacher],
             title="Course Assignment",
             message=f"Welcome {instance.teacher.username}, you are now assigned to teach '{instance.title}'.",
             sender=None
         )
 
+def enrollment_message(course):
+    return f"Welcome to '{course.title}'. Teacher: {course.teacher.username if course.teacher else 'N/A'}."
+
 @receiver(m2m_changed, sender=StudentData.courses.through)
-def notify_student_on_assignment(sender, instance, action, pk_set, **kwargs):
-    print(f"[DEBUG] m2m_changed signal fired for StudentData id={instance.id}, action={action}, pk_set={pk_set}")
-    if action == "post_add":
-        for course_id in pk_set:
-            course = Course.objects.get(id=course_id)
-            NotificationService.notify_user(
-                user=instance.student,
-                title="Course Enrollment",
-                message=f"Welcome to '{course.title}'. Teacher: {course.teacher.username if course.teacher else 'N/A'}.",
-                sender=course.teacher
-            )
+def notify_student_on_assignment(sender, instance, action, pk_set, reverse, **kwargs):
+    if action != "post_add" or not pk_set:
+        return
+
+    if reverse:
+        # course.students.add(...): one course, several students.
+        NotificationService.enqueue(
+            User.objects.filter(studentdata__id__in=pk_set),
+            title="Course Enrollment",
+            message=enrollment_message(instance),
+            sender=instance.teacher
+        )
+        return
+
+    for course in Course.objects.filter(id__in=pk_set).select_related("teacher"):
+        NotificationService.enqueue(
+            [instance.student_id],
+            title="Course Enrollment",
+            message=enrollment_message(course),
+            sender=course.teacher
+        )
+
+
+@receiver(pre_save, sender=Course)
+def remember_previous_teacher(sender, instance, **kwargs):
+    instance._previous_teacher_id = (
+        Course.objects.filter(pk=instance.pk).values_list("teacher_id", flat=True).first()
+        if instance.pk else None
+    )
+
+@receiver(post_save, sender=Course)
+def sync_teacher_subscription(sender, instance, **kwargs):
+    previous = getattr(instance, "_previous_teacher_id", None)
+    if previous == instance.teacher_id:
+        return
+    if previous:
+        NotificationService.sync_course_subscriptions([previous], [instance.pk], subscribe=False)
+    if instance.teacher_id:
+        NotificationService.sync_course_subscriptions([instance.teacher_id], [instance.pk])
+
+@receiver(m2m_changed, sender=StudentData.courses.through)
+def sync_enrollment_subscriptions(sender, instance, action, pk_set, reverse, **kwargs):
+    """Keep the open sockets' course groups in step with enrollments."""
+    if action not in ("post_add", "post_remove", "pre_clear"):
+        return
+
+    if reverse:
+        course_ids = [instance.pk]
+        students = StudentData.objects.filter(id__in=pk_set) if action != "pre_clear" else instance.students.all()
+        user_ids = students.values_list("student_id", flat=True)
+    else:
+        course_ids = pk_set if action != "pre_clear" else instance.courses.values_list("id", flat=True)
+        user_ids = [instance.student_id]
+
+    NotificationService.sync_course_subscriptions(
+        user_ids, course_ids or [], subscribe=action == "post_add"
+    )
@@ -1,12 +1,18 @@
+from io import StringIO
+from tempfile import NamedTemporaryFile
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
 from django.test import TestCase
 from rest_framework.test import APIClient
 from django.urls import reverse
 from unittest.mock import patch
 from accounts.models import User
+from notifications.models import NotificationOutbox
 from students.models import Course, StudentData
+from students.provisioning import provision_roster, read_roster
 
 
-@patch('notifications.services.NotificationService.notify_user')
 class StudentsAndTeachersTests(TestCase):
     def setUp(self):
         self.teacher = User.objects.create_user(
@@ -41,7 +47,7 @@ class StudentsAndTeachersTests(TestCase):
 
         self.client = APIClient()
 
-    def test_student_dashboard_authenticated(self, mock_notify):
+    def test_student_dashboard_authenticated(self):
         self.client.force_authenticate(user=self.student)
         url = reverse('student_dashboard')
         response = self.client.get(url)
@@ -50,7 +56,7 @@ class StudentsAndTeachersTests(TestCase):
         self.assertIn('Biology 101', course_titles)
         self.assertNotIn('Chemistry 101', course_titles)
 
-    def test_student_dashboard_no_courses(self, mock_notify):
+    def test_student_dashboard_no_courses(self):
         new_student = User.objects.create_user(
             email='newstudent@example.com',
             password='newpass',
@@ -62,7 +68,7 @@ class StudentsAndTeachersTests(TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.data['courses'], [])
 
-    def test_teacher_dashboard_authenticated(self, mock_notify):
+    def test_teacher_dashboard_authenticated(self):
         self.client.force_authenticate(user=self.teacher)
         url = reverse('teacher_dashboard')
         response = self.client.get(url)
@@ -71,14 +77,14 @@ class StudentsAndTeachersTests(TestCase):
         self.assertIn('Biology 101', course_titles)
         self.assertIn('Chemistry 101', course_titles)
 
-    def test_teacher_dashboard_not_teacher(self, mock_notify):
+    def test_teacher_dashboard_not_teacher(self):
         self.client.force_authenticate(user=self.student)
         url = reverse('teacher_dashboard')
         response = self.client.get(url)
         self.assertEqual(response.status_code, 403)
         self.assertEqual(response.data['detail'], 'Not authorized')
 
-    def test_course_students_view(self, mock_notify):
+    def test_course_students_view(self):
         self.client.force_authenticate(user=self.teacher)
         url = reverse('course_students', kwargs={'pk': self.course1.id})
         response = self.client.get(url)
@@ -86,14 +92,14 @@ class StudentsAndTeachersTests(TestCase):
         student_names = [s['name'] for s in response.data]
         self.assertIn('Stu Dent', student_names)
 
-    def test_course_students_view_not_found(self, mock_notify):
+    def test_course_students_view_not_found(self):
         self.client.force_authenticate(user=self.teacher)
         url = reverse('course_students', kwargs={'pk': 999})
         response = self.client.get(url)
         self.assertEqual(response.status_code, 404)
         self.assertEqual(response.data['detail'], 'Course not found')
 
-    def test_enroll_student_success(self, mock_notify):
+    def test_enroll_student_success(self):
         new_course = Course.objects.create(title='Physics 101', teacher=self.teacher)
         self.client.force_authenticate(user=self.student)
         url = reverse('enroll_student')
@@ -101,17 +107,111 @@ class StudentsAndTeachersTests(TestCase):
         self.assertEqual(response.status_code, 201)
         self.assertEqual(response.data['detail'], 'Enrolled successfully')
 
-    def test_enroll_student_already_enrolled(self, mock_notify):
+    def test_enroll_student_already_enrolled(self):
         self.client.force_authenticate(user=self.student)
         url = reverse('enroll_student')
         response = self.client.post(url, {'course_id': self.course1.id})
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.data['detail'], 'Already enrolled')
 
-    def test_enroll_student_course_full(self, mock_notify):
+    def test_enroll_student_course_full(self):
         full_course = Course.objects.create(title='Full Course', teacher=self.teacher, max_students=0)
         self.client.force_authenticate(user=self.student)
         url = reverse('enroll_student')
         response = self.client.post(url, {'course_id': full_course.id})
         self.assertEqual(response.status_code, 400)
         self.assertEqual(response.data['detail'], 'Course is full')
+
+
+class RosterProvisioningTests(TestCase):
+    def setUp(self):
+        self.teacher = User.objects.create_user(
+            email="teacher@example.com", password="pass", first_name="Teach", role="TCR"
+        )
+        self.math = Course.objects.create(title="Math", teacher=self.teacher)
+        self.physics = Course.objects.create(title="Physics", teacher=self.teacher)
+        self.existing = User.objects.create_user(email="old@example.com", password="pass", first_name="Old")
+        StudentData.objects.create(student=self.existing).courses.add(self.math)
+        NotificationOutbox.objects.all().delete()
+        self.csv = (
+            "email,first_name,last_name,password,courses\n"
+            f"amal@example.com,Amal,Saleh,secret1,{self.physics.id}\n"
+            "omar@example.com,Omar,Ali,,\n"
+            "AMAL@example.com,Amal,Dup,x,\n"
+            ",No,Email,x,\n"
+            "old@example.com,Old,Student,x,\n"
+            "lina@example.com,Lina,Nasser,pw,999\n"
+        )
+
+    def test_provision_roster_in_bulk(self):
+        with patch("notifications.services.NotificationService.sync_course_subscriptions") as sync:
+            summary = provision_roster(read_roster(self.csv), [self.math.id], workers=2)
+
+        self.assertEqual(summary["created"], 3)
+        self.assertEqual(summary["existing"], 1)
+        self.assertEqual(len(summary["invalid"]), 3)
+        amal = User.objects.get(email="amal@example.com")
+        self.assertEqual((amal.role, amal.last_name), ("STU", "Saleh"))
+        self.assertTrue(amal.username.startswith("amal_STU"))
+        self.assertTrue(amal.check_password("secret1"))
+        self.assertFalse(User.objects.get(email="omar@example.com").has_usable_password())
+
+        amal_data = StudentData.objects.get(student=amal)
+        self.assertEqual(set(amal_data.courses.values_list("title", flat=True)), {"Math", "Physics"})
+        self.assertEqual(StudentData.objects.filter(student=self.existing).count(), 1)
+        # amal, omar, lina in Math (old was already), amal in Physics
+        self.assertEqual(summary["enrollments"], 4)
+
+        enrollment = NotificationOutbox.objects.get(title="Course Enrollment", course=self.math)
+        self.assertEqual(len(enrollment.recipient_ids), 3)
+        self.assertEqual(NotificationOutbox.objects.filter(title="Roster Update").count(), 2)
+        self.assertEqual(summary["notifications_queued"], 4)
+        subscribed = {course_ids[0]: set(user_ids) for (user_ids, course_ids), _ in sync.call_args_list}
+        self.assertEqual(subscribed[self.physics.id], {amal.id})
+        self.assertEqual(len(subscribed[self.math.id]), 3)
+
+        again = provision_roster(read_roster(self.csv), [self.math.id], workers=1)
+        self.assertEqual((again["created"], again["enrollments"]), (0, 0))
+
+    def test_existing_teacher_is_not_provisioned(self):
+        roster = self.csv + f"teacher@example.com,Teach,Er,x,{self.physics.id}\n"
+        summary = provision_roster(read_roster(roster), [self.math.id], workers=1)
+
+        self.assertIn("teacher@example.com: the existing account is not a student", summary["invalid"])
+        self.assertEqual(summary["existing"], 1)
+        self.assertFalse(StudentData.objects.filter(student=self.teacher).exists())
+        self.assertNotIn(self.teacher.id, self.physics.students.values_list("student_id", flat=True))
+
+    def test_command(self):
+        with NamedTemporaryFile("w", suffix=".csv") as roster:
+            roster.write(self.csv)
+            roster.flush()
+            out, err = StringIO(), StringIO()
+            call_command("provision_roster", roster.name, "--workers", "1", stdout=out, stderr=err)
+        self.assertIn("Created 3 students (1 already existed)", out.getvalue())
+        self.assertIn("duplicate email", err.getvalue())
+
+    def test_api_is_admin_only(self):
+        client = APIClient()
+        url = reverse("roster_provision")
+        client.force_authenticate(self.teacher)
+        self.assertEqual(client.post(url, {}).status_code, 403)
+
+        admin = User.objects.create_superuser(email="admin@example.com", password="pass")
+        client.force_authenticate(admin)
+        self.assertEqual(client.post(url, {}).status_code, 400)
+        upload = SimpleUploadedFile("roster.csv", self.csv.encode())
+        response = client.post(url, {"file": upload, "course_ids": [self.physics.id]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data["created"], 3)
+        self.assertEqual(self.physics.students.count(), 4)
+
+    def test_api_rejects_large_rosters(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser(email="admin@example.com", password="pass"))
+        upload = SimpleUploadedFile("roster.csv", self.csv.encode())
+        with self.settings(ROSTER_UPLOAD_MAX_ROWS=5):
+            response = client.post(reverse("roster_provision"), {"file": upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("provision_roster", response.data["detail"])
+        self.assertFalse(User.objects.filter(email="amal@example.com").exists())
@@ -5,7 +5,8 @@ from .views import (
     CourseListCreateView,
     CourseDetailView,
     EnrollStudentView,
-    CourseStudentsView
+    CourseStudentsView,
+    RosterProvisionView
 )
 
 urlpatterns = [
@@ -15,4 +16,5 @@ urlpatterns = [
     path("courses/<int:pk>/", CourseDetailView.as_view(), name="course_detail"),
     path("courses/enroll/", EnrollStudentView.as_view(), name="enroll_student"),
     path("courses/<int:pk>/students/", CourseStudentsView.as_view(), name="course_students"),
+    path("roster/provision/", RosterProvisionView.as_view(), name="roster_provision"),
 ]
@@ -1,8 +1,11 @@
+from django.conf import settings
 from rest_framework import generics, status
 from rest_framework.views import APIView
 from rest_framework.response import Response
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import FormParser, MultiPartParser
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
 from .models import StudentData, Course
+from .provisioning import provision_roster, read_roster
 from .serializers import CourseSerializer, StudentDataSerializer, StudentSerializer
 
 class StudentDashboardView(APIView):
@@ -83,3 +86,35 @@ class CourseStudentsView(APIView):
         student_data_qs = StudentData.objects.filter(courses=course)
         serializer = StudentSerializer(student_data_qs, many=True)
         return Response(serializer.data)
+
+
+class RosterProvisionView(APIView):
+    """Bulk-create students from an uploaded roster CSV (see
+    ``students.provisioning``). Optional ``course_ids`` apply to every
+    row.
+
+    Provisioning runs inside the request and hashes passwords in this
+    process, so uploads are capped at ``ROSTER_UPLOAD_MAX_ROWS`` rows;
+    larger rosters go through the ``provision_roster`` command."""
+    permission_classes = [IsAdminUser]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def post(self, request):
+        upload = request.FILES.get("file")
+        if upload is None:
+            return Response({"detail": "Upload the roster as 'file'."}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            rows = read_roster(upload.read().decode("utf-8-sig"))
+            course_ids = [int(c) for c in request.data.getlist("course_ids")]
+        except (UnicodeDecodeError, ValueError) as exc:
+            return Response({"detail": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        if len(rows) > settings.ROSTER_UPLOAD_MAX_ROWS:
+            return Response(
+                {"detail": f"Rosters over {settings.ROSTER_UPLOAD_MAX_ROWS} rows must be "
+                           "provisioned with the provision_roster command."},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        summary = provision_roster(rows, course_ids, workers=1)
+        return Response(summary, status=status.HTTP_201_CREATED)
@@ -1,4 +1,4 @@
-import React, { useState, useEffect, useCallback } from "react";
+import React, { useState, useEffect, useCallback, useRef } from "react";
 import { ArrowLeft, Bell, Calendar, BookOpen, CheckCircle, Filter, Send, Inbox, Users } from "lucide-react";
 import { useNavigate } from "react-router-dom";
 
@@ -9,63 +9,33 @@ export default function AllNotificationsPage() {
   const [markingAll, setMarkingAll] = useState(false);
   const navigate = useNavigate();
   const [tab, setTab] = useState("inbox");
+  const [nextPage, setNextPage] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
+  const [unreadTotal, setUnreadTotal] = useState(0);
+  // Newest inbox id seen, so a reconnecting socket only replays what was missed.
+  const lastSeenId = useRef(null);
+
+  const trackSeen = (notifs) => {
+    notifs.forEach(n => {
+      if (lastSeenId.current === null || n.id > lastSeenId.current) lastSeenId.current = n.id;
+    });
+  };
 
+  // The API already groups sent notifications into one entry per broadcast.
   const processSentNotifications = (notifs) => {
     if (tab === "inbox") return notifs;
-    
-    const grouped = {};
-    
-    notifs.forEach(notif => {
-      const timestamp = notif.created_at ? new Date(notif.created_at).getTime() : 0;
-      const key = `${Math.floor(timestamp / 60000)}_${notif.title || notif.message?.substring(0, 50)}`;
-      
-      if (!grouped[key]) {
-        grouped[key] = {
-          ...notif,
-          recipients: [],
-          recipientCount: 0,
-          allIds: [], 
-          isSentTab: true 
-        };
-      }
-      
-      if (notif.id && !grouped[key].allIds.includes(notif.id)) {
-        grouped[key].allIds.push(notif.id);
-      }
-      
-      if (notif.recipient_name || notif.recipient_email) {
-        const recipientInfo = {
-          name: notif.recipient_name || "Recipient",
-          email: notif.recipient_email,
-          role: notif.recipient_role
-        };
-        
-        const existing = grouped[key].recipients.find(
-          r => r.email === recipientInfo.email
-        );
-        if (!existing) {
-          grouped[key].recipients.push(recipientInfo);
-          grouped[key].recipientCount++;
-        }
-      } else {
-        grouped[key].recipientCount++;
-      }
-    });
-    
-    const result = Object.values(grouped).sort((a, b) => {
-      const timeA = a.created_at ? new Date(a.created_at).getTime() : 0;
-      const timeB = b.created_at ? new Date(b.created_at).getTime() : 0;
-      return timeB - timeA;
-    });
-    
-    return result;
+
+    return notifs.map(notif => ({
+      ...notif,
+      recipients: [],
+      recipientCount: notif.recipient_count,
+      isSentTab: true
+    }));
   };
 
   const processedNotifications = processSentNotifications(notifications);
   
-  const unreadCount = tab === "inbox" 
-    ? processedNotifications.filter(n => !n.is_read).length 
-    : 0;
+  const unreadCount = tab === "inbox" ? unreadTotal : 0;
   
   const filteredNotifications = processedNotifications.filter(n => {
     if (filter === "all") return true;
@@ -79,12 +49,20 @@ export default function AllNotificationsPage() {
 
     setLoading(true);
     try {
-      const res = await fetch("http://localhost:8000/api/notifications/", {
-        headers: { Authorization: `Bearer ${token}` },
-      });
+      const headers = { Authorization: `Bearer ${token}` };
+      const [res, countRes] = await Promise.all([
+        fetch("http://localhost:8000/api/notifications/", { headers }),
+        fetch("http://localhost:8000/api/notifications/unread-count/", { headers }),
+      ]);
       if (res.ok) {
         const data = await res.json();
-        setNotifications(data);
+        setNotifications(data.results);
+        setNextPage(data.next);
+        trackSeen(data.results);
+        if (countRes.ok) {
+          const countData = await countRes.json();
+          setUnreadTotal(countData.unread);
+        }
       } else if (res.status === 401) {
         localStorage.removeItem("access_token");
         localStorage.removeItem("refresh_token");
@@ -108,7 +86,8 @@ export default function AllNotificationsPage() {
       });
       if (res.ok) {
         const data = await res.json();
-        setNotifications(data);
+        setNotifications(data.results);
+        setNextPage(data.next);
       } else if (res.status === 401) {
         localStorage.removeItem("access_token");
         localStorage.removeItem("refresh_token");
@@ -121,7 +100,29 @@ export default function AllNotificationsPage() {
     }
   }, [navigate]);
 
+  const loadMore = async () => {
+    const token = localStorage.getItem("access_token");
+    if (!token || !nextPage) return;
+
+    setLoadingMore(true);
+    try {
+      const res = await fetch(nextPage, {
+        headers: { Authorization: `Bearer ${token}` },
+      });
+      if (res.ok) {
+        const data = await res.json();
+        setNotifications(prev => [...prev, ...data.results]);
+        setNextPage(data.next);
+      }
+    } catch (err) {
+      console.error("Failed to load more notifications:", err);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   useEffect(() => {
+    setNextPage(null);
     if (tab === "inbox") fetchInbox();
     else fetchSent();
   }, [tab, fetchInbox, fetchSent]);
@@ -131,42 +132,78 @@ export default function AllNotificationsPage() {
     if (!token) return;
 
     const wsProtocol = window.location.protocol === "https:" ? "wss" : "ws";
-    const wsUrl = `${wsProtocol}://localhost:8000/ws/notifications/?token=${encodeURIComponent(token)}`;
-    
-    const ws = new WebSocket(wsUrl);
-
-    ws.onopen = () => {
-      console.log("WebSocket connected");
+    let ws = null;
+    let reconnectTimer = null;
+    let closed = false;
+
+    // Adds notifications that arrived oldest first on top of the list.
+    const prependNotifications = (notifs) => {
+      trackSeen(notifs);
+      const added = [...notifs].reverse();
+      setNotifications(prev => [...added, ...prev.filter(n => !added.some(m => m.id === n.id))]);
+      setUnreadTotal(prev => prev + added.filter(n => !n.is_read).length);
     };
 
-    ws.onmessage = (event) => {
-      try {
-        const data = JSON.parse(event.data);
-        
-        if (data.type === "new_notification" && tab === "inbox") {
-          setNotifications(prev => [data.notification, ...prev]);
-        } else if (data.type === "notification_read" && tab === "inbox") {
-          setNotifications(prev =>
-            prev.map(n => n.id === data.notification_id ? { ...n, is_read: true } : n)
-          );
-        } else if (data.type === "all_notifications_read" && tab === "inbox") {
-          setNotifications(prev => prev.map(n => ({ ...n, is_read: true })));
+    const connect = () => {
+      const resume = lastSeenId.current !== null ? `&last_seen_id=${lastSeenId.current}` : "";
+      // coalesce=1: bursts arrive as one notifications_batch frame.
+      ws = new WebSocket(
+        `${wsProtocol}://localhost:8000/ws/notifications/?token=${encodeURIComponent(token)}&coalesce=1${resume}`
+      );
+
+      ws.onopen = () => {
+        console.log("WebSocket connected");
+      };
+
+      ws.onmessage = (event) => {
+        try {
+          const data = JSON.parse(event.data);
+
+          if (data.type === "new_notification" && tab === "inbox") {
+            trackSeen([data.notification]);
+            setNotifications(prev => [data.notification, ...prev.filter(n => n.id !== data.notification.id)]);
+            setUnreadTotal(prev => prev + 1);
+          } else if (data.type === "missed_notifications" && tab === "inbox") {
+            if (data.truncated) {
+              // Missed more than the server replays: reload the first page.
+              fetchInbox();
+              return;
+            }
+            prependNotifications(data.notifications);
+          } else if (data.type === "notifications_batch" && tab === "inbox") {
+            prependNotifications(data.notifications);
+          } else if (data.type === "notification_read" && tab === "inbox") {
+            setNotifications(prev =>
+              prev.map(n => n.id === data.notification_id ? { ...n, is_read: true } : n)
+            );
+          } else if (data.type === "all_notifications_read" && tab === "inbox") {
+            setNotifications(prev => prev.map(n => ({ ...n, is_read: true })));
+            setUnreadTotal(0);
+          }
+        } catch (err) {
+          console.error("Failed to parse WebSocket message:", err);
         }
-      } catch (err) {
-        console.error("Failed to parse WebSocket message:", err);
-      }
-    };
+      };
+
+      ws.onerror = (error) => {
+        console.error("WebSocket error:", error);
+      };
 
-    ws.onerror = (error) => {
-      console.error("WebSocket error:", error);
+      ws.onclose = () => {
+        if (!closed) reconnectTimer = setTimeout(connect, 3000);
+      };
     };
 
+    connect();
+
     return () => {
+      closed = true;
+      clearTimeout(reconnectTimer);
       if (ws && ws.readyState === WebSocket.OPEN) {
         ws.close();
       }
     };
-  }, [tab]);
+  }, [tab, fetchInbox]);
 
   const handleMarkAsRead = async (id) => {
   if (tab !== "inbox") return;
@@ -181,6 +218,7 @@ export default function AllNotificationsPage() {
       setNotifications(prev =>
         prev.map(n => n.id === id ? { ...n, is_read: true } : n)
       );
+      setUnreadTotal(prev => Math.max(prev - 1, 0));
     }
   } catch (err) {
     console.error("Failed to mark notification as read:", err);
@@ -207,6 +245,7 @@ export default function AllNotificationsPage() {
 
       if (res.ok) {
         setNotifications(prev => prev.map(n => ({ ...n, is_read: true })));
+        setUnreadTotal(0);
         
         alert("All notifications marked as read!");
       } else {
@@ -578,6 +617,18 @@ export default function AllNotificationsPage() {
             )}
           </div>
 
+          {nextPage && !loading && (
+            <div className="mt-6 text-center">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-4 py-2 text-sm font-medium text-blue-600 hover:text-blue-800 hover:bg-blue-50 rounded-lg transition-colors disabled:opacity-50"
+              >
+                {loadingMore ? "Loading..." : "Load more"}
+              </button>
+            </div>
+          )}
+
           {filteredNotifications.length > 0 && !loading && (
             <div className="mt-6 text-center">
               <p className="text-sm text-gray-500">
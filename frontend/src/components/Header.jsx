@@ -5,7 +5,7 @@ import { useNavigate } from "react-router-dom";
 const Header = ({ onLogout, userType }) => {
   const [showMenu, setShowMenu] = useState(false);
   const [userName, setUserName] = useState("");
-  const [notifications, setNotifications] = useState([]);
+  const [unreadCount, setUnreadCount] = useState(0);
   const menuRef = useRef(null);
   const navigate = useNavigate();
 
@@ -28,26 +28,24 @@ const Header = ({ onLogout, userType }) => {
   }, []);
 
   useEffect(() => {
-    const fetchNotifications = async () => {
+    const fetchUnreadCount = async () => {
       const token = localStorage.getItem("access_token");
       if (!token) return;
       try {
-        const res = await fetch("http://localhost:8000/api/notifications/", {
+        const res = await fetch("http://localhost:8000/api/notifications/unread-count/", {
           headers: { Authorization: `Bearer ${token}` },
         });
         if (res.ok) {
           const data = await res.json();
-          setNotifications(data);
+          setUnreadCount(data.unread);
         }
       } catch (err) {
-        console.error("Failed to fetch notifications:", err);
+        console.error("Failed to fetch unread notification count:", err);
       }
     };
-    fetchNotifications();
+    fetchUnreadCount();
   }, []);
 
-  const unreadCount = notifications.filter(n => !n.is_read).length;
-
   const handleLogout = () => {
     setShowMenu(false);
     localStorage.removeItem("access_token");